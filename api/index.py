@@ -6,8 +6,11 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from src.main import create_app
 
-# Create the Flask app instance for Vercel
+# Create the Flask app instance for Vercel. Cold starts stay cheap: the
+# production config does not touch the schema (run `flask --app api/index.py
+# migrate` when deploying) and the openai SDK is only imported by the first
+# LLM request.
 app = create_app('production')
 
 # For Vercel serverless functions, we need to export the app directly
-# Vercel will handle the WSGI interface automatically
\ No newline at end of file
+# Vercel will handle the WSGI interface automatically
@@ -7,10 +7,8 @@ import sys
 # Add the parent directory to the path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-from flask import Flask
-from src.main import create_app
-
-app = create_app('production')
+# Same app instance as api/index.py, so a warm instance builds it only once
+from api.index import app
 
 # This will handle all /api/users/* routes
 if __name__ == "__main__":
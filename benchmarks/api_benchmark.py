@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Benchmark the HTTP API in-process, for comparing runs across commits.
+
+For each dataset size the app is built with ``create_app('testing')`` on a
+fresh file-backed SQLite database (or ``--database memory``), seeded with
+synthetic notes and share links, and every scenario is driven through the
+Flask test client: ``--warmup`` untimed requests, then ``--requests`` timed
+ones spread over ``--concurrency`` threads. The LLM is replaced by a
+deterministic stub client with a fixed ``--llm-latency-ms``, so nothing
+leaves the machine and generate requests cost the same on every run.
+
+Per scenario the report has throughput, latency percentiles and the mean
+number of SQL statements per request (from the Server-Timing header). Runs
+are reproducible for a given ``--seed``; write them with ``--output`` and
+pass an earlier file to ``--compare`` to see the change in median latency.
+
+Usage:
+    python benchmarks/api_benchmark.py                               # 1k and 10k notes
+    python benchmarks/api_benchmark.py --notes 100000 --requests 500 --output after.json --compare before.json
+    python benchmarks/api_benchmark.py --scenarios list get search --concurrency 4
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('GITHUB_TOKEN', 'benchmark')
+os.environ.setdefault('FLASK_CONFIG', 'testing')
+
+WORDS = ('meeting', 'project', 'budget', 'travel', 'recipe', 'idea', 'review', 'launch', 'draft', 'invoice',
+         'garden', 'workout', 'reading', 'design', 'release', 'deadline', 'family', 'weekend', 'research', 'summary')
+WORDS_PER_NOTE = 80
+SHARES = 200
+SEED_BATCH_SIZE = 5000
+
+_QUERIES_RE = re.compile(r'desc="(\d+) queries"')
+
+class StubLLMClient:
+    """Stands in for the OpenAI client: replies to chat completions with a
+    structured note derived from the prompt, after a fixed latency"""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, messages, stream=False, **kwargs):
+        time.sleep(self.latency)
+        prompt = messages[-1]['content']
+        words = prompt.split()
+        text = json.dumps({
+            'Title': ' '.join(words[:3]).title() or 'Note',
+            'Notes': prompt,
+            'Tags': sorted(set(words))[:3]
+        })
+        if stream:
+            return iter([SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])])
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
+
+def seed(app, size, rng):
+    """Insert ``size`` notes for the default user and SHARES share links;
+    returns the share tokens"""
+    from src.models.note import Note, db
+    from src.models.share import SharedNote
+
+    start = datetime(2024, 1, 1)
+    with app.app_context():
+        for first in range(0, size, SEED_BATCH_SIZE):
+            rows = []
+            for i in range(first, min(first + SEED_BATCH_SIZE, size)):
+                words = rng.choices(WORDS, k=WORDS_PER_NOTE)
+                rows.append({
+                    'title': ' '.join(words[:4]).title(),
+                    'content': ' '.join(words),
+                    'order_index': i,
+                    'user_id': 1,
+                    'created_at': start + timedelta(minutes=i),
+                    'updated_at': start + timedelta(minutes=i)
+                })
+            db.session.execute(db.insert(Note.__table__), rows)
+            db.session.commit()
+
+        shares = [SharedNote(note_id) for note_id in rng.sample(range(1, size + 1), min(SHARES, size))]
+        db.session.add_all(shares)
+        db.session.commit()
+        return [share.share_token for share in shares]
+
+def scenarios(size, share_tokens):
+    """``{name: request(client, rng)}``, each returning the response"""
+    from src.templates import NOTE_TEMPLATES
+    templates = sorted(NOTE_TEMPLATES)
+
+    def note_id(rng):
+        return rng.randint(1, size)
+
+    return {
+        'list': lambda client, rng: client.get('/api/notes?limit=50&fields=id,title,preview,updated_at'),
+        'list_all': lambda client, rng: client.get('/api/notes'),
+        'get': lambda client, rng: client.get(f'/api/notes/{note_id(rng)}'),
+        'create': lambda client, rng: client.post('/api/notes', json={
+            'title': f'Benchmark {rng.random():.6f}', 'content': ' '.join(rng.choices(WORDS, k=WORDS_PER_NOTE))
+        }),
+        'update': lambda client, rng: client.put(f'/api/notes/{note_id(rng)}', json={
+            'content': ' '.join(rng.choices(WORDS, k=WORDS_PER_NOTE))
+        }),
+        'reorder': lambda client, rng: client.put(f'/api/notes/{note_id(rng)}/move', json={
+            'position': rng.randint(0, size - 1)
+        }),
+        'search': lambda client, rng: client.get(f'/api/notes/search?q={rng.choice(WORDS)}+{rng.choice(WORDS)[:3]}'),
+        'share_view': lambda client, rng: client.get(f'/shared/{rng.choice(share_tokens)}'),
+        'template_create': lambda client, rng: client.post(f'/api/templates/{rng.choice(templates)}/create', json={
+            'title': f'From template {rng.random():.6f}'
+        }),
+        'generate': lambda client, rng: client.post('/api/notes/generate', json={
+            'input': ' '.join(rng.choices(WORDS, k=12))
+        }),
+    }
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def run_scenario(app, request, requests, warmup, concurrency, seed_value):
+    """Time ``requests`` calls of ``request`` over ``concurrency`` threads"""
+    latencies, queries, errors = [], [], []
+    lock = threading.Lock()
+
+    def worker(index, count):
+        client = app.test_client()
+        rng = random.Random(f'{seed_value}-{index}')
+        for _ in range(count):
+            start = time.perf_counter()
+            response = request(client, rng)
+            body = response.get_data()
+            elapsed = time.perf_counter() - start
+            match = _QUERIES_RE.search(response.headers.get('Server-Timing', ''))
+            with lock:
+                latencies.append(elapsed * 1000)
+                if match:
+                    queries.append(int(match.group(1)))
+                if response.status_code >= 400:
+                    errors.append(f'{response.status_code}: {body[:200]!r}')
+
+    rng = random.Random(f'{seed_value}-warmup')
+    client = app.test_client()
+    for _ in range(warmup):
+        request(client, rng).get_data()
+
+    shares = [requests // concurrency + (1 if i < requests % concurrency else 0) for i in range(concurrency)]
+    threads = [threading.Thread(target=worker, args=(i, count)) for i, count in enumerate(shares)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'first_error': errors[0] if errors else None,
+        'throughput_rps': round(len(latencies) / wall, 1),
+        'latency_ms': {
+            'mean': round(statistics.fmean(latencies), 3),
+            'p50': round(percentile(latencies, 0.50), 3),
+            'p90': round(percentile(latencies, 0.90), 3),
+            'p99': round(percentile(latencies, 0.99), 3),
+            'max': round(latencies[-1], 3),
+        },
+        'queries_per_request': round(statistics.fmean(queries), 2) if queries else None,
+    }
+
+def run_size(size, args):
+    from src import llm
+    from src.main import create_app
+    from src.models.user import db
+    from src.view_counts import flush_view_counts
+
+    with tempfile.TemporaryDirectory() as tmp:
+        previous = os.environ.get('TEST_DATABASE_URL')
+        if args.database == 'file':
+            os.environ['TEST_DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'api.db')}"
+        else:
+            os.environ.pop('TEST_DATABASE_URL', None)
+        try:
+            app = create_app('testing')
+        finally:
+            if previous is None:
+                os.environ.pop('TEST_DATABASE_URL', None)
+            else:
+                os.environ['TEST_DATABASE_URL'] = previous
+        # Report statement counts instead of failing on query budgets
+        app.config['QUERY_BUDGET_STRICT'] = False
+
+        start = time.perf_counter()
+        share_tokens = seed(app, size, random.Random(args.seed))
+        seed_seconds = time.perf_counter() - start
+
+        previous_client, llm._client = llm._client, StubLLMClient(args.llm_latency_ms / 1000)
+        try:
+            available = scenarios(size, share_tokens)
+            results = {}
+            for name in args.scenarios:
+                results[name] = run_scenario(app, available[name], args.requests, args.warmup,
+                                             args.concurrency, f'{args.seed}-{name}')
+        finally:
+            llm._client = previous_client
+            with app.app_context():
+                flush_view_counts()
+                db.session.remove()
+                db.engine.dispose()
+
+    return {'notes': size, 'seed_seconds': round(seed_seconds, 2), 'scenarios': results}
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_results(result, baseline=None):
+    print(f"\n📊 {result['notes']:,} notes (seeded in {result['seed_seconds']}s)")
+    header = f"   {'scenario':<16} {'req/s':>9} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'queries':>8}"
+    print(header + ('  p50 vs baseline' if baseline else ''))
+    for name, stats in result['scenarios'].items():
+        latency = stats['latency_ms']
+        queries = stats['queries_per_request']
+        line = (f"   {name:<16} {stats['throughput_rps']:>9} {latency['p50']:>9} {latency['p90']:>9} "
+                f"{latency['p99']:>9} {queries if queries is not None else '-':>8}")
+        before = (baseline or {}).get(name)
+        if before:
+            line += f"  {(latency['p50'] / before['latency_ms']['p50'] - 1) * 100:+.1f}%"
+        if stats['errors']:
+            line += f"  ⚠️ {stats['errors']} errors, first {stats['first_error']}"
+        print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    all_scenarios = list(scenarios(1, ['']))
+    parser.add_argument('--notes', type=int, nargs='+', default=[1000, 10000], help='dataset sizes')
+    parser.add_argument('--requests', type=int, default=200, help='timed requests per scenario')
+    parser.add_argument('--warmup', type=int, default=20, help='untimed requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=1, help='client threads')
+    parser.add_argument('--scenarios', nargs='+', choices=all_scenarios, default=all_scenarios)
+    parser.add_argument('--database', choices=('file', 'memory'), default='file')
+    parser.add_argument('--llm-latency-ms', type=float, default=50, help='latency of the stub LLM')
+    parser.add_argument('--seed', type=int, default=5241)
+    parser.add_argument('--output', help='Write JSON results to this file')
+    parser.add_argument('--compare', help='Earlier JSON results to compare median latency with')
+    args = parser.parse_args()
+    if args.database == 'memory' and args.concurrency > 1:
+        # An in-memory database is one connection shared by every thread
+        parser.error('--concurrency needs --database file')
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = {result['notes']: result['scenarios'] for result in json.load(f)['results']}
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'parameters': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+        },
+        'results': []
+    }
+    for size in args.notes:
+        result = run_size(size, args)
+        report['results'].append(result)
+        print_results(result, baseline.get(size))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark the cold start of the serverless entry point.
+
+Each run starts a fresh interpreter with ``python -X importtime``, imports
+``src.main`` and calls ``create_app`` the way ``api/index.py`` does, and
+reports the time to a ready app, the total import time and the slowest
+imports. ``VERCEL`` is set as on the host, so the production config is
+measured as deployed rather than with overridden settings. Modules that
+must stay out of the startup path (the openai SDK) are checked too, so the
+script can guard against regressions in CI.
+
+Usage:
+    python benchmarks/cold_start.py                    # 5 runs, production config
+    python benchmarks/cold_start.py --runs 10 --max-ms 800
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that create_app must not import
+LAZY_MODULES = ('openai',)
+
+STARTUP = """
+import json, sys, time
+start = time.perf_counter()
+from src.main import create_app
+app = create_app({config!r})
+elapsed = (time.perf_counter() - start) * 1000
+print(json.dumps({{'create_app_ms': elapsed, 'modules': sorted(sys.modules)}}))
+"""
+
+_IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+def parse_importtime(stderr):
+    """``[(module, cumulative_us, depth)]`` from ``-X importtime`` output"""
+    imports = []
+    for line in stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match:
+            imports.append((match.group(4), int(match.group(2)), len(match.group(3)) // 2))
+    return imports
+
+def run_once(config, env):
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', STARTUP.format(config=config)],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        errors = [line for line in completed.stderr.splitlines() if not line.startswith('import time:')]
+        raise RuntimeError('create_app failed:\n' + '\n'.join(errors[-10:]))
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    imports = parse_importtime(completed.stderr)
+    return {
+        'create_app_ms': result['create_app_ms'],
+        'import_ms': sum(cumulative for _, cumulative, depth in imports if depth == 0) / 1000,
+        'imports': imports,
+        'lazy_loaded': [name for name in LAZY_MODULES if name in result['modules']]
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--config', default='production')
+    parser.add_argument('--top', type=int, default=10, help='slowest imports to list')
+    parser.add_argument('--max-ms', type=float, help='fail if the median create_app time is above this')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, FLASK_CONFIG=args.config)
+        env.pop('GITHUB_TOKEN', None)  # the app must start without it
+        # Run with the settings Vercel starts the function with, so the
+        # config's serverless defaults (no job threads, no pool) apply
+        env.setdefault('VERCEL', '1')
+        env.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(tmp, 'cold_start.db')}")
+        try:
+            runs = [run_once(args.config, env) for _ in range(args.runs)]
+        except RuntimeError as e:
+            print(f'❌ {e}', file=sys.stderr)
+            return 1
+
+    slowest = {}
+    for run in runs:
+        for name, cumulative, depth in run['imports']:
+            slowest.setdefault(name, []).append(cumulative / 1000)
+    report = {
+        'config': args.config,
+        'runs': args.runs,
+        'create_app_ms': {
+            'median': round(statistics.median(run['create_app_ms'] for run in runs), 1),
+            'min': round(min(run['create_app_ms'] for run in runs), 1),
+        },
+        'import_ms_median': round(statistics.median(run['import_ms'] for run in runs), 1),
+        'slowest_imports_ms': {
+            name: round(statistics.median(times), 1)
+            for name, times in sorted(slowest.items(), key=lambda item: -statistics.median(item[1]))[:args.top]
+        },
+        'lazy_modules_loaded': sorted({name for run in runs for name in run['lazy_loaded']}),
+    }
+    print(json.dumps(report, indent=2))
+
+    failures = []
+    if report['lazy_modules_loaded']:
+        failures.append(f"create_app imported {', '.join(report['lazy_modules_loaded'])}")
+    if args.max_ms is not None and report['create_app_ms']['median'] > args.max_ms:
+        failures.append(f"median create_app time {report['create_app_ms']['median']}ms > {args.max_ms}ms")
+    for failure in failures:
+        print(f'❌ {failure}', file=sys.stderr)
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
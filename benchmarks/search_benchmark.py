@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark full-text search against the original LIKE '%q%' search.
+
+Seeds a file-backed SQLite database with synthetic notes at each requested
+size and times the same queries through both paths.
+
+Usage:
+    python benchmarks/search_benchmark.py                  # 10k, 100k, 1M notes
+    python benchmarks/search_benchmark.py --sizes 10000 --repeat 5
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('GITHUB_TOKEN', 'benchmark')
+os.environ.setdefault('FLASK_CONFIG', 'testing')
+
+VOCABULARY_SIZE = 20000
+WORDS_PER_NOTE = 60
+BATCH_SIZE = 10000
+
+def make_vocabulary(rng):
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    words = set()
+    while len(words) < VOCABULARY_SIZE:
+        words.add(''.join(rng.choice(letters) for _ in range(rng.randint(4, 10))))
+    return sorted(words)
+
+def seed_notes(db, Note, size, vocabulary, rng):
+    """Insert ``size`` notes with a Zipf-like word distribution"""
+    cum_weights = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(len(vocabulary))))
+    for start in range(0, size, BATCH_SIZE):
+        rows = []
+        for i in range(start, min(start + BATCH_SIZE, size)):
+            words = rng.choices(vocabulary, cum_weights=cum_weights, k=WORDS_PER_NOTE)
+            rows.append({
+                'title': ' '.join(words[:4]).title(),
+                'content': ' '.join(words),
+                'order_index': i,
+                'user_id': 1
+            })
+        db.session.execute(db.insert(Note), rows)
+        db.session.commit()
+
+def time_query(fn, repeat):
+    timings = []
+    result_count = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result_count = len(fn())
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        'median_ms': round(statistics.median(timings), 2),
+        'max_ms': round(max(timings), 2),
+        'results': result_count
+    }
+
+def run_size(size, repeat, rng):
+    from src.main import create_app
+    from src.models.note import Note, db
+    from src.routes.note import NOTE_LIST_ORDER
+    from src.search import full_text_matches, like_filter
+
+    vocabulary = make_vocabulary(rng)
+    # Common, mid-frequency and rare terms, plus a prefix query
+    queries = [vocabulary[0], vocabulary[50], vocabulary[5000], vocabulary[19000], vocabulary[100][:3]]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['TEST_DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'search.db')}"
+        app = create_app('testing')
+        with app.app_context():
+            start = time.perf_counter()
+            seed_notes(db, Note, size, vocabulary, rng)
+            seed_seconds = time.perf_counter() - start
+
+            results = []
+            for query in queries:
+                def like_search():
+                    return Note.query.filter(like_filter(query)).order_by(*NOTE_LIST_ORDER).all()
+
+                def fts_search():
+                    matches = full_text_matches(query)
+                    return db.session.query(Note, matches.c.snippet).join(
+                        matches, Note.id == matches.c.note_id
+                    ).order_by(matches.c.rank.asc(), Note.id.asc()).all()
+
+                results.append({
+                    'query': query,
+                    'like': time_query(like_search, repeat),
+                    'fts': time_query(fts_search, repeat)
+                })
+            db.session.remove()
+            db.engine.dispose()
+
+    return {'notes': size, 'seed_seconds': round(seed_seconds, 2), 'queries': results}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=5241)
+    parser.add_argument('--output', help='Write JSON results to this file')
+    args = parser.parse_args()
+
+    report = []
+    for size in args.sizes:
+        result = run_size(size, args.repeat, random.Random(args.seed))
+        report.append(result)
+        print(f"\n📊 {size:,} notes (seeded in {result['seed_seconds']}s)")
+        print(f"   {'query':<12} {'LIKE ms':>10} {'FTS ms':>10} {'results':>9}")
+        for row in result['queries']:
+            print(f"   {row['query']:<12} {row['like']['median_ms']:>10} {row['fts']['median_ms']:>10} {row['fts']['results']:>9}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == '__main__':
+    main()
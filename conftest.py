@@ -0,0 +1,45 @@
+"""
+Shared test fixtures.
+
+``file_app`` is the testing app on a file-backed SQLite database, for tests
+that use several connections or threads (an in-memory database shares a
+single connection). Test modules run as scripts use ``file_backed_app``
+directly.
+"""
+import contextlib
+import os
+import tempfile
+
+import pytest
+
+os.environ.setdefault('GITHUB_TOKEN', 'test-token')
+os.environ.setdefault('FLASK_CONFIG', 'testing')
+
+@contextlib.contextmanager
+def file_backed_app(path=None):
+    """Create the testing app on the SQLite file ``path`` (by default a new
+    one in a temporary directory) and dispose its engine afterwards"""
+    from src.main import create_app
+    from src.models.user import db
+
+    with tempfile.TemporaryDirectory() as tmp:
+        previous = os.environ.get('TEST_DATABASE_URL')
+        os.environ['TEST_DATABASE_URL'] = f"sqlite:///{path or os.path.join(tmp, 'test.db')}"
+        try:
+            app = create_app('testing')
+        finally:
+            if previous is None:
+                del os.environ['TEST_DATABASE_URL']
+            else:
+                os.environ['TEST_DATABASE_URL'] = previous
+        try:
+            yield app
+        finally:
+            with app.app_context():
+                db.session.remove()
+                db.engine.dispose()
+
+@pytest.fixture
+def file_app():
+    with file_backed_app() as app:
+        yield app
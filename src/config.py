@@ -1,11 +1,115 @@
 import os
+import tempfile
 from urllib.parse import urlparse
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool
+
+def env_flag(name, default):
+    value = os.environ.get(name)
+    return default if value is None else value.strip().lower() in ('1', 'true', 'yes', 'on')
 
 class Config:
     """Base configuration."""
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'asdf#FGSgvasgf$5$WGT'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Apply schema migrations on startup; otherwise run `flask --app src.main migrate`
+    AUTO_CREATE_SCHEMA = env_flag('AUTO_CREATE_SCHEMA', True)
+
+    # Schema migrations (src/migrations): backfills update this many rows per
+    # transaction, and PostgreSQL DDL gives up after waiting this long (ms)
+    # for its table lock rather than stalling the writes queued behind it
+    MIGRATION_BATCH_SIZE = int(os.environ.get('MIGRATION_BATCH_SIZE', 5000))
+    MIGRATION_LOCK_TIMEOUT_MS = int(os.environ.get('MIGRATION_LOCK_TIMEOUT_MS', 5000))
+
+    # Database connections (PostgreSQL). DB_POOL_MODE is 'queue' for a pool of
+    # DB_POOL_SIZE connections per process, 'null' to open one per request
+    # (serverless), or 'external' for 'null' behind PgBouncer / the Supabase
+    # pooler, which rejects per-connection settings - give the role a
+    # statement_timeout there instead of DB_STATEMENT_TIMEOUT_MS.
+    DB_POOL_MODE = os.environ.get('DB_POOL_MODE', 'queue')
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    DB_POOL_PRE_PING = env_flag('DB_POOL_PRE_PING', True)
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 30000))  # 0 = no limit
+    
+    # Set on every SQLite connection (src/database.py): WAL lets readers run
+    # alongside the writer, and writers wait busy_timeout ms for the lock
+    SQLITE_PRAGMAS = {
+        'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    }
+    
+    # Translation cache: entries expire after TTL seconds and the least
+    # recently used ones are evicted beyond MAX_ENTRIES, checked at most every
+    # EVICT_INTERVAL seconds (0 = after every store)
+    TRANSLATION_CACHE_TTL = int(os.environ.get('TRANSLATION_CACHE_TTL', 30 * 24 * 3600))
+    TRANSLATION_CACHE_MAX_ENTRIES = int(os.environ.get('TRANSLATION_CACHE_MAX_ENTRIES', 10000))
+    TRANSLATION_CACHE_EVICT_INTERVAL = float(os.environ.get('TRANSLATION_CACHE_EVICT_INTERVAL', 300))
+    # Translation chunks: one per paragraph, longer ones split at about this
+    # many tokens (batch translation also packs short chunks up to it)
+    TRANSLATION_CHUNK_TOKENS = int(os.environ.get('TRANSLATION_CHUNK_TOKENS', 1500))
+    
+    # Shared-note views are buffered in memory and written at most this often
+    # (seconds); 0 writes every view immediately, the default on Vercel, where
+    # an instance is frozen (and its flush timer with it) after each request
+    VIEW_COUNT_FLUSH_INTERVAL = float(os.environ.get('VIEW_COUNT_FLUSH_INTERVAL') or (0 if os.environ.get('VERCEL') else 5))
+    
+    # Tombstones of deleted notes are kept this long for the change feed;
+    # clients that have not synced for longer reload their full list
+    NOTE_DELETION_RETENTION_DAYS = int(os.environ.get('NOTE_DELETION_RETENTION_DAYS', 30))
+    
+    # Public /shared/<token> pages: rendered pages kept in memory and the
+    # Cache-Control max-age (seconds) given to browsers and CDNs
+    SHARED_PAGE_CACHE_SIZE = int(os.environ.get('SHARED_PAGE_CACHE_SIZE', 512))
+    SHARED_PAGE_MAX_AGE = int(os.environ.get('SHARED_PAGE_MAX_AGE', 60))
+    
+    # Per-request query counts and DB / LLM time as Server-Timing headers and
+    # at /api/_metrics (src/instrumentation.py). With QUERY_BUDGET_STRICT a
+    # view exceeding its @query_budget raises instead of logging a warning.
+    INSTRUMENTATION = env_flag('INSTRUMENTATION', False)
+    QUERY_BUDGET_STRICT = env_flag('QUERY_BUDGET_STRICT', False)
+    
+    # Background job worker threads started with the app (0 = run jobs only
+    # in a separate `python -m src.worker` process). Serverless instances are
+    # frozen between requests, so none are started on Vercel by default.
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS') or (0 if os.environ.get('VERCEL') else 2))
+    JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL', 1.0))
+    # Without worker threads, GET /api/jobs/<id> runs the polled job itself
+    # once it is due, so jobs still finish with no worker process or cron
+    JOB_RUN_ON_POLL = env_flag('JOB_RUN_ON_POLL', JOB_WORKERS == 0)
+    
+    # POST /notes/import: uploads are spooled to this directory (it must be
+    # shared with worker processes) and inserted this many notes per batch
+    IMPORT_SPOOL_DIR = os.environ.get('IMPORT_SPOOL_DIR') or os.path.join(tempfile.gettempdir(), 'note-imports')
+    IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', 500))
+    
+    @classmethod
+    def get_engine_options(cls, database_uri):
+        """SQLALCHEMY_ENGINE_OPTIONS for ``database_uri``. SQLite keeps
+        Flask-SQLAlchemy's pool choice; its tuning is done with PRAGMAs."""
+        backend = make_url(database_uri).get_backend_name()
+        if backend == 'sqlite':
+            return {}
+        
+        if cls.DB_POOL_MODE in ('null', 'external'):
+            options = {'poolclass': NullPool}
+        else:
+            options = {
+                'pool_size': cls.DB_POOL_SIZE,
+                'max_overflow': cls.DB_MAX_OVERFLOW,
+                'pool_timeout': cls.DB_POOL_TIMEOUT,
+                'pool_recycle': cls.DB_POOL_RECYCLE,
+                'pool_pre_ping': cls.DB_POOL_PRE_PING,
+            }
+        if backend == 'postgresql' and cls.DB_STATEMENT_TIMEOUT_MS and cls.DB_POOL_MODE != 'external':
+            options['connect_args'] = {'options': f'-c statement_timeout={cls.DB_STATEMENT_TIMEOUT_MS}'}
+        return options
+    
     @staticmethod
     def init_app(app):
         pass
@@ -33,6 +137,10 @@ class DevelopmentConfig(Config):
 class ProductionConfig(Config):
     """Production configuration."""
     DEBUG = False
+    # Schema changes are an explicit deploy step, not part of every cold start
+    AUTO_CREATE_SCHEMA = env_flag('AUTO_CREATE_SCHEMA', False)
+    # Serverless instances are short-lived and numerous: no per-instance pool
+    DB_POOL_MODE = os.environ.get('DB_POOL_MODE') or ('null' if os.environ.get('VERCEL') else 'queue')
     
     @staticmethod
     def get_database_uri():
@@ -49,10 +157,17 @@ class ProductionConfig(Config):
 class TestingConfig(Config):
     """Testing configuration."""
     TESTING = True
+    # Tests run queued jobs explicitly with src.jobs.run_pending()
+    JOB_WORKERS = 0
+    JOB_RUN_ON_POLL = False
+    # Fail tests on query budget overruns
+    INSTRUMENTATION = True
+    QUERY_BUDGET_STRICT = True
     
     @staticmethod
     def get_database_uri():
-        return 'sqlite:///:memory:'
+        # Benchmarks and concurrency tests point this at a file-backed database
+        return os.environ.get('TEST_DATABASE_URL') or 'sqlite:///:memory:'
 
 config = {
     'development': DevelopmentConfig,
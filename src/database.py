@@ -0,0 +1,79 @@
+"""
+Database setup: running schema migrations (the ``migrate`` command) and
+per-connection settings that create_engine() options cannot express.
+"""
+
+import logging
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import event
+from src.models.user import db
+
+def apply_sqlite_pragmas(engine, pragmas):
+    """Run ``PRAGMA name = value`` for ``pragmas`` on every new connection"""
+    in_memory = engine.url.database in (None, '', ':memory:')
+    statements = [
+        f'PRAGMA {name} = {value}' for name, value in pragmas.items()
+        # WAL and mmap only apply to database files
+        if not (in_memory and name in ('journal_mode', 'mmap_size'))
+    ]
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+def init_engine(app):
+    """Install connection hooks on the app's engine (before it connects)"""
+    with app.app_context():
+        engine = db.engine
+        if engine.dialect.name == 'sqlite' and app.config.get('SQLITE_PRAGMAS'):
+            apply_sqlite_pragmas(engine, app.config['SQLITE_PRAGMAS'])
+
+def init_database(app):
+    """Apply pending schema migrations and create the default user.
+
+    Run by ``flask --app src.main migrate`` (or ``--app api/index.py`` in
+    production), and by create_app itself when ``AUTO_CREATE_SCHEMA`` is set.
+    Returns the migrations applied.
+    """
+    from src.migrations import run_migrations
+    applied = run_migrations(app)
+
+    with app.app_context():
+        from src.search import detect_search_backend
+        detect_search_backend(app)
+
+        # Create default user if it doesn't exist
+        from src.models.user import User
+        if db.session.get(User, 1) is None:
+            default_user = User(username='default_user', email='user@example.com')
+            default_user.id = 1  # Explicitly set ID to 1
+            db.session.add(default_user)
+            db.session.commit()
+            app.logger.info("Default user created")
+    return applied
+
+@click.command('migrate')
+@click.option('--status', is_flag=True, help='List the migrations and when each was applied.')
+@with_appcontext
+def migrate_command(status):
+    """Create or upgrade the database schema."""
+    app = current_app._get_current_object()
+    if status:
+        from src.migrations import migration_status
+        for migration, applied_at in migration_status(app):
+            state = applied_at.isoformat(timespec='seconds') if applied_at else 'pending'
+            click.echo(f'{migration.version:04d}  {state:<19}  {migration.description}')
+        return
+
+    app.logger.setLevel(logging.INFO)  # report backfill progress
+    applied = init_database(app)
+    for migration in applied:
+        click.echo(f'Applied {migration.version:04d}: {migration.description}')
+    click.echo(f"Database is up to date ({len(applied) or 'no'} migration{'' if len(applied) == 1 else 's'} applied)")
@@ -0,0 +1,172 @@
+"""
+Streaming export of all notes (GET /api/notes/export).
+
+Notes are read in batches of ``EXPORT_BATCH_SIZE`` rows with ``yield_per``
+(a server-side cursor on PostgreSQL) and each batch is serialized and sent
+before the next is fetched, so memory use does not grow with the number of
+notes. Every note carries its share links and the tags of its ``Tags:``
+line (written by smart note generation).
+
+Formats:
+
+- ``ndjson``: one JSON object per line
+- ``json``: a JSON array, written element by element
+- ``markdown-zip``: a zip of ``<id>-<title>.md`` files with YAML front
+  matter, compressed entry by entry as it is sent. The central directory
+  that ends the zip is spooled to a temporary file until then.
+"""
+
+import json
+import re
+import struct
+import tempfile
+import zlib
+from datetime import datetime
+from src.models.note import Note, db
+from src.models.share import SharedNote
+
+EXPORT_BATCH_SIZE = 500
+# Zip format limits beyond which ZIP64 records are needed
+ZIP64_LIMIT = 0xFFFFFFFF
+ZIP_MAX_ENTRIES = 0xFFFF
+ZIP_UTF8_FLAG = 0x0800
+ZIP_DIRECTORY_SPOOL_SIZE = 1024 * 1024
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'json': ('application/json', 'json'),
+    'markdown-zip': ('application/zip', 'zip'),
+}
+
+# Generated notes end with a "Tags: a, b" line
+_TAGS_RE = re.compile(r'(?:^|\n)Tags: ([^\n]+)\s*$')
+_SLUG_RE = re.compile(r'[^a-z0-9]+')
+
+def note_tags(content):
+    match = _TAGS_RE.search(content or '')
+    if not match:
+        return []
+    return [tag.strip() for tag in match.group(1).split(',') if tag.strip()]
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+def export_batches():
+    """Yield lists of exported note dicts, one batch of rows at a time"""
+    result = db.session.execute(
+        db.select(Note.__table__).order_by(Note.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    for rows in result.partitions():
+        shares = {}
+        for share in SharedNote.query.filter(SharedNote.note_id.in_([row.id for row in rows])):
+            shares.setdefault(share.note_id, []).append(share.to_dict())
+
+        yield [{
+            'id': row.id,
+            'title': row.title,
+            'content': row.content,
+            'order_index': row.order_index,
+            'user_id': row.user_id,
+            'created_at': _iso(row.created_at),
+            'updated_at': _iso(row.updated_at),
+            'tags': note_tags(row.content),
+            'shares': shares.get(row.id, [])
+        } for row in rows]
+
+def export_ndjson():
+    for batch in export_batches():
+        yield ''.join(json.dumps(note, ensure_ascii=False) + '\n' for note in batch)
+
+def export_json():
+    yield '['
+    separator = ''
+    for batch in export_batches():
+        yield separator + ','.join(json.dumps(note, ensure_ascii=False) for note in batch)
+        separator = ','
+    yield ']'
+
+def markdown_document(note):
+    """A note as Markdown with YAML front matter (JSON values are valid YAML)"""
+    meta = {key: note[key] for key in ('id', 'title', 'created_at', 'updated_at', 'order_index', 'tags', 'shares')}
+    front_matter = ''.join(f'{key}: {json.dumps(value, ensure_ascii=False)}\n' for key, value in meta.items())
+    return f"---\n{front_matter}---\n\n# {note['title']}\n\n{note['content']}\n"
+
+def markdown_filename(note):
+    slug = _SLUG_RE.sub('-', note['title'].lower()).strip('-')[:60] or 'untitled'
+    return f"{note['id']:06d}-{slug}.md"
+
+class StreamingZip:
+    """Minimal zip writer whose output can be sent as it is produced.
+
+    Each entry (one note) is deflated whole, so its CRC and sizes go straight
+    into the local header. Central directory records are spooled to a
+    temporary file rather than kept in memory, and ZIP64 end records are
+    written once the entry count or offsets outgrow the classic format.
+    """
+
+    def __init__(self):
+        self.offset = 0
+        self.count = 0
+        self.directory = tempfile.SpooledTemporaryFile(max_size=ZIP_DIRECTORY_SPOOL_SIZE)
+
+    def entry(self, name, data, modified):
+        """Bytes of the local file entry for ``data``, recording it for the directory"""
+        name = name.encode('utf-8')
+        compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+        compressed = compressor.compress(data) + compressor.flush()
+        crc = zlib.crc32(data)
+        modified = max(modified, datetime(1980, 1, 1))
+        dos_time = (modified.hour << 11) | (modified.minute << 5) | (modified.second // 2)
+        dos_date = ((modified.year - 1980) << 9) | (modified.month << 5) | modified.day
+
+        extra, offset, version = b'', self.offset, 20
+        if self.offset >= ZIP64_LIMIT:
+            extra, offset, version = struct.pack('<HHQ', 1, 8, self.offset), 0xFFFFFFFF, 45
+        self.directory.write(struct.pack(
+            '<IHHHHHHIIIHHHHHII', 0x02014b50, version, version, ZIP_UTF8_FLAG, zlib.DEFLATED,
+            dos_time, dos_date, crc, len(compressed), len(data), len(name), len(extra), 0, 0, 0, 0, offset
+        ) + name + extra)
+
+        local = struct.pack(
+            '<IHHHHHIIIHH', 0x04034b50, 20, ZIP_UTF8_FLAG, zlib.DEFLATED,
+            dos_time, dos_date, crc, len(compressed), len(data), len(name), 0
+        ) + name + compressed
+        self.offset += len(local)
+        self.count += 1
+        return local
+
+    def finish(self):
+        """Yield the central directory and end-of-archive records"""
+        directory_offset, directory_size = self.offset, 0
+        self.directory.seek(0)
+        while chunk := self.directory.read(64 * 1024):
+            directory_size += len(chunk)
+            yield chunk
+        self.directory.close()
+
+        directory_end = directory_offset + directory_size
+        if self.count >= ZIP_MAX_ENTRIES or directory_end >= ZIP64_LIMIT:
+            yield struct.pack('<IQHHIIQQQQ', 0x06064b50, 44, 45, 45, 0, 0,
+                              self.count, self.count, directory_size, directory_offset)
+            yield struct.pack('<IIQI', 0x07064b50, 0, directory_end, 1)
+            yield struct.pack('<IHHHHIIH', 0x06054b50, 0, 0, 0xFFFF, 0xFFFF, 0xFFFFFFFF, 0xFFFFFFFF, 0)
+        else:
+            yield struct.pack('<IHHHHIIH', 0x06054b50, 0, 0, self.count, self.count,
+                              directory_size, directory_offset, 0)
+
+def export_markdown_zip():
+    archive = StreamingZip()
+    for batch in export_batches():
+        yield b''.join(
+            archive.entry(markdown_filename(note), markdown_document(note).encode('utf-8'),
+                          datetime.fromisoformat(note['updated_at']))
+            for note in batch
+        )
+    yield from archive.finish()
+
+def export_stream(export_format):
+    """Chunks of the export in ``export_format`` (a key of EXPORT_FORMATS)"""
+    return {
+        'ndjson': export_ndjson,
+        'json': export_json,
+        'markdown-zip': export_markdown_zip,
+    }[export_format]()
@@ -0,0 +1,64 @@
+"""
+Conditional GET support for JSON endpoints.
+
+``@conditional(validators)`` computes cheap validators *before* the view
+runs - e.g. ``max(updated_at)`` and a row count for a collection, or
+``updated_at`` for a single row - and answers ``If-None-Match`` /
+``If-Modified-Since`` with ``304 Not Modified`` without loading or
+serializing anything. Otherwise the view runs and its response gets a weak
+ETag, ``Last-Modified`` and ``Cache-Control: private, no-cache`` so clients
+always revalidate.
+"""
+
+import hashlib
+import json
+from datetime import datetime
+from functools import wraps
+from flask import Response, make_response, request
+
+CACHE_CONTROL = 'private, no-cache'
+
+def _json_default(value):
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+def make_etag(*parts):
+    """Opaque tag for a tuple of validator values"""
+    raw = json.dumps(parts, default=_json_default, separators=(',', ':'), sort_keys=True)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+def not_modified(etag, last_modified):
+    """Whether the request's validators still match"""
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if last_modified is not None and request.if_modified_since is not None:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since.replace(tzinfo=None)
+    return False
+
+def conditional(validators):
+    """Decorate a GET view with ETag / Last-Modified revalidation.
+
+    ``validators(**view_args)`` returns ``(parts, last_modified)``: any
+    JSON-serializable values that change whenever the response would, and
+    the newest modification time (or None). The query string is always part
+    of the tag, so differently filtered responses never share one.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            parts, last_modified = validators(**kwargs)
+            etag = make_etag(request.path, request.query_string.decode('latin-1'), parts)
+
+            if not_modified(etag, last_modified):
+                response = Response(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag, weak=True)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            response.headers['Cache-Control'] = CACHE_CONTROL
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,201 @@
+"""
+Bulk import of notes from NDJSON or a Markdown zip (POST /api/notes/import).
+
+The upload is copied to ``IMPORT_SPOOL_DIR`` in fixed-size chunks - the
+request body is read only as fast as it can be written, and never held in
+memory - and an ``import_notes`` job parses it from disk one record at a
+time. Notes are inserted ``IMPORT_BATCH_SIZE`` at a time, each batch under a
+savepoint and committed on its own, so a large import never builds one giant
+transaction and a bad row only costs its own batch a retry. Progress (bytes
+read) is reported after every batch and invalid records are listed in the
+job result.
+
+Both formats match GET /notes/export: NDJSON objects need ``title`` and
+``content`` (``created_at`` is kept when present); zip entries are ``.md``
+files, optionally with the export's front matter, titled by front matter,
+a leading ``# heading`` or the file name.
+"""
+
+import json
+import os
+import uuid
+import zipfile
+from datetime import datetime
+from sqlalchemy.exc import SQLAlchemyError
+from src.models.note import Note, db
+from src.models.order_counter import NoteOrderCounter
+
+IMPORT_FORMATS = ('ndjson', 'markdown-zip')
+SPOOL_CHUNK_SIZE = 1024 * 1024
+# Errors listed in the job result; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+
+def detect_format(requested, filename, mimetype):
+    """The import format from ``?format=``, the file extension or the content type"""
+    if requested:
+        if requested not in IMPORT_FORMATS:
+            raise ValueError(f"format must be one of: {', '.join(IMPORT_FORMATS)}")
+        return requested
+    if (filename or '').endswith('.zip') or mimetype in ('application/zip', 'application/x-zip-compressed'):
+        return 'markdown-zip'
+    if (filename or '').endswith(('.ndjson', '.jsonl')) or mimetype in ('application/x-ndjson', 'application/jsonl'):
+        return 'ndjson'
+    raise ValueError('Could not tell the upload format; pass ?format=ndjson or ?format=markdown-zip')
+
+def spool_upload(stream, spool_dir):
+    """Copy an upload stream to a new file in ``spool_dir``; returns its path"""
+    os.makedirs(spool_dir, exist_ok=True)
+    path = os.path.join(spool_dir, f'{uuid.uuid4().hex}.upload')
+    with open(path, 'wb') as spool:
+        while chunk := stream.read(SPOOL_CHUNK_SIZE):
+            spool.write(chunk)
+    return path
+
+def _note_row(data):
+    """Insert values for an imported record, raising ValueError if it is invalid"""
+    if not isinstance(data, dict):
+        raise ValueError('Expected a JSON object')
+    title, content = data.get('title'), data.get('content')
+    if title is None or content is None:
+        raise ValueError('Title and content are required')
+    Note.validate_fields(title, content)
+
+    created_at = data.get('created_at')
+    try:
+        created_at = datetime.fromisoformat(created_at) if created_at else None
+    except (TypeError, ValueError):
+        raise ValueError('created_at must be an ISO 8601 timestamp')
+    return {'title': title, 'content': content, 'created_at': created_at}
+
+def read_ndjson(path):
+    """Yield ``(location, row or error, bytes read)`` for each non-blank line"""
+    with open(path, 'rb') as source:
+        for number, line in enumerate(source, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = _note_row(json.loads(line))
+            except ValueError as e:  # includes JSON and UTF-8 decoding errors
+                record = e
+            yield {'line': number}, record, source.tell()
+
+def parse_markdown(name, text):
+    """Title and content of a Markdown file, undoing the export's layout"""
+    meta = {}
+    if text.startswith('---\n') and '\n---\n' in text[4:]:
+        front_matter, text = text[4:].split('\n---\n', 1)
+        for line in front_matter.splitlines():
+            key, _, value = line.partition(': ')
+            try:
+                meta[key] = json.loads(value)
+            except ValueError:
+                meta[key] = value
+        text = text.lstrip('\n')
+
+    title = meta.get('title')
+    first_line, _, rest = text.partition('\n')
+    if first_line.startswith('# ') and (title is None or first_line[2:] == title):
+        title, text = first_line[2:], rest.lstrip('\n')
+    if title is None:
+        title = os.path.splitext(os.path.basename(name))[0]
+    if text.endswith('\n'):
+        text = text[:-1]
+    return {'title': title, 'content': text, 'created_at': meta.get('created_at')}
+
+def read_markdown_zip(path):
+    """Yield ``(location, row or error, bytes read)`` for each ``.md`` entry"""
+    with zipfile.ZipFile(path) as archive:
+        for info in archive.infolist():
+            if info.is_dir() or not info.filename.endswith('.md'):
+                continue
+            try:
+                record = _note_row(parse_markdown(info.filename, archive.read(info).decode('utf-8')))
+            except (ValueError, zipfile.BadZipFile) as e:
+                record = e
+            yield {'entry': info.filename}, record, info.header_offset + info.compress_size
+
+def _insert(rows, user_id):
+    now = datetime.utcnow()
+    first_index = NoteOrderCounter.allocate(user_id, len(rows))
+    db.session.execute(db.insert(Note.__table__), [
+        dict(row, created_at=row['created_at'] or now, updated_at=now, user_id=user_id, order_index=first_index + offset)
+        for offset, row in enumerate(rows)
+    ])
+
+class ImportErrors:
+    """Counts an import's invalid records, keeping the first
+    MAX_REPORTED_ERRORS of them for the job result"""
+
+    def __init__(self):
+        self.count = 0
+        self.reported = []
+
+    def add(self, location, message):
+        self.count += 1
+        if len(self.reported) < MAX_REPORTED_ERRORS:
+            self.reported.append(dict(location, error=message))
+
+def insert_batch(batch, user_id, errors, before_commit=None):
+    """Insert ``[(location, row)]`` under a savepoint and commit. If the batch
+    fails, rows are retried one by one so only the bad ones are skipped.
+    ``before_commit()`` runs first in each transaction that is committed, so
+    it can veto the commit by raising. Returns the number inserted."""
+    try:
+        if before_commit:
+            before_commit()
+        with db.session.begin_nested():
+            _insert([row for _, row in batch], user_id)
+        db.session.commit()
+        return len(batch)
+    except SQLAlchemyError:
+        db.session.rollback()
+
+    inserted = 0
+    if before_commit:
+        before_commit()
+    for location, row in batch:
+        try:
+            with db.session.begin_nested():
+                _insert([row], user_id)
+            inserted += 1
+        except SQLAlchemyError as e:
+            errors.add(location, str(e.orig or e))
+    db.session.commit()
+    return inserted
+
+def import_file(path, import_format, batch_size, user_id=1, progress=None, before_commit=None):
+    """Import a spooled upload; returns ``{imported, failed, errors}``.
+
+    ``progress(bytes_read, total_bytes)`` is called after every batch and
+    ``before_commit()`` (see insert_batch) in each batch's transaction.
+    """
+    total = os.path.getsize(path)
+    records = read_ndjson(path) if import_format == 'ndjson' else read_markdown_zip(path)
+    imported, errors, batch, position = 0, ImportErrors(), [], 0
+
+    def flush():
+        nonlocal imported, batch
+        if batch:
+            imported += insert_batch(batch, user_id, errors, before_commit)
+            batch = []
+        if progress:
+            progress(position, total)
+
+    try:
+        for location, record, position in records:
+            if isinstance(record, Exception):
+                errors.add(location, str(record))
+            else:
+                batch.append((location, record))
+            if len(batch) >= batch_size:
+                flush()
+    except zipfile.BadZipFile as e:
+        errors.add({}, f'Not a valid zip file: {e}')
+    position = total
+    flush()
+
+    return {
+        'imported': imported,
+        'failed': errors.count,
+        'errors': errors.reported
+    }
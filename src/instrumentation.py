@@ -0,0 +1,224 @@
+"""
+Opt-in per-request instrumentation (``INSTRUMENTATION=1``).
+
+For every request this counts the SQL statements run and their time
+(SQLAlchemy cursor events), the time spent in LLM calls (``track_llm`` in
+src/llm.py) and the response size. The numbers are sent back as a
+``Server-Timing`` header, so they show up in the browser's network panel,
+and added to per-endpoint totals served in Prometheus text format at
+``GET /api/_metrics``. Totals live in process memory, so each worker (or
+serverless instance) reports its own.
+
+Stats follow the request through ``contextvars``: LLM calls on the shared
+worker pool are counted, because its tasks run in the submitter's context.
+Background job workers are not part of any request and are not counted.
+
+Views can declare ``@query_budget(n)``. A request that runs more statements
+is logged, and raises ``QueryBudgetExceeded`` when ``QUERY_BUDGET_STRICT``
+is set (as in tests), so an N+1 regression fails the test suite.
+"""
+
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import Response, request
+from sqlalchemy import event
+from src.models.user import db
+
+METRICS_PREFIX = 'notes'
+
+_current = ContextVar('request_stats', default=None)
+
+class QueryBudgetExceeded(AssertionError):
+    """A view ran more SQL statements than its ``@query_budget``"""
+
+class RequestStats:
+    """Counters for one request; updated from any thread running in its context"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.lock = threading.Lock()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.llm_calls = 0
+        self.llm_seconds = 0.0
+        self.response_bytes = 0
+
+    def add_query(self, seconds):
+        with self.lock:
+            self.queries += 1
+            self.db_seconds += seconds
+
+    def add_llm_call(self, seconds):
+        with self.lock:
+            self.llm_calls += 1
+            self.llm_seconds += seconds
+
+    def server_timing(self):
+        total = (time.perf_counter() - self.start) * 1000
+        return (f'db;dur={self.db_seconds * 1000:.1f};desc="{self.queries} queries", '
+                f'llm;dur={self.llm_seconds * 1000:.1f};desc="{self.llm_calls} calls", '
+                f'total;dur={total:.1f}')
+
+def query_budget(max_queries):
+    """Declare the most SQL statements one request to the view may run"""
+    def decorator(view):
+        view.query_budget = max_queries
+        return view
+    return decorator
+
+@contextmanager
+def track_llm():
+    """Time an LLM call for the current request, if it is instrumented"""
+    stats = _current.get()
+    if stats is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.add_llm_call(time.perf_counter() - start)
+
+class Metrics:
+    """Per-endpoint totals since the process started"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = defaultdict(int)  # (endpoint, method, status) -> count
+        self.totals = defaultdict(lambda: defaultdict(float))  # (endpoint, method) -> name -> total
+        self.max_queries = defaultdict(int)
+
+    def record(self, endpoint, method, status, stats):
+        duration = time.perf_counter() - stats.start
+        key = (endpoint, method)
+        with self.lock:
+            self.requests[(endpoint, method, status)] += 1
+            totals = self.totals[key]
+            totals['duration_seconds'] += duration
+            totals['db_queries'] += stats.queries
+            totals['db_seconds'] += stats.db_seconds
+            totals['llm_calls'] += stats.llm_calls
+            totals['llm_seconds'] += stats.llm_seconds
+            totals['response_bytes'] += stats.response_bytes
+            self.max_queries[key] = max(self.max_queries[key], stats.queries)
+
+    def prometheus(self):
+        """The totals in Prometheus text exposition format"""
+        def labels(endpoint, method, **extra):
+            pairs = dict(endpoint=endpoint, method=method, **extra)
+            return '{' + ','.join(f'{name}="{value}"' for name, value in pairs.items()) + '}'
+
+        with self.lock:
+            requests = sorted(self.requests.items())
+            totals = sorted((key, dict(values)) for key, values in self.totals.items())
+            max_queries = dict(self.max_queries)
+
+        lines = [
+            f'# HELP {METRICS_PREFIX}_http_requests_total Requests handled, by endpoint and status.',
+            f'# TYPE {METRICS_PREFIX}_http_requests_total counter',
+        ]
+        lines += [f'{METRICS_PREFIX}_http_requests_total{labels(e, m, status=s)} {count}'
+                  for (e, m, s), count in requests]
+
+        series = [
+            ('http_request_duration_seconds_total', 'duration_seconds', 'counter', 'Time spent handling requests.'),
+            ('db_queries_total', 'db_queries', 'counter', 'SQL statements run.'),
+            ('db_query_duration_seconds_total', 'db_seconds', 'counter', 'Time spent running SQL statements.'),
+            ('llm_calls_total', 'llm_calls', 'counter', 'LLM requests made.'),
+            ('llm_duration_seconds_total', 'llm_seconds', 'counter', 'Time spent waiting for the LLM.'),
+            ('http_response_bytes_total', 'response_bytes', 'counter', 'Response body bytes sent.'),
+        ]
+        for name, field, kind, description in series:
+            lines += [f'# HELP {METRICS_PREFIX}_{name} {description}', f'# TYPE {METRICS_PREFIX}_{name} {kind}']
+            lines += [f'{METRICS_PREFIX}_{name}{labels(e, m)} {values[field]:g}' for (e, m), values in totals]
+
+        lines += [
+            f'# HELP {METRICS_PREFIX}_db_queries_per_request_max Most SQL statements one request has run.',
+            f'# TYPE {METRICS_PREFIX}_db_queries_per_request_max gauge',
+        ]
+        lines += [f'{METRICS_PREFIX}_db_queries_per_request_max{labels(e, m)} {count}'
+                  for (e, m), count in sorted(max_queries.items())]
+        return '\n'.join(lines) + '\n'
+
+def _stream(chunks, stats, finish):
+    """Pass a streamed body through, counting its bytes. The request context
+    is gone by the time it is sent, so each chunk is produced with the
+    request's stats current again (to count LLM calls made by the stream)."""
+    chunks = iter(chunks)
+    try:
+        while True:
+            token = _current.set(stats)
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                return
+            finally:
+                _current.reset(token)
+            stats.response_bytes += len(chunk) if isinstance(chunk, bytes) else len(chunk.encode('utf-8'))
+            yield chunk
+    finally:
+        finish()
+
+def init_instrumentation(app):
+    """Install the hooks and the metrics endpoint when INSTRUMENTATION is on"""
+    if not app.config.get('INSTRUMENTATION'):
+        return None
+    metrics = Metrics()
+    app.extensions['instrumentation'] = metrics
+
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def start_query(conn, cursor, statement, parameters, context, executemany):
+        context._instrumentation_start = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def end_query(conn, cursor, statement, parameters, context, executemany):
+        stats = _current.get()
+        if stats is not None:
+            stats.add_query(time.perf_counter() - context._instrumentation_start)
+
+    @app.before_request
+    def start_request():
+        request.environ['instrumentation.token'] = _current.set(RequestStats())
+
+    @app.after_request
+    def finish_request(response):
+        stats = _current.get()
+        if stats is None:
+            return response
+        endpoint, method = request.endpoint or 'unmatched', request.method
+
+        view = app.view_functions.get(request.endpoint)
+        budget = getattr(view, 'query_budget', None)
+        if budget is not None and stats.queries > budget:
+            message = f'{method} {request.path} ran {stats.queries} SQL statements (budget {budget})'
+            if app.config.get('QUERY_BUDGET_STRICT'):
+                raise QueryBudgetExceeded(message)
+            app.logger.warning(message)
+
+        response.headers['Server-Timing'] = stats.server_timing()
+        finish = lambda: metrics.record(endpoint, method, response.status_code, stats)
+        if response.is_streamed and not response.direct_passthrough:
+            # Counted as the body is sent; recorded once the stream ends
+            response.response = _stream(response.response, stats, finish)
+        else:
+            stats.response_bytes = response.content_length or 0
+            finish()
+        return response
+
+    @app.teardown_request
+    def end_request(exc):
+        token = request.environ.pop('instrumentation.token', None)
+        if token is not None:
+            _current.reset(token)
+
+    @app.route('/api/_metrics')
+    def metrics_endpoint():
+        return Response(metrics.prometheus(), mimetype='text/plain; version=0.0.4')
+
+    return metrics
@@ -0,0 +1,237 @@
+"""
+Persistent background jobs for slow (LLM) work.
+
+Jobs are rows in the ``jobs`` table, so the queue needs nothing but the
+application database (SQLite works) and survives restarts. Workers - threads
+started by create_app when ``JOB_WORKERS`` > 0, or a separate
+``python -m src.worker`` process - claim queued jobs with a conditional
+UPDATE, run the registered handler and store its JSON result.
+
+A kind registered with ``concurrency`` has at most that many jobs running
+at once, across all workers; its other jobs wait in the queue while workers
+take jobs of other kinds.
+
+A failed attempt is retried with exponential backoff until ``max_attempts``
+is reached. An attempt still running ``timeout`` seconds after it started (or
+last called ``hold_attempt``) is taken back by the next idle worker (retried
+or failed) and its late result is discarded. Handlers with side effects call
+``hold_attempt`` in the transaction that commits them, so an attempt that has
+been taken back cannot commit them too.
+"""
+
+import json
+import os
+import socket
+import threading
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from src.models.job import Job
+from src.models.note import db
+
+_handlers = {}
+
+# (job id, attempt number) of the attempt running in this context
+_attempt = ContextVar('job_attempt', default=None)
+
+class JobFailed(Exception):
+    """Raised by a handler for errors that retrying cannot fix"""
+
+class AttemptSuperseded(Exception):
+    """The running attempt timed out and its job was taken back"""
+
+def job_handler(kind, max_attempts=3, timeout=120, concurrency=None):
+    """Register ``func(payload, job_id)`` as the handler for jobs of ``kind``;
+    its return value is stored as the job's JSON result. ``concurrency``
+    caps how many jobs of the kind run at once (None: no cap)"""
+    def register(func):
+        _handlers[kind] = {'func': func, 'max_attempts': max_attempts, 'timeout': timeout,
+                           'concurrency': concurrency}
+        return func
+    return register
+
+def enqueue(kind, payload):
+    """Add a job to the session (the caller commits) and return it"""
+    options = _handlers[kind]
+    job = Job(
+        id=uuid.uuid4().hex,
+        kind=kind,
+        status='queued',
+        payload=json.dumps(payload),
+        attempts=0,
+        max_attempts=options['max_attempts'],
+        timeout=options['timeout'],
+        run_after=datetime.utcnow(),
+        created_at=datetime.utcnow()
+    )
+    db.session.add(job)
+    return job
+
+def report_progress(job_id, completed, total):
+    """Record progress for a running job so pollers can see it"""
+    Job.query.filter_by(id=job_id).update(
+        {'progress': json.dumps({'completed': completed, 'total': total})}, synchronize_session=False
+    )
+    db.session.commit()
+
+def hold_attempt(job_id, **values):
+    """Check, in the caller's transaction, that the running attempt still owns
+    job ``job_id``, renew its lease and set ``values`` on the job. Call it
+    before committing side effects; the reaper will not take the job back
+    until the lease runs out again. Raises AttemptSuperseded otherwise."""
+    current = _attempt.get()
+    if current is None or current[0] != job_id:
+        return  # not running under run_job (e.g. called directly)
+    held = Job.query.filter_by(id=job_id, status='running', attempts=current[1]).update(
+        dict(values, heartbeat_at=datetime.utcnow()), synchronize_session=False
+    )
+    if not held:
+        raise AttemptSuperseded(f'Attempt {current[1]} of job {job_id} was taken back')
+
+def recorded_result(job_id):
+    """The result an earlier attempt stored with ``hold_attempt(result=...)``"""
+    result = db.session.query(Job.result).filter_by(id=job_id).scalar()
+    return json.loads(result) if result else None
+
+def claim_next(worker_id, job_id=None):
+    """Atomically mark the oldest runnable job (or job ``job_id``, if it is
+    runnable) as running; None if there is none"""
+    now = datetime.utcnow()
+    running = dict(db.session.query(Job.kind, db.func.count()).filter(
+        Job.status == 'running'
+    ).group_by(Job.kind).all())
+    kinds = [kind for kind, options in _handlers.items()
+             if options['concurrency'] is None or running.get(kind, 0) < options['concurrency']]
+    candidates = db.session.query(Job.id, Job.kind).filter(
+        Job.status == 'queued', Job.run_after <= now, Job.kind.in_(kinds)
+    )
+    if job_id is not None:
+        candidates = candidates.filter(Job.id == job_id)
+    candidates = candidates.order_by(Job.created_at.asc()).limit(5).all()
+
+    for job_id, kind in candidates:
+        claim = Job.query.filter_by(id=job_id, status='queued')
+        limit = _handlers[kind]['concurrency']
+        if limit is not None:
+            # Counted again in the UPDATE, so a slot taken since the count
+            # above (e.g. by another worker) is not handed out twice
+            running_of_kind = db.session.query(db.func.count(Job.id)).filter(
+                Job.kind == kind, Job.status == 'running'
+            ).scalar_subquery()
+            claim = claim.filter(running_of_kind < limit)
+        claimed = claim.update({
+            'status': 'running',
+            'worker': worker_id,
+            'attempts': Job.attempts + 1,
+            'started_at': now,
+            'heartbeat_at': None
+        }, synchronize_session=False)
+        db.session.commit()
+        if claimed:
+            return db.session.get(Job, job_id)
+    return None
+
+def _finish(job_id, attempt, lease=None, **values):
+    """Store an attempt's outcome unless the job was reclaimed meanwhile (or,
+    given the ``lease`` time it was read with, renewed its lease since)"""
+    query = Job.query.filter_by(id=job_id, status='running', attempts=attempt)
+    if lease is not None:
+        query = query.filter(db.func.coalesce(Job.heartbeat_at, Job.started_at) == lease)
+    finished = query.update(values, synchronize_session=False)
+    db.session.commit()
+    return bool(finished)
+
+def _retry_values(job, error):
+    if job.attempts < job.max_attempts:
+        backoff = timedelta(seconds=2 ** job.attempts)
+        return {'status': 'queued', 'error': error, 'run_after': datetime.utcnow() + backoff}
+    return {'status': 'failed', 'error': error, 'finished_at': datetime.utcnow()}
+
+def run_job(job):
+    """Run a claimed job's handler and record the result or failure"""
+    attempt = job.attempts
+    payload = json.loads(job.payload)
+    token = _attempt.set((job.id, attempt))
+    try:
+        result = _handlers[job.kind]['func'](payload, job.id)
+    except AttemptSuperseded:
+        db.session.rollback()
+        return False
+    except JobFailed as e:
+        db.session.rollback()
+        return _finish(job.id, attempt, status='failed', error=str(e), finished_at=datetime.utcnow())
+    except Exception as e:
+        db.session.rollback()
+        job = db.session.get(Job, job.id)
+        return _finish(job.id, attempt, **_retry_values(job, str(e)))
+    finally:
+        _attempt.reset(token)
+
+    # Discarded if the attempt overran its timeout and was reclaimed meanwhile
+    return _finish(job.id, attempt, status='succeeded', result=json.dumps(result), error=None,
+                   finished_at=datetime.utcnow())
+
+def reap_expired():
+    """Take back running jobs whose attempt has outlived its lease"""
+    now = datetime.utcnow()
+    for job in Job.query.filter_by(status='running').all():
+        lease = job.heartbeat_at or job.started_at
+        if lease and now - lease > timedelta(seconds=job.timeout):
+            _finish(job.id, job.attempts, lease=lease, **_retry_values(job, f'Timed out after {job.timeout}s'))
+
+def run_pending(worker_id='inline'):
+    """Run queued jobs in the calling thread until none is runnable; returns the count"""
+    count = 0
+    while True:
+        job = claim_next(worker_id)
+        if job is None:
+            return count
+        run_job(job)
+        count += 1
+
+class WorkerPool:
+    """Threads that poll the jobs table and run jobs inside an app context"""
+
+    def __init__(self, app, size, poll_interval=1.0):
+        self.app = app
+        self.size = size
+        self.poll_interval = poll_interval
+        self.stopping = threading.Event()
+        self.threads = []
+
+    def start(self):
+        prefix = f'{socket.gethostname()}:{os.getpid()}'
+        for index in range(self.size):
+            thread = threading.Thread(target=self._loop, args=(f'{prefix}:{index}',),
+                                      name=f'job-worker-{index}', daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        return self
+
+    def stop(self, timeout=None):
+        self.stopping.set()
+        for thread in self.threads:
+            thread.join(timeout)
+
+    def _loop(self, worker_id):
+        with self.app.app_context():
+            while not self.stopping.is_set():
+                try:
+                    job = claim_next(worker_id)
+                    if job is None:
+                        reap_expired()
+                        self.stopping.wait(self.poll_interval)
+                    else:
+                        run_job(job)
+                except Exception as e:
+                    db.session.rollback()
+                    self.app.logger.exception(f'Job worker {worker_id} error: {e}')
+                    self.stopping.wait(self.poll_interval)
+                finally:
+                    db.session.remove()
+
+def start_workers(app):
+    """Start the in-process worker pool configured by ``JOB_WORKERS``"""
+    pool = WorkerPool(app, app.config['JOB_WORKERS'], app.config.get('JOB_POLL_INTERVAL', 1.0)).start()
+    app.extensions['job_workers'] = pool
+    return pool
@@ -1,32 +1,125 @@
 # import libraries
+import contextvars
+import json
 import os
-from openai import OpenAI
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from src.instrumentation import track_llm
 
 # Load environment variables - this works both locally and on Vercel
 load_dotenv()
 
-# Get token from environment with fallback
+# Checked when the first LLM request is made, so the app starts without it
 token = os.environ.get("GITHUB_TOKEN")
-if not token:
-    raise ValueError("GITHUB_TOKEN environment variable is required")
 
-endpoint = "https://models.github.ai/inference"
+endpoint = os.environ.get("LLM_ENDPOINT", "https://models.github.ai/inference")
 model = "openai/gpt-4.1-mini"
 
+# Upper bound on LLM requests one process runs in parallel
+max_workers = int(os.environ.get("LLM_MAX_WORKERS", "8"))
+# Upper bound on requests in flight to one endpoint, shared by web requests,
+# streams and background job workers in this process
+max_concurrency = int(os.environ.get("LLM_MAX_CONCURRENCY", "4"))
+
+_client = None
+_executor = None
+_lock = threading.Lock()
+_slots = {}
+
+# The client owns an HTTP connection pool, so one instance is shared by all
+# requests and threads to keep connections (and TLS sessions) alive. The
+# openai SDK is imported here, on first use, because importing it is the
+# largest part of the app's cold start.
+def get_client():
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                if not token:
+                    raise ValueError("GITHUB_TOKEN environment variable is required")
+                from openai import OpenAI
+                _client = OpenAI(base_url=endpoint, api_key=token)
+    return _client
+
+# Drop the shared client, e.g. after changing the endpoint
+def reset_client():
+    global _client
+    with _lock:
+        client, _client = _client, None
+    if client is not None:
+        client.close()
+
+# Tasks run in the submitter's contextvars context, so LLM calls made on the
+# pool are counted for the request that queued them (src/instrumentation.py)
+class ContextExecutor(ThreadPoolExecutor):
+    def submit(self, fn, /, *args, **kwargs):
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ContextExecutor(max_workers=max_workers, thread_name_prefix="llm")
+    return _executor
+
+# Semaphore limiting concurrent requests to the current endpoint
+def endpoint_slots():
+    with _lock:
+        if endpoint not in _slots:
+            _slots[endpoint] = threading.BoundedSemaphore(max_concurrency)
+        return _slots[endpoint]
+
 # A function to call an LLM model and return the response
 def call_llm_model(model, messages, temperature=1.0, top_p=1.0):
-    client = OpenAI(base_url=endpoint,api_key=token)
-    response = client.chat.completions.create(
-        messages=messages, 
-        temperature=temperature, top_p=top_p,model=model)
+    with track_llm(), endpoint_slots():
+        response = get_client().chat.completions.create(
+            messages=messages, 
+            temperature=temperature, top_p=top_p,model=model)
     return response.choices[0].message.content
 
+# Same as call_llm_model, but yields the response text in chunks as it is generated
+def stream_llm_model(model, messages, temperature=1.0, top_p=1.0):
+    with track_llm(), endpoint_slots():
+        stream = get_client().chat.completions.create(
+            messages=messages,
+            temperature=temperature, top_p=top_p, model=model, stream=True)
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+def translation_messages(text, target_language):
+    prompt = (f"Translate the following text to {target_language}. Keep the Markdown "
+              f"formatting and line breaks, and reply with the translation only:\n\n{text}")
+    return [{"role": "user", "content": prompt}]
+
 # A function to translate text using the LLM model
 def translate_text(text, target_language):
-    prompt = f"Translate the following text to {target_language}:\n\n{text}"
-    messages = [{"role": "user", "content": prompt}]
-    return call_llm_model(model, messages)
+    return call_llm_model(model, translation_messages(text, target_language))
+
+# Streaming version of translate_text
+def translate_text_stream(text, target_language):
+    return stream_llm_model(model, translation_messages(text, target_language))
+
+# Translate several short texts in a single request; results keep the order of ``texts``
+def translate_text_list(texts, target_language):
+    prompt = (f"Translate each string in the following JSON array to {target_language}. Keep the "
+              f"Markdown formatting and line breaks. Reply with only a JSON array of the "
+              f"translations, in the same order:\n\n{json.dumps(texts, ensure_ascii=False)}")
+    response = call_llm_model(model, [{"role": "user", "content": prompt}])
+    translations = json.loads(response)
+    if (not isinstance(translations, list) or len(translations) != len(texts)
+            or not all(isinstance(item, str) for item in translations)):
+        raise ValueError("LLM returned a malformed translation list")
+    return translations
+
+# Translate several texts concurrently; results keep the order of ``texts``
+def translate_texts(texts, target_language):
+    if len(texts) <= 1:
+        return [translate_text(text, target_language) for text in texts]
+    futures = [get_executor().submit(translate_text, text, target_language) for text in texts]
+    return [future.result() for future in futures]
 
 system_prompt = '''
 Extract the user's notes into the following structured fields:
@@ -45,16 +138,21 @@ Output:
 }}
 '''
 
-# A function to extract structured notes using the LLM model
-def extract_structured_notes(user_input, lang="English"):
-    prompt = f"Extract the user's notes into structured fields in {lang}."
-    messages = [
+def extraction_messages(user_input, lang="English"):
+    return [
         {"role": "system", "content": system_prompt.format(lang=lang)},
         {"role": "user", "content": user_input}
         ]
-    response = call_llm_model(model, messages)
+
+# A function to extract structured notes using the LLM model
+def extract_structured_notes(user_input, lang="English"):
+    response = call_llm_model(model, extraction_messages(user_input, lang))
     return response
 
+# Streaming version of extract_structured_notes (yields the raw JSON text)
+def extract_structured_notes_stream(user_input, lang="English"):
+    return stream_llm_model(model, extraction_messages(user_input, lang))
+
 # main function
 if __name__ == "__main__":
     # test the extract notes feature
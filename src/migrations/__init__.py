@@ -0,0 +1,235 @@
+"""
+Versioned schema migrations.
+
+Each ``vNNNN_<name>.py`` module in this package is one migration: NNNN is its
+version, its docstring describes it and ``upgrade(op)`` applies it through
+the ``Operations`` helpers below. Applied versions are recorded in the
+``schema_migrations`` table, and ``flask --app src.main migrate`` (or startup
+with AUTO_CREATE_SCHEMA) applies the pending ones in order.
+
+Migrations have to be safe on large tables that are in use, so a migration is
+not one big transaction. Each step commits on its own and can be repeated
+(``add_column`` and ``create_index`` skip what exists, backfills only touch
+rows that still need it), so a run that fails part way is simply run again:
+
+- backfills are set-based UPDATEs over ranges of ``MIGRATION_BATCH_SIZE``
+  ids, each in its own short transaction
+- on PostgreSQL, indexes are built ``CONCURRENTLY`` and other DDL waits at
+  most ``MIGRATION_LOCK_TIMEOUT_MS`` for its lock instead of queueing writes
+- on PostgreSQL, an advisory lock stops two deploys migrating at once
+"""
+
+import importlib
+import pkgutil
+import re
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, text
+from src.models.user import db
+
+# Arbitrary pg_advisory_lock key, held while migrations run
+MIGRATION_LOCK_KEY = 4172001
+
+_MODULE_RE = re.compile(r'^v(\d{4})_(\w+)$')
+
+schema_migrations = Table(
+    'schema_migrations', MetaData(),
+    Column('version', Integer, primary_key=True, autoincrement=False),
+    Column('name', String(200), nullable=False),
+    Column('applied_at', DateTime, nullable=False),
+    Column('duration_ms', Integer),
+)
+
+class Migration:
+    """One migration module"""
+
+    def __init__(self, version, name, module):
+        self.version = version
+        self.name = name
+        self.module = module
+        self.description = (module.__doc__ or name).strip().splitlines()[0]
+
+    def upgrade(self, op):
+        self.module.upgrade(op)
+
+    def __repr__(self):
+        return f'<Migration {self.version:04d} {self.name}>'
+
+def load_migrations():
+    """All migrations in this package, in version order"""
+    migrations = {}
+    for info in pkgutil.iter_modules(__path__):
+        match = _MODULE_RE.match(info.name)
+        if not match:
+            continue
+        version = int(match.group(1))
+        if version in migrations:
+            raise RuntimeError(f'Two migrations have version {version:04d}')
+        migrations[version] = Migration(version, match.group(2), importlib.import_module(f'{__name__}.{info.name}'))
+    return [migrations[version] for version in sorted(migrations)]
+
+class Operations:
+    """Schema changes available to migrations. Every call runs in its own
+    transaction on the migration connection."""
+
+    def __init__(self, connection, batch_size, lock_timeout_ms, logger):
+        self.connection = connection
+        self.dialect = connection.dialect.name
+        self.batch_size = batch_size
+        self.lock_timeout_ms = lock_timeout_ms
+        self.logger = logger
+
+    @contextmanager
+    def transaction(self):
+        with self.connection.begin():
+            if self.dialect == 'postgresql':
+                self.connection.execute(text(f'SET LOCAL lock_timeout = {int(self.lock_timeout_ms)}'))
+                # Backfill batches and DDL are not bound by the app's DB_STATEMENT_TIMEOUT_MS
+                self.connection.execute(text('SET LOCAL statement_timeout = 0'))
+            yield self.connection
+
+    def execute(self, *statements, **params):
+        """Run SQL statements in one transaction; returns the last rowcount"""
+        with self.transaction() as connection:
+            for statement in statements:
+                result = connection.execute(text(statement), params)
+        return result.rowcount
+
+    def scalar(self, statement, **params):
+        with self.transaction() as connection:
+            return connection.execute(text(statement), params).scalar()
+
+    def has_table(self, table):
+        with self.transaction() as connection:
+            return inspect(connection).has_table(table)
+
+    def has_column(self, table, column):
+        with self.transaction() as connection:
+            return column in {c['name'] for c in inspect(connection).get_columns(table)}
+
+    def create_tables(self):
+        """Create the models' tables (with their indexes) where missing"""
+        with self.transaction() as connection:
+            db.metadata.create_all(connection, checkfirst=True)
+
+    def add_column(self, table, column, definition):
+        """``ALTER TABLE ... ADD COLUMN`` unless the column exists. On big
+        tables give it no default (or a constant one) so the table is not
+        rewritten, and fill it with ``backfill``."""
+        if self.has_column(table, column):
+            return False
+        self.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+        return True
+
+    def create_index(self, name, table, columns, unique=False, using=None, where=None):
+        """``CREATE INDEX`` unless it exists. PostgreSQL builds it
+        ``CONCURRENTLY``, so the table takes writes while it is built."""
+        unique = 'UNIQUE ' if unique else ''
+        columns = ', '.join(columns)
+        where = f' WHERE {where}' if where else ''
+        if self.dialect != 'postgresql':
+            self.execute(f'CREATE {unique}INDEX IF NOT EXISTS {name} ON {table} ({columns}){where}')
+            return
+
+        using = f' USING {using}' if using else ''
+        with self._autocommit() as connection:
+            # An interrupted concurrent build leaves an invalid index behind
+            invalid = connection.execute(text(
+                'SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid '
+                'WHERE c.relname = :name AND NOT i.indisvalid'
+            ), {'name': name}).first()
+            if invalid:
+                connection.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS {name}'))
+            connection.execute(text(
+                f'CREATE {unique}INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table}{using} ({columns}){where}'
+            ))
+
+    def drop_index(self, name):
+        """``DROP INDEX`` if it exists (``CONCURRENTLY`` on PostgreSQL)"""
+        if self.dialect != 'postgresql':
+            self.execute(f'DROP INDEX IF EXISTS {name}')
+            return
+        with self._autocommit() as connection:
+            connection.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS {name}'))
+
+    @contextmanager
+    def _autocommit(self):
+        """A separate PostgreSQL connection outside any transaction block,
+        which CONCURRENTLY requires"""
+        with self.connection.engine.connect() as connection:
+            connection = connection.execution_options(isolation_level='AUTOCOMMIT')
+            connection.execute(text('SET statement_timeout = 0'))
+            try:
+                yield connection
+            finally:
+                connection.execute(text('RESET statement_timeout'))
+
+    def backfill(self, table, assignments, where=None, **params):
+        """``UPDATE table SET assignments [WHERE where]`` over id ranges of
+        ``batch_size``, committing each; returns the number of rows updated"""
+        with self.transaction() as connection:
+            low, high = connection.execute(text(f'SELECT min(id), max(id) FROM {table}')).first()
+        if low is None:
+            return 0
+
+        condition = f' AND ({where})' if where else ''
+        statement = f'UPDATE {table} SET {assignments} WHERE id >= :batch_start AND id < :batch_end{condition}'
+        updated = 0
+        for start in range(low, high + 1, self.batch_size):
+            updated += self.execute(statement, batch_start=start, batch_end=start + self.batch_size, **params)
+        self.logger.info(f'Backfilled {updated} rows of {table}')
+        return updated
+
+    @contextmanager
+    def lock(self):
+        """Hold the migration lock (PostgreSQL) for the duration of the block"""
+        if self.dialect != 'postgresql':
+            yield
+            return
+        self.connection.execute(text('SELECT pg_advisory_lock(:key)'), {'key': MIGRATION_LOCK_KEY})
+        self.connection.commit()
+        try:
+            yield
+        finally:
+            self.connection.execute(text('SELECT pg_advisory_unlock(:key)'), {'key': MIGRATION_LOCK_KEY})
+            self.connection.commit()
+
+def _applied(op):
+    with op.transaction() as connection:
+        schema_migrations.create(connection, checkfirst=True)
+        return {row.version: row for row in connection.execute(schema_migrations.select())}
+
+def run_migrations(app):
+    """Apply pending migrations in version order; returns the migrations applied"""
+    applied_now = []
+    with app.app_context(), db.engine.connect() as connection:
+        op = Operations(connection, app.config['MIGRATION_BATCH_SIZE'],
+                        app.config['MIGRATION_LOCK_TIMEOUT_MS'], app.logger)
+        with op.lock():
+            applied = _applied(op)
+            for migration in load_migrations():
+                if migration.version in applied:
+                    continue
+                app.logger.info(f'Applying migration {migration.version:04d}: {migration.description}')
+                start = time.perf_counter()
+                migration.upgrade(op)
+                with op.transaction() as transaction:
+                    transaction.execute(schema_migrations.insert().values(
+                        version=migration.version,
+                        name=migration.name,
+                        applied_at=datetime.utcnow(),
+                        duration_ms=int((time.perf_counter() - start) * 1000)
+                    ))
+                applied_now.append(migration)
+    return applied_now
+
+def migration_status(app):
+    """``[(migration, applied_at or None)]`` for every migration"""
+    with app.app_context(), db.engine.connect() as connection:
+        applied = _applied(Operations(connection, app.config['MIGRATION_BATCH_SIZE'],
+                                      app.config['MIGRATION_LOCK_TIMEOUT_MS'], app.logger))
+    return [
+        (migration, applied[migration.version].applied_at if migration.version in applied else None)
+        for migration in load_migrations()
+    ]
@@ -0,0 +1,8 @@
+"""Create the tables defined by the models
+
+Databases created before migrations existed keep their tables as they are;
+columns and indexes added to those tables since come from later migrations.
+"""
+
+def upgrade(op):
+    op.create_tables()
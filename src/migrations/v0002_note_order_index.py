@@ -0,0 +1,24 @@
+"""Add notes.order_index, numbering each user's notes from the last updated
+
+Replaces migrate_add_order_index.py. The positions are computed once, by a
+window function into a temporary table, and copied to the notes in batches.
+"""
+
+def upgrade(op):
+    op.add_column('notes', 'order_index', 'INTEGER')
+    if op.scalar('SELECT 1 FROM notes WHERE order_index IS NULL LIMIT 1'):
+        op.execute(
+            'DROP TABLE IF EXISTS note_positions',
+            'CREATE TEMPORARY TABLE note_positions (id INTEGER PRIMARY KEY, position INTEGER NOT NULL)',
+            """
+            INSERT INTO note_positions (id, position)
+            SELECT id, row_number() OVER (PARTITION BY user_id ORDER BY updated_at DESC, id) - 1
+            FROM notes
+            """
+        )
+        op.backfill(
+            'notes', 'order_index = (SELECT position FROM note_positions WHERE note_positions.id = notes.id)',
+            where='order_index IS NULL'
+        )
+        op.execute('DROP TABLE note_positions')
+    op.create_index('ix_notes_order_index', 'notes', ['order_index'])
@@ -0,0 +1,76 @@
+"""Create the full-text search index (FTS5 on SQLite, tsvector on PostgreSQL)
+
+On PostgreSQL ``notes.search_vector`` is a plain column kept current by a
+trigger rather than a generated one, which would rewrite the whole table
+under an exclusive lock: it is backfilled in batches and its GIN index built
+concurrently. Databases that already have the generated column keep it.
+Without FTS5 on SQLite, search falls back to LIKE matching.
+"""
+
+from sqlalchemy.exc import OperationalError
+
+SQLITE_SETUP = [
+    """
+    CREATE VIRTUAL TABLE notes_fts USING fts5(
+        title, content, content='notes', content_rowid='id', tokenize='unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS notes_fts_ai AFTER INSERT ON notes BEGIN
+        INSERT INTO notes_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS notes_fts_ad AFTER DELETE ON notes BEGIN
+        INSERT INTO notes_fts(notes_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+    END
+    """,
+    # Only title/content edits touch the index; reorders leave it alone
+    """
+    CREATE TRIGGER IF NOT EXISTS notes_fts_au AFTER UPDATE OF title, content ON notes BEGIN
+        INSERT INTO notes_fts(notes_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO notes_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END
+    """,
+    "INSERT INTO notes_fts(notes_fts) VALUES ('rebuild')",
+]
+
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('simple', coalesce({row}title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce({row}content, '')), 'B')"
+)
+
+POSTGRES_TRIGGER = [
+    f"""
+    CREATE OR REPLACE FUNCTION notes_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := {SEARCH_VECTOR.format(row='NEW.')};
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    'DROP TRIGGER IF EXISTS notes_search_vector_update ON notes',
+    """
+    CREATE TRIGGER notes_search_vector_update BEFORE INSERT OR UPDATE OF title, content ON notes
+    FOR EACH ROW EXECUTE PROCEDURE notes_search_vector_update()
+    """,
+]
+
+def upgrade(op):
+    if op.dialect == 'sqlite':
+        if op.has_table('notes_fts'):
+            return
+        try:
+            op.execute(*SQLITE_SETUP)
+        except OperationalError as e:
+            op.logger.warning(f'Full-text search unavailable, falling back to LIKE: {e}')
+    elif op.dialect == 'postgresql':
+        generated = op.scalar(
+            "SELECT is_generated = 'ALWAYS' FROM information_schema.columns "
+            "WHERE table_name = 'notes' AND column_name = 'search_vector'"
+        )
+        if not generated:
+            op.add_column('notes', 'search_vector', 'tsvector')
+            op.execute(*POSTGRES_TRIGGER)
+            op.backfill('notes', f"search_vector = {SEARCH_VECTOR.format(row='')}", where='search_vector IS NULL')
+        op.create_index('ix_notes_search_vector', 'notes', ['search_vector'], using='GIN')
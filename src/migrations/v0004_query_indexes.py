@@ -0,0 +1,21 @@
+"""Replace single-column note indexes with composites matching the queries
+
+- ``ix_notes_list_order`` serves GET /notes (order_index, updated_at DESC,
+  id) and supersedes ``ix_notes_order_index``
+- ``ix_notes_user_updated`` / ``_created`` / ``_title`` serve advanced
+  search, which filters by user and sorts by one of those columns; they
+  supersede ``ix_notes_created_at`` and ``ix_notes_title``
+- ``ix_notes_updated_at`` stays for the change feed, which is not per user
+- ``ix_shared_notes_note_id`` serves a note's share links, newest first
+
+The new indexes are built before the old ones are dropped.
+"""
+
+def upgrade(op):
+    op.create_index('ix_notes_list_order', 'notes', ['order_index', 'updated_at DESC', 'id'])
+    op.create_index('ix_notes_user_updated', 'notes', ['user_id', 'updated_at'])
+    op.create_index('ix_notes_user_created', 'notes', ['user_id', 'created_at'])
+    op.create_index('ix_notes_user_title', 'notes', ['user_id', 'title'])
+    op.create_index('ix_shared_notes_note_id', 'shared_notes', ['note_id', 'created_at'])
+    for name in ('ix_notes_order_index', 'ix_notes_created_at', 'ix_notes_title'):
+        op.drop_index(name)
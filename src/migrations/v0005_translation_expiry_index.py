@@ -0,0 +1,8 @@
+"""Index note_translations.created_at
+
+Expired translations are purged with ``DELETE ... WHERE created_at < :cutoff``;
+the index turns that into a range delete instead of a scan of the cache.
+"""
+
+def upgrade(op):
+    op.create_index('ix_note_translations_created_at', 'note_translations', ['created_at'])
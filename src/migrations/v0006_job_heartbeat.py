@@ -0,0 +1,8 @@
+"""Add jobs.heartbeat_at
+
+Set when a running attempt renews its lease (``hold_attempt``); the reaper
+only takes back attempts whose lease has run out.
+"""
+
+def upgrade(op):
+    op.add_column('jobs', 'heartbeat_at', 'TIMESTAMP')
@@ -0,0 +1,8 @@
+"""Add notes.version
+
+A counter of title / content edits used for If-Match, so reorders (which
+bump updated_at) no longer make a client's pending edit look stale.
+"""
+
+def upgrade(op):
+    op.add_column('notes', 'version', 'INTEGER NOT NULL DEFAULT 1')
@@ -0,0 +1,18 @@
+"""
+Tombstones for deleted notes, read by the change feed (GET /notes/changes)
+"""
+
+from datetime import datetime
+from src.models.note import db
+
+class NoteDeletion(db.Model):
+    """Records that a note was deleted, so syncing clients can drop it"""
+    __tablename__ = 'note_deletions'
+
+    id = db.Column(db.Integer, primary_key=True)
+    note_id = db.Column(db.Integer, nullable=False)  # no FK: the note row is gone
+    user_id = db.Column(db.Integer, nullable=True)
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    def __repr__(self):
+        return f'<NoteDeletion {self.note_id}>'
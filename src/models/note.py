@@ -4,27 +4,53 @@ from src.models.user import db
 
 class Note(db.Model):
     __tablename__ = 'notes'
+    __table_args__ = (
+        # GET /notes order (NOTE_LIST_ORDER) and its keyset cursor
+        db.Index('ix_notes_list_order', 'order_index', db.text('updated_at DESC'), 'id'),
+        # Advanced search: the user's notes by date range and sort column
+        db.Index('ix_notes_user_updated', 'user_id', 'updated_at'),
+        db.Index('ix_notes_user_created', 'user_id', 'created_at'),
+        db.Index('ix_notes_user_title', 'user_id', 'title'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
-    title = db.Column(db.String(200), nullable=False, index=True)
+    title = db.Column(db.String(200), nullable=False)
     content = db.Column(db.Text, nullable=False)
-    order_index = db.Column(db.Integer, default=0, index=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    order_index = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    # Content version: counts title / content edits, not reorders
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
     
     # Add user relationship for future multi-user support
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
     user = db.relationship('User', backref=db.backref('notes', lazy=True))
     
+    # ORM updates only apply while version still holds the value that was
+    # loaded, and increment it (optimistic concurrency, see the If-Match
+    # handling in routes/note.py). Reorders are bulk UPDATEs of order_index
+    # and leave it alone, so they never make a pending edit stale.
+    __mapper_args__ = {'version_id_col': version}
+    
     def __repr__(self):
         return f'<Note {self.title}>'
     
+    @classmethod
+    def validate_fields(cls, title, content):
+        """Raise ValueError if ``title`` / ``content`` cannot be stored in a note"""
+        if not isinstance(title, str) or not isinstance(content, str):
+            raise ValueError('title and content must be strings')
+        max_length = cls.__table__.c.title.type.length
+        if len(title) > max_length:
+            raise ValueError(f'title is longer than {max_length} characters')
+    
     def to_dict(self):
         return {
             'id': self.id,
             'title': self.title,
             'content': self.content,
             'order_index': self.order_index,
+            'version': self.version,
             'user_id': self.user_id,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
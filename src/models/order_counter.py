@@ -0,0 +1,59 @@
+"""
+Per-user counter that hands out order_index values for new notes
+"""
+
+from sqlalchemy.exc import IntegrityError
+from src.models.note import Note, db
+
+class NoteOrderCounter(db.Model):
+    """The last order_index given to one of the user's notes.
+
+    Allocation is a single ``UPDATE ... SET last_index = last_index + n
+    RETURNING last_index``: the row lock (or SQLite's write lock) serializes
+    concurrent creates, so every allocated index is unique per user without a
+    ``SELECT max(order_index)`` round trip.
+    """
+    __tablename__ = 'note_order_counters'
+
+    user_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    last_index = db.Column(db.Integer, nullable=False, default=0)
+
+    @classmethod
+    def allocate(cls, user_id, count=1):
+        """Reserve ``count`` consecutive indices after the user's last note;
+        returns the first. Runs in the caller's transaction."""
+        for _ in range(2):
+            last_index = db.session.execute(
+                db.update(cls)
+                .where(cls.user_id == user_id)
+                .values(last_index=cls.last_index + count)
+                .returning(cls.last_index)
+            ).scalar()
+            if last_index is not None:
+                return last_index - count + 1
+            cls._create(user_id)
+        raise RuntimeError(f'Could not allocate order_index for user {user_id}')
+
+    @classmethod
+    def _create(cls, user_id):
+        """Start the user's counter at their current highest order_index"""
+        try:
+            with db.session.begin_nested():
+                db.session.execute(db.insert(cls).from_select(
+                    ['user_id', 'last_index'],
+                    db.select(db.literal(user_id), db.func.coalesce(db.func.max(Note.order_index), 0))
+                    .where(Note.user_id == user_id)
+                ))
+        except IntegrityError:
+            pass  # another request created it first
+
+    @classmethod
+    def raise_to(cls, index):
+        """Keep every counter at or above ``index`` (after notes are renumbered)"""
+        db.session.execute(
+            db.update(cls).where(cls.last_index < index).values(last_index=index)
+            .execution_options(synchronize_session=False)
+        )
+
+    def __repr__(self):
+        return f'<NoteOrderCounter {self.user_id}: {self.last_index}>'
@@ -4,14 +4,19 @@ Shared Note model for public note sharing functionality
 
 import secrets
 from datetime import datetime, timedelta
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
+from sqlalchemy.orm.attributes import set_committed_value
 from src.models.note import db
 
 class SharedNote(db.Model):
     """Model for shared notes with public access"""
     __tablename__ = 'shared_notes'
+    __table_args__ = (
+        # A note's share links, newest first
+        Index('ix_shared_notes_note_id', 'note_id', 'created_at'),
+    )
     
     id = Column(Integer, primary_key=True)
     note_id = Column(Integer, ForeignKey('notes.id', ondelete='CASCADE'), nullable=False)
@@ -55,9 +60,18 @@ class SharedNote(db.Model):
         return self.is_active and not self.is_expired()
     
     def increment_view_count(self):
-        """Increment the view count"""
-        self.view_count += 1
-        db.session.commit()
+        """Count a view; buffered and written in batches by src.view_counts"""
+        from src.view_counts import record_view
+        written = record_view(self.id)
+        if written:
+            # Keep this instance in step with the row the flush just updated
+            set_committed_value(self, 'view_count', self.view_count + written)
+    
+    @property
+    def total_views(self):
+        """Stored view count plus views not yet flushed to the database"""
+        from src.view_counts import pending_views
+        return self.view_count + pending_views(self.id)
     
     def to_dict(self, include_sensitive=False):
         """Convert to dictionary for JSON serialization"""
@@ -67,7 +81,7 @@ class SharedNote(db.Model):
             'has_password': bool(self.password_hash),
             'expires_at': self.expires_at.isoformat() if self.expires_at else None,
             'is_active': self.is_active,
-            'view_count': self.view_count,
+            'view_count': self.total_views,
             'created_at': self.created_at.isoformat(),
             'is_expired': self.is_expired()
         }
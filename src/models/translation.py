@@ -0,0 +1,26 @@
+"""
+Translation cache model for reusing LLM translations of unchanged text
+"""
+
+from datetime import datetime
+from src.models.note import db
+
+class NoteTranslation(db.Model):
+    """A cached translation keyed by (sha256 of source text, language, model)"""
+    __tablename__ = 'note_translations'
+    __table_args__ = (
+        db.UniqueConstraint('text_hash', 'target_language', 'model', name='uq_note_translations_key'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    note_id = db.Column(db.Integer, db.ForeignKey('notes.id', ondelete='CASCADE'), nullable=True, index=True)
+    text_hash = db.Column(db.String(64), nullable=False)
+    target_language = db.Column(db.String(50), nullable=False)
+    model = db.Column(db.String(100), nullable=False)
+    translated_text = db.Column(db.Text, nullable=False)
+    hit_count = db.Column(db.Integer, default=0, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    last_used_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    
+    def __repr__(self):
+        return f'<NoteTranslation {self.text_hash[:8]} -> {self.target_language}>'
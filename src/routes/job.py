@@ -0,0 +1,34 @@
+import os
+import socket
+from flask import Blueprint, current_app, jsonify
+from src.jobs import claim_next, reap_expired, run_job
+from src.models.job import Job
+from src.models.note import db
+
+job_bp = Blueprint('job', __name__)
+
+def job_accepted(job):
+    """202 response pointing the client at a newly enqueued job"""
+    status_url = f'/api/jobs/{job.id}'
+    return jsonify({
+        'job_id': job.id,
+        'status': job.status,
+        'status_url': status_url
+    }), 202, {'Location': status_url}
+
+@job_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Get a background job's status, progress and (once finished) result or error.
+
+    With ``JOB_RUN_ON_POLL`` a queued job that is due is run in this request
+    before answering, so jobs finish without worker threads or a worker
+    process (e.g. on Vercel) as long as the client polls.
+    """
+    job = Job.query.get_or_404(job_id)
+    if job.status in ('queued', 'running') and current_app.config.get('JOB_RUN_ON_POLL'):
+        reap_expired()
+        claimed = claim_next(f'{socket.gethostname()}:{os.getpid()}:poll', job_id=job.id)
+        if claimed is not None:
+            run_job(claimed)
+        db.session.refresh(job)
+    return jsonify(job.to_dict())
@@ -1,19 +1,196 @@
-from flask import Blueprint, jsonify, request, render_template_string
+from flask import Blueprint, jsonify, request, render_template_string, Response, stream_with_context, current_app
 from src.models.note import Note, db
 from src.models.share import SharedNote
-from src.llm import translate_text, extract_structured_notes
-from src.templates import get_template_list, get_template, format_template
+from src.models.deletion import NoteDeletion
+from src.models.translation import NoteTranslation
+from src.models.order_counter import NoteOrderCounter
+from src.llm import extract_structured_notes, extract_structured_notes_stream
+from src.translation import stream_translate_fields, invalidate_note_translations, cache_stats
+from src.tasks import parse_structured_note
+from src.jobs import enqueue
+from src.routes.job import job_accepted
+from src.routes.shared import invalidate_shared_page
+from src.templates import NOTE_TEMPLATES, get_template_list, get_template, format_template
+from src.search import full_text_matches, like_filter, highlight
+from src.http_cache import conditional, make_etag
+from src.instrumentation import query_budget
+from src.export import EXPORT_FORMATS, export_stream
+from src.importer import detect_format, spool_upload
+from src.view_counts import pending_views
+from sqlalchemy.orm.exc import StaleDataError
+from datetime import datetime, timedelta
+import base64
 import json
 
 note_bp = Blueprint('note', __name__)
 
+# Sidebar ordering; id is the tie-breaker that makes keyset pagination stable
+NOTE_LIST_ORDER = (Note.order_index.asc().nulls_first(), Note.updated_at.desc(), Note.id.asc())
+
+# Fields that can be requested with ?fields= on the notes listing
+NOTE_LIST_FIELDS = ('id', 'title', 'content', 'preview', 'order_index', 'version', 'user_id', 'created_at', 'updated_at')
+DEFAULT_LIST_FIELDS = ('id', 'title', 'content', 'order_index', 'version', 'user_id', 'created_at', 'updated_at')
+PREVIEW_LENGTH = 120
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Change feed: rows per response, and how far each feed cursor is moved back
+# so notes saved by transactions that committed late are not missed
+DEFAULT_CHANGES_LIMIT = 500
+MAX_CHANGES_LIMIT = 1000
+CHANGE_FEED_OVERLAP = timedelta(seconds=2)
+
+# Ids per CASE statement when rewriting order_index (keeps bind params bounded)
+REORDER_CHUNK_SIZE = 1000
+
+# POST /notes/bulk: operations per request, and ids per IN (...) clause
+MAX_BULK_OPERATIONS = 10000
+BULK_CHUNK_SIZE = 500
+BULK_OPS = ('create', 'update', 'delete')
+
+def encode_cursor(values):
+    """Encode keyset values as an opaque, URL-safe cursor string"""
+    raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor, raising ValueError if malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+def _serialize_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def sse_event(event, data):
+    """Format one Server-Sent Events message with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def sse_response(events):
+    """Stream an iterable of SSE messages to the client without buffering"""
+    return Response(stream_with_context(events), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+def parse_list_fields(args):
+    """Fields requested with ?fields=, raising ValueError for unknown ones"""
+    fields = [f.strip() for f in args.get('fields', '').split(',') if f.strip()] or list(DEFAULT_LIST_FIELDS)
+    unknown = [f for f in fields if f not in NOTE_LIST_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+def note_list_query(fields):
+    """Query loading only the requested list fields (plus the keyset columns).
+
+    Preview is truncated in SQL so full note bodies never leave the database
+    for the sidebar list.
+    """
+    columns = {'id': Note.id, 'order_index': Note.order_index, 'updated_at': Note.updated_at}
+    for field in fields:
+        if field == 'preview':
+            columns['preview'] = db.func.substr(Note.content, 1, PREVIEW_LENGTH)
+        else:
+            columns[field] = getattr(Note, field)
+    return db.session.query(*[column.label(name) for name, column in columns.items()])
+
+# Validators for conditional GETs. Collections are tagged by row count and
+# newest updated_at (reorders bump updated_at too); they get no Last-Modified
+# because deleting an older row does not move max(updated_at).
+def notes_validators():
+    count, latest = db.session.query(db.func.count(Note.id), db.func.max(Note.updated_at)).one()
+    return (count, latest), None
+
+# A single note is tagged by version and updated_at: reorders change its
+# order_index (and updated_at) but not the version used for If-Match, so
+# this weak tag is for caching only and the version is sent separately.
+def note_validators(note_id):
+    row = db.session.query(Note.version, Note.updated_at).filter_by(id=note_id).first()
+    if row is None:
+        return (note_id, None), None
+    return (row.version, row.updated_at), row.updated_at
+
+def note_shares_validators(note_id):
+    now = datetime.utcnow()
+    shares = db.session.query(
+        SharedNote.id, SharedNote.is_active, SharedNote.view_count, SharedNote.expires_at
+    ).filter_by(note_id=note_id).all()
+    return [
+        (share.id, share.is_active, share.view_count + pending_views(share.id),
+         share.expires_at is not None and share.expires_at < now)
+        for share in shares
+    ], None
+
+# Templates only change with the code, so they are tagged once per process
+TEMPLATES_TAG = make_etag(get_template_list(), NOTE_TEMPLATES)
+
+def templates_validators(template_id=None):
+    return (TEMPLATES_TAG,), None
+
 @note_bp.route('/notes', methods=['GET'])
+@query_budget(2)
+@conditional(notes_validators)
 def get_notes():
-    """Get all notes, ordered by order_index, then by most recently updated"""
-    notes = Note.query.order_by(Note.order_index.asc(), Note.updated_at.desc()).all()
-    return jsonify([note.to_dict() for note in notes])
+    """Get notes, ordered by order_index, then by most recently updated.
+
+    Without query parameters the full list is returned. Passing ``limit``,
+    ``cursor`` or ``fields`` switches to keyset pagination over
+    ``(order_index, updated_at, id)`` and returns ``{notes, next_cursor}``.
+    """
+    args = request.args
+    if not any(key in args for key in ('limit', 'cursor', 'fields')):
+        notes = Note.query.order_by(*NOTE_LIST_ORDER).all()
+        return jsonify([note.to_dict() for note in notes])
+
+    try:
+        limit = min(max(int(args.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+
+    try:
+        fields = parse_list_fields(args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    query = note_list_query(fields)
+
+    cursor = args.get('cursor')
+    if cursor:
+        try:
+            order_index, updated_at, last_id = decode_cursor(cursor)
+            updated_at = datetime.fromisoformat(updated_at)
+        except (ValueError, TypeError):
+            return jsonify({'error': 'Invalid cursor'}), 400
+        if order_index is None:
+            # Notes without an order_index sort first; the rest all follow
+            query = query.filter(db.or_(Note.order_index.isnot(None), db.and_(Note.order_index.is_(None), db.or_(
+                Note.updated_at < updated_at,
+                db.and_(Note.updated_at == updated_at, Note.id > last_id)
+            ))))
+        else:
+            # The leading >= lets the planner seek ix_notes_list_order to the cursor
+            query = query.filter(Note.order_index >= order_index, db.or_(
+                Note.order_index > order_index,
+                db.and_(Note.order_index == order_index, Note.updated_at < updated_at),
+                db.and_(Note.order_index == order_index, Note.updated_at == updated_at, Note.id > last_id)
+            ))
+
+    rows = query.order_by(*NOTE_LIST_ORDER).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([last.order_index, last.updated_at.isoformat(), last.id])
+
+    return jsonify({
+        'notes': [{field: _serialize_value(getattr(row, field)) for field in fields} for row in rows],
+        'next_cursor': next_cursor
+    })
 
 @note_bp.route('/notes', methods=['POST'])
+@query_budget(7)
 def create_note():
     """Create a new note"""
     try:
@@ -21,9 +198,9 @@ def create_note():
         if not data or 'title' not in data or 'content' not in data:
             return jsonify({'error': 'Title and content are required'}), 400
         
-        # Get the highest order_index and add 1 to put new notes at the end
-        max_order = db.session.query(db.func.max(Note.order_index)).scalar() or 0
-        note = Note(title=data['title'], content=data['content'], order_index=max_order + 1, user_id=1)
+        # New notes go at the end of the user's list
+        note = Note(title=data['title'], content=data['content'],
+                    order_index=NoteOrderCounter.allocate(1), user_id=1)
         db.session.add(note)
         db.session.commit()
         return jsonify(note.to_dict()), 201
@@ -32,34 +209,219 @@ def create_note():
         return jsonify({'error': str(e)}), 500
 
 @note_bp.route('/notes/<int:note_id>', methods=['GET'])
+@query_budget(2)
+@conditional(note_validators)
 def get_note(note_id):
-    """Get a specific note by ID"""
+    """Get a specific note by ID; ``X-Note-Version`` holds the version to
+    send back as ``If-Match: "<version>"`` when writing it"""
     note = Note.query.get_or_404(note_id)
-    return jsonify(note.to_dict())
+    return jsonify(note.to_dict()), 200, {'X-Note-Version': str(note.version)}
+
+def version_conflict(note_id):
+    """412 response carrying the note's current state, for the client to merge"""
+    db.session.rollback()
+    note = db.session.get(Note, note_id)
+    if note is None:
+        return jsonify({'error': 'Note not found'}), 404
+    return jsonify({
+        'error': 'Note was modified since this version',
+        'note': note.to_dict()
+    }), 412, {'ETag': f'"{note.version}"'}
 
 @note_bp.route('/notes/<int:note_id>', methods=['PUT'])
+@query_budget(4)
 def update_note(note_id):
-    """Update a specific note"""
+    """Update a specific note.
+
+    With ``If-Match: "<version>"`` (the note's ``version``, also the ETag of
+    write responses) the update only applies to that version; otherwise it
+    returns 412 with the current note.
+    """
     try:
-        note = Note.query.get_or_404(note_id)
+        note = db.session.get(Note, note_id)
+        if note is None:
+            return jsonify({'error': 'Note not found'}), 404
         data = request.json
         
-        if not data:
+        if not data or not isinstance(data, dict):
             return jsonify({'error': 'No data provided'}), 400
         
-        note.title = data.get('title', note.title)
-        note.content = data.get('content', note.content)
+        if request.if_match and not request.if_match.contains(str(note.version)):
+            return version_conflict(note_id)
+        
+        title = data.get('title', note.title)
+        content = data.get('content', note.content)
+        try:
+            Note.validate_fields(title, content)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if title != note.title or content != note.content:
+            invalidate_note_translations(note.id, {'title': title, 'content': content})
+        note.title = title
+        note.content = content
         db.session.commit()
-        return jsonify(note.to_dict())
+        return jsonify(note.to_dict()), 200, {'ETag': f'"{note.version}"'}
+    except StaleDataError:
+        # Another request updated the note between our read and write
+        return version_conflict(note_id)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+PATCHABLE_FIELDS = ('title', 'content')
+
+def apply_splices(text, ops):
+    """Apply ``[{start, end, text}]`` splices in order; offsets count code points"""
+    for op in ops:
+        start, end, insert = op.get('start'), op.get('end'), op.get('text', '')
+        if not all(isinstance(v, int) and not isinstance(v, bool) for v in (start, end)) or not isinstance(insert, str):
+            raise ValueError('Each op needs integer start/end and a string text')
+        if not 0 <= start <= end <= len(text):
+            raise ValueError(f'Op range {start}:{end} is outside the text ({len(text)} characters)')
+        text = text[:start] + insert + text[end:]
+    return text
+
+@note_bp.route('/notes/<int:note_id>', methods=['PATCH'])
+@query_budget(4)
+def patch_note(note_id):
+    """Partially update a note.
+
+    The body holds only the changed fields (``{"title": ...}``) and/or
+    ``ops``: splices ``{field, start, end, text}`` against the note version
+    named by ``If-Match`` (or ``base_version`` in the body), which is then
+    required. Only columns that actually change are written, and the response
+    omits ``content`` - the client already has it.
+    """
+    try:
+        note = db.session.get(Note, note_id)
+        if note is None:
+            return jsonify({'error': 'Note not found'}), 404
+        data = request.json
+
+        if not data or not isinstance(data, dict):
+            return jsonify({'error': 'No data provided'}), 400
+
+        base_version = data.get('base_version')
+        if request.if_match:
+            if not request.if_match.contains(str(note.version)):
+                return version_conflict(note_id)
+        elif base_version is not None:
+            if str(base_version) != str(note.version):
+                return version_conflict(note_id)
+        elif data.get('ops'):
+            return jsonify({'error': 'Text ops require If-Match or base_version'}), 428
+
+        values = {field: getattr(note, field) for field in PATCHABLE_FIELDS}
+        for field in PATCHABLE_FIELDS:
+            if field in data:
+                if not isinstance(data[field], str):
+                    return jsonify({'error': f'{field} must be a string'}), 400
+                values[field] = data[field]
+
+        ops = data.get('ops') or []
+        if not isinstance(ops, list) or any(not isinstance(op, dict) or op.get('field') not in PATCHABLE_FIELDS for op in ops):
+            return jsonify({'error': f"ops must be a list of splices on: {', '.join(PATCHABLE_FIELDS)}"}), 400
+        for field in PATCHABLE_FIELDS:
+            field_ops = [op for op in ops if op['field'] == field]
+            if field_ops:
+                values[field] = apply_splices(values[field], field_ops)
+        Note.validate_fields(values['title'], values['content'])
+
+        changed = {field: value for field, value in values.items() if value != getattr(note, field)}
+        if changed:
+            invalidate_note_translations(note.id, values)
+            for field, value in changed.items():
+                setattr(note, field, value)
+            db.session.commit()
+
+        result = note.to_dict()
+        del result['content']
+        return jsonify(result), 200, {'ETag': f'"{note.version}"'}
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except StaleDataError:
+        return version_conflict(note_id)
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def record_deletions(notes):
+    """Write tombstones for ``(note_id, user_id)`` pairs and prune expired ones"""
+    now = datetime.utcnow()
+    db.session.execute(db.insert(NoteDeletion), [
+        {'note_id': note_id, 'user_id': user_id, 'deleted_at': now} for note_id, user_id in notes
+    ])
+    retention = timedelta(days=current_app.config['NOTE_DELETION_RETENTION_DAYS'])
+    NoteDeletion.query.filter(NoteDeletion.deleted_at < now - retention).delete(synchronize_session=False)
+
+@note_bp.route('/notes/changes', methods=['GET'])
+@query_budget(2)
+def get_note_changes():
+    """Notes created or updated, and ids deleted, since a feed cursor.
+
+    Without ``since`` only a starting cursor is returned. Otherwise the
+    response holds up to ``limit`` changed notes (same ``fields`` as the list
+    endpoint, oldest change first), ``deleted`` note ids and the ``cursor``
+    for the next call; ``has_more`` means call again right away. ``reset``
+    means the cursor is older than the tombstone log and the client must
+    reload the full list. Responses may repeat changes near the cursor, so
+    clients apply them idempotently: deletions first, then upserts.
+    """
+    args = request.args
+    now = datetime.utcnow()
+    start_cursor = encode_cursor([(now - CHANGE_FEED_OVERLAP).isoformat(), 0])
+
+    since = args.get('since')
+    if not since:
+        return jsonify({'notes': [], 'deleted': [], 'cursor': start_cursor, 'has_more': False, 'reset': False})
+
+    try:
+        since_time, since_id = decode_cursor(since)
+        since_time = datetime.fromisoformat(since_time)
+        limit = min(max(int(args.get('limit', DEFAULT_CHANGES_LIMIT)), 1), MAX_CHANGES_LIMIT)
+        fields = parse_list_fields(args)
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    retention = timedelta(days=current_app.config['NOTE_DELETION_RETENTION_DAYS'])
+    if since_time < now - retention:
+        return jsonify({'notes': [], 'deleted': [], 'cursor': start_cursor, 'has_more': False, 'reset': True})
+
+    rows = note_list_query(fields).filter(Note.updated_at >= since_time, db.or_(
+        Note.updated_at > since_time,
+        db.and_(Note.updated_at == since_time, Note.id > since_id)
+    )).order_by(Note.updated_at.asc(), Note.id.asc()).limit(limit + 1).all()
+
+    deleted = [row.note_id for row in db.session.query(NoteDeletion.note_id).filter(
+        NoteDeletion.deleted_at >= since_time
+    ).distinct()]
+
+    has_more = len(rows) > limit
+    if has_more:
+        rows = rows[:limit]
+        cursor = encode_cursor([rows[-1].updated_at.isoformat(), rows[-1].id])
+    else:
+        cursor = start_cursor
+
+    return jsonify({
+        'notes': [{field: _serialize_value(getattr(row, field)) for field in fields} for row in rows],
+        'deleted': deleted,
+        'cursor': cursor,
+        'has_more': has_more,
+        'reset': False
+    })
+
 @note_bp.route('/notes/<int:note_id>', methods=['DELETE'])
+@query_budget(6)
 def delete_note(note_id):
     """Delete a specific note"""
     try:
-        note = Note.query.get_or_404(note_id)
+        note = db.session.get(Note, note_id)
+        if note is None:
+            return jsonify({'error': 'Note not found'}), 404
+        invalidate_note_translations(note.id)
+        record_deletions([(note.id, note.user_id)])
         db.session.delete(note)
         db.session.commit()
         return '', 204
@@ -67,18 +429,248 @@ def delete_note(note_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+NOTE_SUMMARY_COLUMNS = tuple(
+    Note.__table__.c[name] for name in ('id', 'title', 'order_index', 'version', 'user_id', 'created_at', 'updated_at')
+)
+
+def note_summary(row):
+    """A note's fields without its content, from a row of NOTE_SUMMARY_COLUMNS"""
+    return {key: _serialize_value(value) for key, value in row._mapping.items()}
+
+def chunked(items, size=BULK_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def bulk_create(items, now):
+    """Insert ``[(index, op)]`` with one executemany, appending them in order.
+
+    order_index values for the whole batch are reserved with one counter
+    update. Returns ``{index: summary}``.
+    """
+    if not items:
+        return {}
+    first_index = NoteOrderCounter.allocate(1, len(items))
+    rows = [
+        {'title': op['title'], 'content': op['content'], 'order_index': first_index + offset,
+         'user_id': 1, 'created_at': now, 'updated_at': now}
+        for offset, (_, op) in enumerate(items)
+    ]
+    # Multi-row INSERT ... RETURNING does not promise row order, so results are
+    # matched back to items by their (unique) order_index
+    created = db.session.execute(db.insert(Note.__table__).returning(*NOTE_SUMMARY_COLUMNS), rows)
+    index_by_order = {row['order_index']: index for (index, _), row in zip(items, rows)}
+    return {index_by_order[row.order_index]: note_summary(row) for row in created}
+
+def bulk_update(items, now):
+    """Apply ``[(index, op)]`` updates with one executemany per set of changed fields"""
+    by_fields = {}
+    for index, op in items:
+        fields = tuple(field for field in PATCHABLE_FIELDS if field in op)
+        by_fields.setdefault(fields, []).append(op)
+
+    for fields, ops in by_fields.items():
+        values = {field: db.bindparam(f'new_{field}') for field in fields}
+        db.session.execute(
+            db.update(Note.__table__).where(Note.__table__.c.id == db.bindparam('note_id'))
+            .values(updated_at=now, version=Note.__table__.c.version + 1, **values),
+            [dict({f'new_{field}': op[field] for field in fields}, note_id=op['id']) for op in ops]
+        )
+
+    # Bulk edits drop the notes' cached translations wholesale
+    note_ids = [op['id'] for _, op in items]
+    for chunk in chunked(note_ids):
+        NoteTranslation.query.filter(NoteTranslation.note_id.in_(chunk)).delete(synchronize_session=False)
+
+def bulk_delete(notes):
+    """Delete ``(note_id, user_id)`` pairs with their shares, translations and
+    tombstones; returns the share tokens whose cached pages must be dropped"""
+    note_ids = [note_id for note_id, _ in notes]
+    tokens = []
+    record_deletions(notes)
+    for chunk in chunked(note_ids):
+        tokens += db.session.scalars(db.select(SharedNote.share_token).where(SharedNote.note_id.in_(chunk))).all()
+        SharedNote.query.filter(SharedNote.note_id.in_(chunk)).delete(synchronize_session=False)
+        NoteTranslation.query.filter(NoteTranslation.note_id.in_(chunk)).delete(synchronize_session=False)
+        Note.query.filter(Note.id.in_(chunk)).delete(synchronize_session=False)
+    return tokens
+
+def validate_bulk_op(op, seen):
+    """Error message for an invalid bulk operation, or None"""
+    if not isinstance(op, dict) or op.get('op') not in BULK_OPS:
+        return f"op must be one of: {', '.join(BULK_OPS)}"
+    try:
+        # Fields an update leaves out are not checked
+        Note.validate_fields(op.get('title', ''), op.get('content', ''))
+    except ValueError as e:
+        return str(e)
+    if op['op'] == 'create':
+        return None if 'title' in op and 'content' in op else 'Title and content are required'
+    note_id = op.get('id')
+    if not isinstance(note_id, int) or isinstance(note_id, bool):
+        return 'id must be an integer'
+    if note_id in seen:
+        return 'Note appears more than once in the batch'
+    seen.add(note_id)
+    if op['op'] == 'update' and not any(field in op for field in PATCHABLE_FIELDS):
+        return 'No fields to update'
+    return None
+
+@note_bp.route('/notes/bulk', methods=['POST'])
+def bulk_notes():
+    """Create, update and delete many notes in one transaction.
+
+    The body is ``{"operations": [...]}`` with items ``{"op": "create",
+    "title", "content"}``, ``{"op": "update", "id", "title"?, "content"?,
+    "version"?}`` or ``{"op": "delete", "id"}``. A ``version`` (the note's
+    ``version`` field) makes an update or delete conditional. Each item gets a result with
+    its own status; invalid, missing (404) and stale (412) items are skipped
+    and the rest are applied together.
+    """
+    try:
+        data = request.json
+        operations = data.get('operations') if isinstance(data, dict) else None
+        if not isinstance(operations, list) or not operations:
+            return jsonify({'error': 'operations array is required'}), 400
+        if len(operations) > MAX_BULK_OPERATIONS:
+            return jsonify({'error': f'At most {MAX_BULK_OPERATIONS} operations per request'}), 400
+
+        target_ids = list({op['id'] for op in operations if isinstance(op, dict) and isinstance(op.get('id'), int)})
+        existing = {}
+        for chunk in chunked(target_ids):
+            rows = db.session.execute(
+                db.select(Note.id, Note.user_id, Note.version).where(Note.id.in_(chunk)).with_for_update()
+            )
+            existing.update({row.id: row for row in rows})
+
+        results = [None] * len(operations)
+        creates, updates, deletes, seen = [], [], [], set()
+        for index, op in enumerate(operations):
+            error = validate_bulk_op(op, seen)
+            if error:
+                results[index] = {'status': 400, 'error': error}
+            elif op['op'] == 'create':
+                creates.append((index, op))
+            elif op.get('id') not in existing:
+                results[index] = {'status': 404, 'id': op.get('id'), 'error': 'Note not found'}
+            elif 'version' in op and str(op['version']) != str(existing[op['id']].version):
+                results[index] = {'status': 412, 'id': op['id'], 'error': 'Note was modified since this version'}
+            elif op['op'] == 'update':
+                updates.append((index, op))
+            else:
+                deletes.append((index, op))
+
+        now = datetime.utcnow()
+        for index, summary in bulk_create(creates, now).items():
+            results[index] = {'status': 201, 'note': summary}
+        if updates:
+            bulk_update(updates, now)
+            for index, op in updates:
+                results[index] = {'status': 200, 'id': op['id'], 'version': existing[op['id']].version + 1,
+                                  'updated_at': now.isoformat()}
+        tokens = []
+        if deletes:
+            tokens = bulk_delete([(op['id'], existing[op['id']].user_id) for _, op in deletes])
+            for index, op in deletes:
+                results[index] = {'status': 204, 'id': op['id']}
+
+        db.session.commit()
+        for token in tokens:
+            invalidate_shared_page(token)
+
+        return jsonify({
+            'results': results,
+            'created': len(creates),
+            'updated': len(updates),
+            'deleted': len(deletes)
+        }), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@note_bp.route('/notes/export', methods=['GET'])
+def export_notes():
+    """Download every note as NDJSON (default), a JSON array or a zip of
+    Markdown files (``?format=ndjson|json|markdown-zip``), streamed as it is read"""
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+    
+    mimetype, extension = EXPORT_FORMATS[export_format]
+    filename = f'notes-{datetime.utcnow():%Y%m%d}.{extension}'
+    return Response(stream_with_context(export_stream(export_format)), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename="{filename}"',
+        'X-Accel-Buffering': 'no'
+    })
+
+@note_bp.route('/notes/import', methods=['POST'])
+def import_notes():
+    """Import notes from an NDJSON or Markdown zip upload, sent as the raw
+    request body or as the ``file`` field of a multipart form.
+
+    The upload is streamed to disk and imported by a background job; poll the
+    returned status URL for progress and per-record errors.
+    """
+    try:
+        upload = request.files.get('file') if request.mimetype == 'multipart/form-data' else None
+        if upload:
+            import_format = detect_format(request.args.get('format'), upload.filename, upload.mimetype)
+            stream = upload.stream
+        else:
+            import_format = detect_format(request.args.get('format'), None, request.mimetype)
+            stream = request.stream
+        
+        path = spool_upload(stream, current_app.config['IMPORT_SPOOL_DIR'])
+        job = enqueue('import_notes', {'path': path, 'format': import_format})
+        db.session.commit()
+        return job_accepted(job)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @note_bp.route('/notes/search', methods=['GET'])
+@query_budget(1)
 def search_notes():
-    """Simple search for existing functionality"""
+    """Search notes by title and content, best matches first"""
     query = request.args.get('q', '')
     if not query:
         return jsonify([])
     
-    notes = Note.query.filter(
-        (Note.title.contains(query)) | (Note.content.contains(query))
-    ).order_by(Note.order_index.asc(), Note.updated_at.desc()).all()
+    matches = full_text_matches(query)
+    if matches is None:
+        notes = Note.query.filter(like_filter(query)).order_by(*NOTE_LIST_ORDER).all()
+        return jsonify([note.to_dict() for note in notes])
+    
+    results = db.session.query(Note, matches.c.snippet).join(
+        matches, Note.id == matches.c.note_id
+    ).order_by(matches.c.rank.asc(), Note.id.asc()).all()
     
-    return jsonify([note.to_dict() for note in notes])
+    return jsonify([dict(note.to_dict(), snippet=highlight(snippet)) for note, snippet in results])
+
+def apply_note_order(ordered_ids):
+    """Set order_index to each id's position in ``ordered_ids``.
+
+    Uses one ``UPDATE ... SET order_index = CASE id ...`` per chunk of ids and
+    skips rows already at the right position, so only the rows whose position
+    changed are written. Returns the number of rows updated.
+    """
+    updated = 0
+    for start in range(0, len(ordered_ids), REORDER_CHUNK_SIZE):
+        positions = {note_id: start + offset for offset, note_id in enumerate(ordered_ids[start:start + REORDER_CHUNK_SIZE])}
+        new_index = db.case(positions, value=Note.id)
+        result = db.session.execute(
+            db.update(Note)
+            .where(Note.id.in_(positions.keys()))
+            .where(db.or_(Note.order_index.is_(None), Note.order_index != new_index))
+            .values(order_index=new_index)
+            .execution_options(synchronize_session=False)
+        )
+        updated += result.rowcount
+    # Indices handed to new notes must stay above the renumbered ones
+    if ordered_ids:
+        NoteOrderCounter.raise_to(len(ordered_ids) - 1)
+    return updated
 
 @note_bp.route('/notes/reorder', methods=['PUT'])
 def reorder_notes():
@@ -88,23 +680,115 @@ def reorder_notes():
         if not data or 'note_ids' not in data:
             return jsonify({'error': 'note_ids array is required'}), 400
         
-        note_ids = data['note_ids']
+        # Drop duplicates while keeping the first occurrence of each id
+        note_ids = list(dict.fromkeys(data['note_ids']))
+        updated = apply_note_order(note_ids)
+        
+        db.session.commit()
+        return jsonify({'message': 'Notes reordered successfully', 'updated': updated}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+def neighbour_indexes(note_id, position):
+    """order_index of the notes just before and after ``position`` in the list
+    without ``note_id`` (None past either end), and the position clamped to
+    that list. Reads at most two rows past the position."""
+    others = db.session.query(Note.order_index).filter(Note.id != note_id).order_by(*NOTE_LIST_ORDER)
+    position = max(position, 0)
+    rows = others.offset(max(position - 1, 0)).limit(2 if position else 1).all()
+    if position and not rows:
+        # Past the end of the list: go after the last note
+        position = others.count()
+        rows = others.offset(position - 1).limit(1).all() if position else []
+    indexes = [row.order_index for row in rows]
+    if not position:
+        indexes.insert(0, None)
+    before, after = (indexes + [None, None])[:2]
+    return position, before, after
+
+def shift_note_index(note_id, current, before, after):
+    """Give the note at order_index ``current`` an index between ``before``
+    and ``after`` (None: no note on that side).
+
+    A free index in between is used when there is one; otherwise the notes
+    between the old and new place are shifted by one. Returns the number of
+    rows written, or None when tied indexes leave no room between the
+    neighbours and the list has to be renumbered.
+    """
+    if current is None or current in (before, after) or (before is not None and after is not None and after <= before):
+        return None
+    if (before is None or before < current) and (after is None or current < after):
+        return 0
+
+    shifted = 0
+    if before is None:
+        new_index = after - 1
+    elif after is None:
+        new_index = before + 1
+        NoteOrderCounter.raise_to(new_index)
+    elif after - before > 1:
+        new_index = (before + after) // 2
+    elif current < before:
+        # Moving down: the notes in (current, before] move up one place
+        shifted = db.session.execute(
+            db.update(Note).where(Note.order_index > current, Note.order_index <= before)
+            .values(order_index=Note.order_index - 1).execution_options(synchronize_session=False)
+        ).rowcount
+        new_index = before
+    else:
+        # Moving up: the notes in [after, current) move down one place
+        shifted = db.session.execute(
+            db.update(Note).where(Note.order_index >= after, Note.order_index < current)
+            .values(order_index=Note.order_index + 1).execution_options(synchronize_session=False)
+        ).rowcount
+        new_index = after
+
+    db.session.execute(
+        db.update(Note).where(Note.id == note_id).values(order_index=new_index)
+        .execution_options(synchronize_session=False)
+    )
+    return shifted + 1
+
+@note_bp.route('/notes/<int:note_id>/move', methods=['PUT'])
+@query_budget(6)
+def move_note(note_id):
+    """Move one note to a new position in the list.
+    
+    Only the moved note and the notes between its old and new place are
+    written; see shift_note_index.
+    """
+    try:
+        data = request.json
+        if not data or 'position' not in data:
+            return jsonify({'error': 'position is required'}), 400
+        
+        try:
+            position = int(data['position'])
+        except (ValueError, TypeError):
+            return jsonify({'error': 'position must be an integer'}), 400
+        
+        current = db.session.query(Note.order_index).filter_by(id=note_id).first()
+        if current is None:
+            return jsonify({'error': 'Note not found'}), 404
         
-        # Update order_index for each note
-        for index, note_id in enumerate(note_ids):
-            note = Note.query.get(note_id)
-            if note:
-                note.order_index = index
+        position, before, after = neighbour_indexes(note_id, position)
+        updated = shift_note_index(note_id, current.order_index, before, after)
+        if updated is None:
+            # Tied (legacy) indexes: renumber the whole list once
+            ordered_ids = [row.id for row in db.session.query(Note.id).filter(Note.id != note_id).order_by(*NOTE_LIST_ORDER)]
+            ordered_ids.insert(position, note_id)
+            updated = apply_note_order(ordered_ids)
         
         db.session.commit()
-        return jsonify({'message': 'Notes reordered successfully'}), 200
+        return jsonify({'message': 'Note moved successfully', 'position': position, 'updated': updated}), 200
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @note_bp.route('/notes/<int:note_id>/translate', methods=['POST'])
 def translate_note(note_id):
-    """Translate a note's content to the specified target language"""
+    """Queue a translation of a note's title and content; poll the returned job for the result"""
     try:
         note = Note.query.get_or_404(note_id)
         
@@ -112,24 +796,76 @@ def translate_note(note_id):
         if not data or 'target_language' not in data:
             return jsonify({'error': 'target_language is required'}), 400
         
-        target_language = data['target_language']
+        job = enqueue('translate_note', {'note_id': note.id, 'target_language': data['target_language']})
+        db.session.commit()
+        return job_accepted(job)
         
-        # Translate both title and content
-        translated_title = translate_text(note.title, target_language) if note.title else ""
-        translated_content = translate_text(note.content, target_language) if note.content else ""
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@note_bp.route('/notes/<int:note_id>/translate/stream', methods=['POST'])
+def translate_note_stream(note_id):
+    """Translate a note, streaming the translation as Server-Sent Events.
+
+    Emits ``token`` events (``{field, text}``) as text arrives and a final
+    ``done`` event with the same payload as POST /notes/<id>/translate.
+    """
+    note = Note.query.get_or_404(note_id)
+    
+    data = request.json
+    if not data or 'target_language' not in data:
+        return jsonify({'error': 'target_language is required'}), 400
+    
+    target_language = data['target_language']
+    original = {'title': note.title, 'content': note.content}
+    
+    def events():
+        try:
+            for kind, *payload in stream_translate_fields(original, target_language, note_id=note_id):
+                if kind == 'token':
+                    field, text = payload
+                    yield sse_event('token', {'field': field, 'text': text})
+                else:
+                    translated, hits = payload
+                    db.session.commit()
+                    yield sse_event('done', {
+                        'original': original,
+                        'translated': translated,
+                        'target_language': target_language,
+                        'cache': {name: 'hit' if hit else 'miss' for name, hit in hits.items()}
+                    })
+        except Exception as e:
+            db.session.rollback()
+            yield sse_event('error', {'error': str(e)})
+    
+    return sse_response(events())
+
+@note_bp.route('/notes/translate-batch', methods=['POST'])
+def translate_notes_batch():
+    """Start translating many notes to one language; poll the returned job for progress"""
+    try:
+        data = request.json
+        if not data or 'target_language' not in data or not data.get('note_ids'):
+            return jsonify({'error': 'note_ids and target_language are required'}), 400
         
-        return jsonify({
-            'original': {
-                'title': note.title,
-                'content': note.content
-            },
-            'translated': {
-                'title': translated_title,
-                'content': translated_content
-            },
-            'target_language': target_language
-        }), 200
+        try:
+            note_ids = list(dict.fromkeys(int(note_id) for note_id in data['note_ids']))
+        except (ValueError, TypeError):
+            return jsonify({'error': 'note_ids must be a list of integers'}), 400
         
+        job = enqueue('translate_batch', {'note_ids': note_ids, 'target_language': data['target_language']})
+        db.session.commit()
+        return job_accepted(job)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@note_bp.route('/notes/translations/stats', methods=['GET'])
+def get_translation_cache_stats():
+    """Get translation cache hit/miss counters"""
+    try:
+        return jsonify(cache_stats()), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -151,20 +887,7 @@ def generate_structured_note():
         llm_response = extract_structured_notes(user_input, language)
         
         # Parse the JSON response from LLM
-        try:
-            structured_data = json.loads(llm_response)
-        except json.JSONDecodeError:
-            # If LLM doesn't return valid JSON, create a basic structure
-            structured_data = {
-                "Title": "Generated Note",
-                "Notes": user_input,
-                "Tags": []
-            }
-        
-        # Ensure all required fields exist
-        title = structured_data.get('Title', 'Generated Note')
-        notes = structured_data.get('Notes', user_input)
-        tags = structured_data.get('Tags', [])
+        title, notes, tags = parse_structured_note(llm_response, user_input)
         
         return jsonify({
             'generated': {
@@ -179,9 +902,48 @@ def generate_structured_note():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@note_bp.route('/notes/generate/stream', methods=['POST'])
+def generate_structured_note_stream():
+    """Generate a structured note, streaming the LLM output as Server-Sent Events.
+
+    Emits ``token`` events (``{text}``) with raw model output as it arrives and
+    a final ``done`` event with the same payload as POST /notes/generate.
+    """
+    data = request.json
+    if not data or 'input' not in data:
+        return jsonify({'error': 'input is required'}), 400
+    
+    user_input = data['input'].strip()
+    if not user_input:
+        return jsonify({'error': 'input cannot be empty'}), 400
+        
+    language = data.get('language', 'English')
+    
+    def events():
+        try:
+            chunks = []
+            for text in extract_structured_notes_stream(user_input, language):
+                chunks.append(text)
+                yield sse_event('token', {'text': text})
+            
+            title, notes, tags = parse_structured_note(''.join(chunks), user_input)
+            yield sse_event('done', {
+                'generated': {
+                    'title': title,
+                    'content': notes,
+                    'tags': tags
+                },
+                'original_input': user_input,
+                'language': language
+            })
+        except Exception as e:
+            yield sse_event('error', {'error': str(e)})
+    
+    return sse_response(events())
+
 @note_bp.route('/notes/generate-and-save', methods=['POST'])
 def generate_and_save_note():
-    """Generate a structured note and save it directly"""
+    """Queue generating and saving a structured note; poll the returned job for the note"""
     try:
         data = request.json
         if not data or 'input' not in data:
@@ -193,52 +955,16 @@ def generate_and_save_note():
             
         language = data.get('language', 'English')
         
-        # Generate structured notes using LLM
-        llm_response = extract_structured_notes(user_input, language)
-        
-        # Parse the JSON response from LLM
-        try:
-            structured_data = json.loads(llm_response)
-        except json.JSONDecodeError:
-            # If LLM doesn't return valid JSON, create a basic structure
-            structured_data = {
-                "Title": "Generated Note",
-                "Notes": user_input,
-                "Tags": []
-            }
-        
-        # Ensure all required fields exist
-        title = structured_data.get('Title', 'Generated Note')
-        notes = structured_data.get('Notes', user_input)
-        tags = structured_data.get('Tags', [])
-        
-        # Add tags to the content if they exist
-        content = notes
-        if tags:
-            content += f"\n\nTags: {', '.join(tags)}"
-        
-        # Create and save the note
-        max_order = db.session.query(db.func.max(Note.order_index)).scalar() or 0
-        note = Note(title=title, content=content, order_index=max_order + 1)
-        db.session.add(note)
+        job = enqueue('generate_and_save_note', {'input': user_input, 'language': language})
         db.session.commit()
-        
-        return jsonify({
-            'note': note.to_dict(),
-            'generated': {
-                'title': title,
-                'content': notes,
-                'tags': tags
-            },
-            'original_input': user_input,
-            'language': language
-        }), 201
+        return job_accepted(job)
         
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @note_bp.route('/notes/templates', methods=['GET'])
+@conditional(templates_validators)
 def get_note_templates():
     """Get list of available note templates"""
     try:
@@ -248,6 +974,7 @@ def get_note_templates():
         return jsonify({'error': str(e)}), 500
 
 @note_bp.route('/notes/templates/<template_id>', methods=['GET'])
+@conditional(templates_validators)
 def get_note_template(template_id):
     """Get a specific note template"""
     try:
@@ -260,6 +987,7 @@ def get_note_template(template_id):
         return jsonify({'error': str(e)}), 500
 
 @note_bp.route('/templates/<template_id>/create', methods=['POST'])
+@query_budget(7)
 def create_note_from_template(template_id):
     """Create a note from a template"""
     try:
@@ -271,13 +999,15 @@ def create_note_from_template(template_id):
         if not template:
             return jsonify({'error': 'Template not found'}), 404
         
-        # Format template
-        note_data = format_template(template, custom_title)
+        # Format template (a custom title fills its {title} placeholder)
+        variables = {'title': custom_title} if custom_title else {}
+        note_data = format_template(template_id, **variables)
         
         # Create note
         note = Note(
             title=note_data['title'],
             content=note_data['content'],
+            order_index=NoteOrderCounter.allocate(1),
             user_id=1  # Default user for now
         )
         
@@ -300,6 +1030,7 @@ def create_note_from_template(template_id):
         return jsonify({'error': str(e)}), 500
 
 @note_bp.route('/advanced-search', methods=['GET'])
+@query_budget(1)
 def advanced_search():
     """Advanced search for notes with filtering and sorting"""
     try:
@@ -311,21 +1042,14 @@ def advanced_search():
         content_only = request.args.get('content_only') == 'true'
         
         # Start with base query
-        notes_query = Note.query.filter(Note.user_id == 1)  # Filter by user
+        notes_query = db.session.query(Note).filter(Note.user_id == 1)  # Filter by user
         
-        # Apply text search
-        if query:
-            if content_only:
-                # Search only in content
-                notes_query = notes_query.filter(Note.content.contains(query))
-            else:
-                # Search in both title and content
-                notes_query = notes_query.filter(
-                    db.or_(
-                        Note.title.contains(query),
-                        Note.content.contains(query)
-                    )
-                )
+        # Apply text search, using the full-text index when there is one
+        matches = full_text_matches(query, content_only) if query else None
+        if matches is not None:
+            notes_query = notes_query.join(matches, Note.id == matches.c.note_id).add_columns(matches.c.snippet)
+        elif query:
+            notes_query = notes_query.filter(like_filter(query, content_only))
         
         # Apply date filters
         if date_from:
@@ -345,7 +1069,9 @@ def advanced_search():
                 pass
         
         # Apply sorting
-        if sort_by == 'updated_asc':
+        if sort_by == 'relevance' and matches is not None:
+            notes_query = notes_query.order_by(matches.c.rank.asc(), Note.id.asc())
+        elif sort_by == 'updated_asc':
             notes_query = notes_query.order_by(Note.updated_at.asc())
         elif sort_by == 'created_desc':
             notes_query = notes_query.order_by(Note.created_at.desc())
@@ -359,16 +1085,19 @@ def advanced_search():
             notes_query = notes_query.order_by(Note.updated_at.desc())
         
         # Execute query
-        notes = notes_query.all()
+        results = notes_query.all()
+        if matches is None:
+            results = [(note, None) for note in results]
         
         return jsonify({
             'notes': [{
                 'id': note.id,
                 'title': note.title,
                 'content': note.content,
+                'snippet': highlight(snippet),
                 'created_at': note.created_at.isoformat(),
                 'updated_at': note.updated_at.isoformat()
-            } for note in notes]
+            } for note, snippet in results]
         })
         
     except Exception as e:
@@ -419,6 +1148,8 @@ def create_share_link(note_id):
         return jsonify({'error': str(e)}), 500
 
 @note_bp.route('/notes/<int:note_id>/shares', methods=['GET'])
+@query_budget(3)
+@conditional(note_shares_validators)
 def get_note_shares(note_id):
     """Get all share links for a note"""
     try:
@@ -437,6 +1168,7 @@ def get_note_shares(note_id):
         return jsonify({'error': str(e)}), 500
 
 @note_bp.route('/shares/<share_token>', methods=['GET'])
+@query_budget(3)
 def get_shared_note(share_token):
     """Access a shared note by token"""
     try:
@@ -470,7 +1202,7 @@ def get_shared_note(share_token):
                 'updated_at': shared_note.note.updated_at.isoformat()
             },
             'share_info': {
-                'view_count': shared_note.view_count,
+                'view_count': shared_note.total_views,
                 'created_at': shared_note.created_at.isoformat()
             }
         })
@@ -479,6 +1211,7 @@ def get_shared_note(share_token):
         return jsonify({'error': str(e)}), 500
 
 @note_bp.route('/shares/<share_token>', methods=['DELETE'])
+@query_budget(3)
 def revoke_share_link(share_token):
     """Revoke a share link"""
     try:
@@ -492,6 +1225,7 @@ def revoke_share_link(share_token):
         
         shared_note.is_active = False
         db.session.commit()
+        invalidate_shared_page(share_token)
         
         return jsonify({'message': 'Share link revoked successfully'})
         
@@ -0,0 +1,231 @@
+"""
+Public HTML page for shared notes (``/shared/<share_token>``).
+
+Templates are compiled once at import. Rendered pages are cached per share
+token together with the note's ``updated_at``, so editing the note renders a
+fresh page and revoking the share drops it. Responses carry a strong ETag,
+``Last-Modified`` and a short public ``Cache-Control`` so browsers and CDNs
+can serve repeat views; password-protected shares are never cached.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from flask import Blueprint, Response, current_app, request
+from jinja2 import Environment
+from sqlalchemy.orm import joinedload
+from src.models.share import SharedNote
+from src.instrumentation import query_budget
+
+shared_bp = Blueprint('shared', __name__)
+
+_env = Environment(autoescape=True)
+
+NOT_FOUND_TEMPLATE = _env.from_string("""
+<html>
+    <head><title>Note Not Found</title></head>
+    <body style="font-family: Arial, sans-serif; max-width: 800px; margin: 50px auto; padding: 20px;">
+        <h1>📄 Note Not Found</h1>
+        <p>The shared note you're looking for doesn't exist.</p>
+    </body>
+</html>
+""")
+
+ACCESS_DENIED_TEMPLATE = _env.from_string("""
+<html>
+    <head><title>Access Denied</title></head>
+    <body style="font-family: Arial, sans-serif; max-width: 800px; margin: 50px auto; padding: 20px;">
+        <h1>🚫 Access Denied</h1>
+        <p>{{ error_msg }}</p>
+    </body>
+</html>
+""")
+
+PASSWORD_TEMPLATE = _env.from_string("""
+<html>
+    <head><title>Password Required</title></head>
+    <body style="font-family: Arial, sans-serif; max-width: 500px; margin: 100px auto; padding: 20px;">
+        <h2>🔒 Password Required</h2>
+        <form method="GET">
+            <div style="margin: 20px 0;">
+                <input type="password" name="password" placeholder="Enter password" required
+                       style="padding: 10px; font-size: 16px; width: 100%; border: 2px solid #ddd; border-radius: 5px;">
+            </div>
+            <button type="submit" style="padding: 10px 20px; font-size: 16px; background: #007bff; color: white; border: none; border-radius: 5px; cursor: pointer;">
+                Access Note
+            </button>
+        </form>
+    </body>
+</html>
+""")
+
+# The page is cached and served by CDNs, so it shows nothing that changes per
+# view (the view count is available from /api/notes/<id>/shares)
+NOTE_TEMPLATE = _env.from_string("""
+<html>
+    <head>
+        <title>{{ title }} - Shared Note</title>
+        <meta name="viewport" content="width=device-width, initial-scale=1">
+        <style>
+            body {
+                font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+                max-width: 800px;
+                margin: 0 auto;
+                padding: 20px;
+                line-height: 1.6;
+                background: #f8f9fa;
+            }
+            .container {
+                background: white;
+                padding: 30px;
+                border-radius: 10px;
+                box-shadow: 0 2px 10px rgba(0,0,0,0.1);
+            }
+            h1 {
+                color: #333;
+                border-bottom: 2px solid #007bff;
+                padding-bottom: 10px;
+            }
+            .content {
+                white-space: pre-wrap;
+                background: #f8f9fa;
+                padding: 20px;
+                border-radius: 5px;
+                border-left: 4px solid #007bff;
+                margin: 20px 0;
+            }
+            .meta {
+                font-size: 14px;
+                color: #666;
+                margin-top: 30px;
+                padding-top: 20px;
+                border-top: 1px solid #eee;
+            }
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <h1>📄 {{ title }}</h1>
+            <div class="content">{{ content }}</div>
+            <div class="meta">
+                Shared on {{ created_date }}
+            </div>
+        </div>
+    </body>
+</html>
+""")
+
+ERROR_TEMPLATE = _env.from_string("""
+<html>
+    <head><title>Error</title></head>
+    <body style="font-family: Arial, sans-serif; max-width: 800px; margin: 50px auto; padding: 20px;">
+        <h1>❌ Error</h1>
+        <p>An error occurred: {{ error }}</p>
+    </body>
+</html>
+""")
+
+class RenderedPageCache:
+    """LRU cache of rendered share pages: token -> (updated_at, etag, html)"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, token, updated_at):
+        with self.lock:
+            entry = self.entries.get(token)
+            if entry is None or entry[0] != updated_at:
+                return None
+            self.entries.move_to_end(token)
+            return entry
+
+    def put(self, token, updated_at, html):
+        etag = hashlib.sha256(html.encode('utf-8')).hexdigest()[:32]
+        entry = (updated_at, etag, html)
+        with self.lock:
+            self.entries[token] = entry
+            self.entries.move_to_end(token)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return entry
+
+    def discard(self, token):
+        with self.lock:
+            self.entries.pop(token, None)
+
+def _page_cache():
+    cache = current_app.extensions.get('shared_page_cache')
+    if cache is None:
+        cache = current_app.extensions.setdefault(
+            'shared_page_cache', RenderedPageCache(current_app.config['SHARED_PAGE_CACHE_SIZE'])
+        )
+    return cache
+
+def invalidate_shared_page(share_token):
+    """Drop the cached page of a share link (e.g. when it is revoked)"""
+    _page_cache().discard(share_token)
+
+def _html(body, status=200):
+    return Response(body, status=status, mimetype='text/html')
+
+def _max_age(shared_note):
+    """Public cache lifetime, never reaching past the link's expiry"""
+    max_age = current_app.config['SHARED_PAGE_MAX_AGE']
+    if shared_note.expires_at:
+        remaining = int((shared_note.expires_at - datetime.utcnow()).total_seconds())
+        max_age = max(0, min(max_age, remaining))
+    return max_age
+
+@shared_bp.route('/shared/<share_token>')
+@query_budget(2)
+def shared_note_view(share_token):
+    """Render a shared note view (HTML page)"""
+    try:
+        shared_note = SharedNote.query.options(joinedload(SharedNote.note)).filter_by(
+            share_token=share_token
+        ).first()
+        if not shared_note:
+            return _html(NOT_FOUND_TEMPLATE.render(), 404)
+
+        if not shared_note.is_accessible():
+            invalidate_shared_page(share_token)
+            error_msg = "This shared link has expired" if shared_note.is_expired() else "This shared link is no longer active"
+            return _html(ACCESS_DENIED_TEMPLATE.render(error_msg=error_msg), 403)
+
+        note = shared_note.note
+        page = {
+            'title': note.title,
+            'content': note.content,
+            'created_date': shared_note.created_at.strftime('%B %d, %Y')
+        }
+
+        # Password-protected pages are rendered per request and kept out of shared caches
+        if shared_note.password_hash:
+            password = request.args.get('password')
+            if not password or not shared_note.check_password(password):
+                response = _html(PASSWORD_TEMPLATE.render(), 401)
+            else:
+                shared_note.increment_view_count()
+                response = _html(NOTE_TEMPLATE.render(**page))
+            response.headers['Cache-Control'] = 'private, no-store'
+            return response
+
+        shared_note.increment_view_count()
+
+        cache = _page_cache()
+        entry = cache.get(share_token, note.updated_at)
+        if entry is None:
+            entry = cache.put(share_token, note.updated_at, NOTE_TEMPLATE.render(**page))
+        _, etag, html = entry
+
+        response = _html(html)
+        response.set_etag(etag)
+        response.last_modified = note.updated_at
+        response.headers['Cache-Control'] = f'public, max-age={_max_age(shared_note)}'
+        return response.make_conditional(request)
+
+    except Exception as e:
+        return _html(ERROR_TEMPLATE.render(error=str(e)), 500)
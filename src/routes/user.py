@@ -1,9 +1,19 @@
 from flask import Blueprint, jsonify, request
 from src.models.user import User, db
+from src.http_cache import conditional
 
 user_bp = Blueprint('user', __name__)
 
+def users_validators():
+    count, latest = db.session.query(db.func.count(User.id), db.func.max(User.updated_at)).one()
+    return (count, latest), None
+
+def user_validators(user_id):
+    updated_at = db.session.query(User.updated_at).filter_by(id=user_id).scalar()
+    return (user_id, updated_at), updated_at
+
 @user_bp.route('/users', methods=['GET'])
+@conditional(users_validators)
 def get_users():
     users = User.query.all()
     return jsonify([user.to_dict() for user in users])
@@ -18,6 +28,7 @@ def create_user():
     return jsonify(user.to_dict()), 201
 
 @user_bp.route('/users/<int:user_id>', methods=['GET'])
+@conditional(user_validators)
 def get_user(user_id):
     user = User.query.get_or_404(user_id)
     return jsonify(user.to_dict())
@@ -0,0 +1,108 @@
+"""
+Full-text search over notes.
+
+On SQLite an FTS5 external-content table (``notes_fts``) is kept in sync with
+``notes`` by triggers; on PostgreSQL a ``tsvector`` column with a GIN index is
+used; both are created by migration 0003 (src/migrations). Both backends rank
+results (bm25 / ts_rank), match word prefixes and return highlighted
+snippets. When neither is available the
+search falls back to the original ``LIKE`` matching.
+"""
+
+import html
+import re
+from flask import current_app
+from sqlalchemy import text
+from src.models.note import Note, db
+
+# Snippet markers are control characters so they cannot collide with note text;
+# they are swapped for HTML only after the snippet has been escaped.
+MARK_START = '\x02'
+MARK_END = '\x03'
+HIGHLIGHT_START = '<span class="highlight">'
+HIGHLIGHT_END = '</span>'
+SNIPPET_TOKENS = 24
+
+_TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+def detect_search_backend(app):
+    """Find the full-text index created by the migrations. Run after
+    migrating, or on the first search in processes that did not migrate."""
+    engine = db.engine
+    backend = None
+    try:
+        with engine.connect() as conn:
+            if engine.dialect.name == 'sqlite':
+                if conn.execute(text(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'notes_fts'"
+                )).first():
+                    backend = 'sqlite'
+            elif engine.dialect.name == 'postgresql':
+                # Only once the (concurrently built) GIN index is usable
+                if conn.execute(text(
+                    "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                    "WHERE c.relname = 'ix_notes_search_vector' AND i.indisvalid"
+                )).first():
+                    backend = 'postgresql'
+    except Exception as e:
+        app.logger.warning(f"Could not detect the full-text index: {e}")
+    app.config['FULL_TEXT_SEARCH'] = backend
+    return backend
+
+def search_terms(query):
+    """Split a user query into the word terms used for matching"""
+    return _TERM_RE.findall(query or '')
+
+def like_filter(query, content_only=False):
+    """The original substring filter, used when no full-text index exists"""
+    if content_only:
+        return Note.content.contains(query)
+    return db.or_(Note.title.contains(query), Note.content.contains(query))
+
+def full_text_matches(query, content_only=False):
+    """Return a subquery of ``(note_id, rank, snippet)`` for notes matching
+    every term of ``query`` as a prefix, or None when full-text search is not
+    available. Lower rank means a better match on every backend.
+    """
+    if 'FULL_TEXT_SEARCH' not in current_app.config:
+        detect_search_backend(current_app)
+    backend = current_app.config['FULL_TEXT_SEARCH']
+    terms = search_terms(query)
+    if not backend or not terms:
+        return None
+
+    if backend == 'sqlite':
+        match = ' '.join(f'"{term}"*' for term in terms)
+        if content_only:
+            match = f'content : ({match})'
+        statement = text("""
+            SELECT rowid AS note_id,
+                   bm25(notes_fts, 10.0, 1.0) AS rank,
+                   snippet(notes_fts, 1, :mark_start, :mark_end, '…', :tokens) AS snippet
+            FROM notes_fts
+            WHERE notes_fts MATCH :match
+        """)
+    else:
+        weight = 'B' if content_only else ''
+        match = ' & '.join(f'{term}:*{weight}' for term in terms)
+        statement = text("""
+            SELECT notes.id AS note_id,
+                   -ts_rank(notes.search_vector, q) AS rank,
+                   ts_headline('simple', notes.content, q,
+                               'StartSel=' || :mark_start || ', StopSel=' || :mark_end ||
+                               ', MaxWords=' || :tokens || ', MinWords=8') AS snippet
+            FROM notes, to_tsquery('simple', :match) AS q
+            WHERE notes.search_vector @@ q
+        """)
+
+    statement = statement.bindparams(
+        match=match, mark_start=MARK_START, mark_end=MARK_END, tokens=SNIPPET_TOKENS
+    ).columns(note_id=db.Integer, rank=db.Float, snippet=db.Text)
+    return statement.subquery('matches')
+
+def highlight(snippet):
+    """Escape a snippet and turn the match markers into highlight spans"""
+    if snippet is None:
+        return None
+    escaped = html.escape(snippet)
+    return escaped.replace(MARK_START, HIGHLIGHT_START).replace(MARK_END, HIGHLIGHT_END)
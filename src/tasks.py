@@ -0,0 +1,129 @@
+"""
+Background job handlers for LLM work and note imports.
+
+Each handler receives the JSON payload given to ``enqueue`` and returns the
+JSON result that ``GET /api/jobs/<id>`` reports once the job has succeeded.
+"""
+
+import json
+import os
+from flask import current_app
+from src.jobs import job_handler, report_progress, hold_attempt, recorded_result, JobFailed
+from src.llm import extract_structured_notes
+from src.models.note import Note, db
+from src.models.order_counter import NoteOrderCounter
+from src.translation import translate_fields, translate_notes
+from src.importer import import_file
+
+def parse_structured_note(llm_response, user_input):
+    """Read title, notes and tags from the LLM's JSON output"""
+    try:
+        structured_data = json.loads(llm_response)
+    except json.JSONDecodeError:
+        # If LLM doesn't return valid JSON, create a basic structure
+        structured_data = {
+            "Title": "Generated Note",
+            "Notes": user_input,
+            "Tags": []
+        }
+
+    # Ensure all required fields exist
+    title = structured_data.get('Title', 'Generated Note')
+    notes = structured_data.get('Notes', user_input)
+    tags = structured_data.get('Tags', [])
+    return title, notes, tags
+
+@job_handler('translate_note', timeout=180)
+def translate_note(payload, job_id):
+    """Translate a note's title and content (same result as the old synchronous endpoint)"""
+    note = db.session.get(Note, payload['note_id'])
+    if note is None:
+        raise JobFailed(f"Note {payload['note_id']} no longer exists")
+
+    target_language = payload['target_language']
+    original = {'title': note.title, 'content': note.content}
+    translated, hits = translate_fields(original, target_language, note_id=note.id)
+    db.session.commit()
+
+    return {
+        'note_id': note.id,
+        'original': original,
+        'translated': translated,
+        'target_language': target_language,
+        'cache': {name: 'hit' if hit else 'miss' for name, hit in hits.items()}
+    }
+
+@job_handler('generate_and_save_note', timeout=120)
+def generate_and_save_note(payload, job_id):
+    """Generate a structured note with the LLM and save it.
+
+    The note is committed together with the job's result, so a retry of an
+    attempt that saved it returns that note instead of creating another.
+    """
+    saved = recorded_result(job_id)
+    if saved:
+        return saved
+
+    user_input = payload['input']
+    language = payload['language']
+
+    llm_response = extract_structured_notes(user_input, language)
+    title, notes, tags = parse_structured_note(llm_response, user_input)
+
+    # Add tags to the content if they exist
+    content = notes
+    if tags:
+        content += f"\n\nTags: {', '.join(tags)}"
+
+    note = Note(title=title, content=content, order_index=NoteOrderCounter.allocate(1), user_id=1)
+    db.session.add(note)
+    db.session.flush()
+
+    result = {
+        'note': note.to_dict(),
+        'generated': {
+            'title': title,
+            'content': notes,
+            'tags': tags
+        },
+        'original_input': user_input,
+        'language': language
+    }
+    hold_attempt(job_id, result=json.dumps(result))
+    db.session.commit()
+    return result
+
+# One batch at a time: a batch already keeps LLM_MAX_CONCURRENCY requests in
+# flight, so a second one would only hold a worker waiting for the same slots
+@job_handler('translate_batch', timeout=900, concurrency=1)
+def translate_batch(payload, job_id):
+    """Translate many notes to one language, reporting progress per LLM request"""
+    note_ids = payload['note_ids']
+    notes = Note.query.filter(Note.id.in_(note_ids)).all()
+    found = {note.id for note in notes}
+
+    results = translate_notes(
+        notes, payload['target_language'],
+        progress=lambda completed, total: report_progress(job_id, completed, total)
+    )
+    db.session.commit()
+
+    return {
+        'target_language': payload['target_language'],
+        'results': {str(note_id): result for note_id, result in results.items()},
+        'missing': [note_id for note_id in note_ids if note_id not in found]
+    }
+
+# Not retried: batches committed before a failure would be imported twice.
+# One at a time, as each batch holds the database's write lock (SQLite).
+@job_handler('import_notes', max_attempts=1, timeout=3600, concurrency=1)
+def import_notes(payload, job_id):
+    """Import a spooled NDJSON / Markdown zip upload, then delete it"""
+    try:
+        return import_file(
+            payload['path'], payload['format'], current_app.config['IMPORT_BATCH_SIZE'],
+            progress=lambda completed, total: report_progress(job_id, completed, total),
+            before_commit=lambda: hold_attempt(job_id)
+        )
+    finally:
+        os.remove(payload['path'])
@@ -0,0 +1,396 @@
+"""
+Translation service with a persistent cache.
+
+Translations are stored in ``note_translations`` keyed by
+``(sha256(text), target_language, model)``, so re-translating unchanged text
+is a single indexed lookup instead of an LLM round trip. Entries expire after
+``TRANSLATION_CACHE_TTL`` seconds and the least recently used ones are evicted
+once the table grows past ``TRANSLATION_CACHE_MAX_ENTRIES``; eviction runs at
+most every ``TRANSLATION_CACHE_EVICT_INTERVAL`` seconds per process.
+
+Notes are translated in chunks of consecutive paragraphs and heading
+sections, up to ``TRANSLATION_CHUNK_TOKENS`` tokens, with chunk boundaries
+picked by content. Chunks are cached on their own and uncached ones are
+translated concurrently.
+"""
+
+import hashlib
+import queue
+import re
+import threading
+import time
+from concurrent.futures import as_completed
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from src import llm
+from src.llm import model as llm_model
+from src.models.note import Note, db
+from src.models.translation import NoteTranslation
+
+# Chunks up to this size may share one LLM request in batch translation
+PACKABLE_TOKENS = 200
+
+# Hashes per IN (...) clause when looking up cached chunks
+LOOKUP_CHUNK_SIZE = 500
+
+_HEADING_RE = re.compile(r'^#{1,6}\s')
+_FENCE_RE = re.compile(r'^\s*(```|~~~)')
+
+_stats = {'hits': 0, 'misses': 0}
+_stats_lock = threading.Lock()
+
+def text_hash(text):
+    """SHA-256 hex digest of the source text"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def _expiry_cutoff():
+    ttl = current_app.config.get('TRANSLATION_CACHE_TTL')
+    return datetime.utcnow() - timedelta(seconds=ttl) if ttl else None
+
+def get_cached_translations(texts, target_language, model=None):
+    """Cached translations of ``texts`` as ``{text: translation}``; texts
+    without a live entry are left out. Expired entries are deleted."""
+    by_hash = {text_hash(text): text for text in texts}
+    hashes = list(by_hash)
+    cutoff = _expiry_cutoff()
+    now = datetime.utcnow()
+    found = {}
+    for start in range(0, len(hashes), LOOKUP_CHUNK_SIZE):
+        entries = NoteTranslation.query.filter(
+            NoteTranslation.text_hash.in_(hashes[start:start + LOOKUP_CHUNK_SIZE]),
+            NoteTranslation.target_language == target_language,
+            NoteTranslation.model == (model or llm_model)
+        )
+        for entry in entries:
+            if cutoff and entry.created_at < cutoff:
+                db.session.delete(entry)
+                continue
+            entry.hit_count += 1
+            entry.last_used_at = now
+            found[by_hash[entry.text_hash]] = entry.translated_text
+    return found
+
+def get_cached_translation(text, target_language, model=None):
+    """Return the cached translation of ``text`` or None on a miss"""
+    return get_cached_translations([text], target_language, model).get(text)
+
+def store_translation(text, target_language, translated_text, note_id=None, model=None):
+    """Cache a translation, evicting old entries when eviction is due"""
+    try:
+        with db.session.begin_nested():
+            db.session.add(NoteTranslation(
+                note_id=note_id,
+                text_hash=text_hash(text),
+                target_language=target_language,
+                model=model or llm_model,
+                translated_text=translated_text
+            ))
+    except IntegrityError:
+        pass  # Another request cached the same text first
+    if _eviction_due():
+        evict_translations()
+
+def _eviction_due():
+    """True at most once per TRANSLATION_CACHE_EVICT_INTERVAL in this app"""
+    interval = current_app.config.get('TRANSLATION_CACHE_EVICT_INTERVAL', 0)
+    state = current_app.extensions.setdefault('translation_eviction', {'next': 0.0})
+    now = time.monotonic()
+    with _stats_lock:
+        if now < state['next']:
+            return False
+        state['next'] = now + interval
+    return True
+
+def evict_translations():
+    """Drop expired entries (a range delete on the created_at index) and trim
+    the cache to its configured size"""
+    cutoff = _expiry_cutoff()
+    if cutoff:
+        NoteTranslation.query.filter(NoteTranslation.created_at < cutoff).delete(synchronize_session=False)
+    
+    max_entries = current_app.config.get('TRANSLATION_CACHE_MAX_ENTRIES')
+    if max_entries:
+        overflow = NoteTranslation.query.count() - max_entries
+        if overflow > 0:
+            oldest = db.session.query(NoteTranslation.id).order_by(NoteTranslation.last_used_at.asc()).limit(overflow)
+            NoteTranslation.query.filter(NoteTranslation.id.in_(oldest.scalar_subquery())).delete(synchronize_session=False)
+
+def invalidate_note_translations(note_id, fields=None):
+    """Forget cached translations of text a note no longer contains.
+
+    Given the note's new ``fields``, chunks that are still present keep their
+    entries; without them every entry made for the note is dropped.
+    """
+    query = NoteTranslation.query.filter_by(note_id=note_id)
+    if fields:
+        kept = {text_hash(core) for pieces in _plan(fields).values() for _, core, _ in pieces if core}
+        query = query.filter(NoteTranslation.text_hash.notin_(kept))
+    query.delete(synchronize_session=False)
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token)"""
+    return max(1, len(text) // 4)
+
+def split_blocks(text):
+    """Split markdown into blocks at blank lines and before headings.
+
+    Fenced code blocks are never split, and ``''.join(blocks) == text``.
+    """
+    blocks, current = [], []
+    in_fence = previous_blank = False
+    for line in text.splitlines(keepends=True):
+        blank = not line.strip()
+        if current and not in_fence and not blank and (previous_blank or _HEADING_RE.match(line)):
+            blocks.append(''.join(current))
+            current = []
+        current.append(line)
+        if _FENCE_RE.match(line):
+            in_fence = not in_fence
+        previous_blank = blank
+    if current:
+        blocks.append(''.join(current))
+    return blocks
+
+def _split_oversized(block, token_budget):
+    """Break a block larger than the budget into runs of whole lines of at
+    most the budget; lines longer than that are cut on character boundaries"""
+    if estimate_tokens(block) <= token_budget:
+        return [block]
+    max_chars = token_budget * 4
+    pieces, current, size = [], [], 0
+    for line in block.splitlines(keepends=True):
+        for part in (line[i:i + max_chars] for i in range(0, len(line), max_chars)):
+            cost = estimate_tokens(part)
+            if current and size + cost > token_budget:
+                pieces.append(''.join(current))
+                current, size = [], 0
+            current.append(part)
+            size += cost
+    if current:
+        pieces.append(''.join(current))
+    return pieces
+
+# A chunk ends after a block whose hash is divisible by this, so chunks hold
+# this many blocks on average (fewer when they reach the token budget)
+CHUNK_BOUNDARY_EVERY = 4
+
+def _ends_chunk(block):
+    return int(text_hash(block.strip())[:8], 16) % CHUNK_BOUNDARY_EVERY == 0
+
+def split_into_chunks(text, token_budget=None):
+    """Pack consecutive markdown blocks into chunks of up to ``token_budget``
+    tokens; blocks over the budget are split further.
+
+    A chunk ends after a block whose own hash marks it as a boundary, or
+    before a block that would take it over the budget. As boundaries follow
+    the text rather than positions, editing a paragraph only changes the
+    chunks from the one holding it to the next boundary block; every other
+    chunk - and its cache entry - stays the same.
+    """
+    token_budget = token_budget or current_app.config.get('TRANSLATION_CHUNK_TOKENS', 1500)
+    chunks, current = [], ''
+    for block in split_blocks(text):
+        for piece in _split_oversized(block, token_budget):
+            if current and estimate_tokens(current + piece) > token_budget:
+                chunks.append(current)
+                current = ''
+            current += piece
+            if _ends_chunk(piece):
+                chunks.append(current)
+                current = ''
+    if current:
+        chunks.append(current)
+    return chunks
+
+def _plan(fields):
+    """Chunk every field into ``(leading whitespace, text, trailing whitespace)``
+    pieces; only the stripped text is translated, so the original spacing
+    between paragraphs and headings survives reassembly."""
+    plan = {}
+    for name, text in fields.items():
+        pieces = []
+        for chunk in split_into_chunks(text or ''):
+            core = chunk.strip()
+            lead = chunk[:len(chunk) - len(chunk.lstrip())]
+            pieces.append((lead, core, chunk[len(lead) + len(core):]))
+        plan[name] = pieces
+    return plan
+
+def _lookup(plan, target_language):
+    """Resolve chunks from the cache. Returns ``(translated, misses, hits)``:
+    cached chunk translations, the distinct chunks still to translate, and
+    per-field flags that are True when every chunk was cached."""
+    cores = dict.fromkeys(core for pieces in plan.values() for _, core, _ in pieces if core)
+    translated = get_cached_translations(cores, target_language)
+    misses = [core for core in cores if core not in translated]
+    with _stats_lock:
+        _stats['hits'] += len(translated)
+        _stats['misses'] += len(misses)
+    
+    hits = {name: all(not core or core in translated for _, core, _ in pieces) for name, pieces in plan.items()}
+    translated[''] = ''
+    return translated, misses, hits
+
+def _assemble(pieces, translated):
+    return ''.join(lead + translated[core].strip() + trail for lead, core, trail in pieces)
+
+def translate_fields(fields, target_language, note_id=None):
+    """Translate a dict of named texts through the cache.
+
+    Each text is split into chunks of paragraphs and headings (see
+    split_into_chunks); each chunk is cached on its own, so editing one
+    paragraph only re-translates the chunks around it. Cache lookups happen in the
+    calling thread (they need its database session) and misses are sent to
+    the LLM concurrently. Returns ``(translations, hits)`` dicts keyed like
+    ``fields``.
+    """
+    plan = _plan(fields)
+    translated, misses, hits = _lookup(plan, target_language)
+    
+    for core, result in zip(misses, llm.translate_texts(misses, target_language)):
+        translated[core] = result
+        store_translation(core, target_language, result, note_id=note_id)
+    
+    return {name: _assemble(pieces, translated) for name, pieces in plan.items()}, hits
+
+def stream_translate_fields(fields, target_language, note_id=None):
+    """Streaming counterpart of translate_fields.
+
+    Yields ``('token', name, text)`` pieces that concatenate to each field's
+    translation in order, then a final ``('done', translations, hits)``.
+    Uncached chunks stream concurrently from the LLM worker pool; output for a
+    later chunk is held back until the chunks before it have been emitted.
+    """
+    plan = _plan(fields)
+    translated, misses, hits = _lookup(plan, target_language)
+    partial = {core: '' for core in misses}
+    
+    deltas = queue.Queue()
+    
+    def produce(core):
+        try:
+            for delta in llm.translate_text_stream(core, target_language):
+                deltas.put((core, delta, None))
+            deltas.put((core, None, None))
+        except Exception as e:
+            deltas.put((core, None, e))
+    
+    for core in misses:
+        llm.get_executor().submit(produce, core)
+    
+    # Per field: index of the chunk being emitted, whether its leading
+    # whitespace is out, and how much of its text has been emitted
+    position = {name: [0, False, 0] for name in plan}
+    
+    def flush(name):
+        state, pieces = position[name], plan[name]
+        while state[0] < len(pieces):
+            lead, core, trail = pieces[state[0]]
+            done = core in translated
+            text = (translated[core] if done else partial[core]).strip()
+            if not state[1]:
+                state[1] = True
+                if lead:
+                    yield ('token', name, lead)
+            if len(text) > state[2]:
+                yield ('token', name, text[state[2]:])
+                state[2] = len(text)
+            if not done:
+                return
+            if trail:
+                yield ('token', name, trail)
+            state[:] = [state[0] + 1, False, 0]
+    
+    for name in plan:
+        yield from flush(name)
+    
+    remaining = len(misses)
+    while remaining:
+        core, delta, error = deltas.get()
+        if error is not None:
+            raise error
+        if delta is None:
+            remaining -= 1
+            translated[core] = partial[core]
+            store_translation(core, target_language, partial[core], note_id=note_id)
+        else:
+            partial[core] += delta
+        for name in plan:
+            yield from flush(name)
+    
+    yield ('done', {name: _assemble(pieces, translated) for name, pieces in plan.items()}, hits)
+
+def _translate_group(texts, target_language):
+    """Translate a packed group in one request, falling back to one request per text"""
+    if len(texts) > 1:
+        try:
+            return llm.translate_text_list(texts, target_language)
+        except ValueError:
+            pass
+    return [llm.translate_text(text, target_language) for text in texts]
+
+def _pack(texts, token_budget):
+    """Group short texts into requests of at most ``token_budget`` tokens; long
+    texts get a request of their own"""
+    groups, current, size = [], [], 0
+    for text in texts:
+        cost = estimate_tokens(text)
+        if cost > PACKABLE_TOKENS:
+            groups.append([text])
+            continue
+        if current and size + cost > token_budget:
+            groups.append(current)
+            current, size = [], 0
+        current.append(text)
+        size += cost
+    if current:
+        groups.append(current)
+    return groups
+
+def translate_notes(notes, target_language, progress=None):
+    """Translate the title and content of many notes at once.
+
+    Identical chunks across notes are translated once, cached chunks are
+    reused, short chunks are packed several to an LLM request and the
+    requests run on the bounded LLM pool. ``progress(completed, total)`` is
+    called as requests finish. Returns ``{note_id: {'title', 'content'}}``.
+    """
+    plans = {note.id: _plan({'title': note.title, 'content': note.content}) for note in notes}
+    combined = {(note_id, name): pieces for note_id, plan in plans.items() for name, pieces in plan.items()}
+    translated, misses, _ = _lookup(combined, target_language)
+    
+    owners = {}
+    for (note_id, _), pieces in combined.items():
+        for _, core, _ in pieces:
+            owners.setdefault(core, note_id)
+    
+    groups = _pack(misses, current_app.config.get('TRANSLATION_CHUNK_TOKENS', 1500))
+    if progress:
+        progress(0, len(groups))
+    
+    futures = {llm.get_executor().submit(_translate_group, group, target_language): group for group in groups}
+    for completed, future in enumerate(as_completed(futures), 1):
+        for core, result in zip(futures[future], future.result()):
+            translated[core] = result
+            store_translation(core, target_language, result, note_id=owners[core])
+        if progress:
+            progress(completed, len(groups))
+    
+    return {
+        note_id: {name: _assemble(pieces, translated) for name, pieces in plan.items()}
+        for note_id, plan in plans.items()
+    }
+
+def cache_stats():
+    """Hit/miss counters for this process plus the persisted cache size"""
+    with _stats_lock:
+        hits, misses = _stats['hits'], _stats['misses']
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total, 4) if total else None,
+        'entries': NoteTranslation.query.count(),
+        'stored_hits': db.session.query(db.func.coalesce(db.func.sum(NoteTranslation.hit_count), 0)).scalar()
+    }
@@ -0,0 +1,107 @@
+"""
+Buffered view counting for shared notes.
+
+Views are added to an in-memory counter and written in batches with one
+atomic ``UPDATE shared_notes SET view_count = view_count + n`` per share, at
+most every ``VIEW_COUNT_FLUSH_INTERVAL`` seconds and at process exit. A view
+arriving before the interval is up schedules a background flush for when it
+is, so the last views before a quiet period are not held back until the next
+one. Busy share links therefore cost one small write per interval instead of
+a transaction per view, and concurrent views can never lose increments. With
+an interval of 0 every view is written immediately (still atomically), which
+is the default on serverless hosts, where a frozen instance runs no timers.
+"""
+
+import atexit
+import threading
+import time
+from collections import Counter
+from flask import current_app, has_app_context
+from sqlalchemy import update
+from src.models.note import db
+from src.models.share import SharedNote
+
+class ViewCounter:
+    """Per-app buffer of view counts that have not been written yet"""
+
+    def __init__(self, app):
+        self.app = app
+        self.interval = app.config.get('VIEW_COUNT_FLUSH_INTERVAL', 5)
+        self.pending = Counter()
+        self.lock = threading.Lock()
+        self.last_flush = time.monotonic()
+        self.timer = None
+
+    def record(self, share_id):
+        """Buffer one view; returns how many of this share's views were
+        written to the database if this call triggered a flush"""
+        with self.lock:
+            self.pending[share_id] += 1
+            wait = self.last_flush + self.interval - time.monotonic()
+            if wait > 0 and self.timer is None:
+                self.timer = threading.Timer(wait, self.flush_in_background)
+                self.timer.daemon = True
+                self.timer.start()
+        if wait > 0:
+            return 0
+        return self.flush().get(share_id, 0)
+
+    def pending_for(self, share_id):
+        with self.lock:
+            return self.pending.get(share_id, 0)
+
+    def flush(self):
+        """Write buffered counts; returns ``{share_id: views}`` written"""
+        with self.lock:
+            batch, self.pending = self.pending, Counter()
+            self.last_flush = time.monotonic()
+        if not batch:
+            return batch
+
+        try:
+            # A separate connection, so the caller's session is not committed
+            with db.engine.begin() as conn:
+                for share_id, views in batch.items():
+                    conn.execute(
+                        update(SharedNote)
+                        .where(SharedNote.id == share_id)
+                        .values(view_count=SharedNote.view_count + views)
+                    )
+        except Exception:
+            # Put the views back so the next flush retries them
+            with self.lock:
+                self.pending.update(batch)
+            raise
+        return batch
+
+    def flush_in_background(self):
+        with self.lock:
+            self.timer = None
+        self.flush_at_exit()
+
+    def flush_at_exit(self):
+        try:
+            with self.app.app_context():
+                self.flush()
+        except Exception as e:
+            self.app.logger.warning(f"Could not write buffered view counts: {e}")
+
+def init_view_counts(app):
+    counter = ViewCounter(app)
+    app.extensions['view_counts'] = counter
+    atexit.register(counter.flush_at_exit)
+    return counter
+
+def record_view(share_id):
+    """Count one view of a share link; see ViewCounter.record"""
+    return current_app.extensions['view_counts'].record(share_id)
+
+def pending_views(share_id):
+    """Views of a share link not yet written to the database"""
+    if not has_app_context() or 'view_counts' not in current_app.extensions:
+        return 0
+    return current_app.extensions['view_counts'].pending_for(share_id)
+
+def flush_view_counts():
+    """Write all buffered view counts now"""
+    return current_app.extensions['view_counts'].flush()
@@ -0,0 +1,49 @@
+"""
+Run background job workers in their own process.
+
+Usage:
+    python -m src.worker              # JOB_WORKERS threads (default 2)
+    python -m src.worker --threads 4
+    python -m src.worker --once       # run the queued jobs, then exit (for cron)
+
+Use this when the web process runs with JOB_WORKERS=0, e.g. on serverless
+hosts (the default on Vercel) where threads do not outlive a request.
+"""
+
+import argparse
+import os
+import signal
+import socket
+import threading
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('JOB_WORKERS') or 0) or 2)
+    parser.add_argument('--once', action='store_true', help='Run the runnable jobs in this thread, then exit')
+    args = parser.parse_args()
+
+    # The web app must not start its own workers in this process
+    os.environ['JOB_WORKERS'] = '0'
+    from src.main import app
+    from src.jobs import WorkerPool, reap_expired, run_pending
+
+    if args.once:
+        with app.app_context():
+            reap_expired()
+            count = run_pending(f'{socket.gethostname()}:{os.getpid()}:once')
+        print(f"👷 Ran {count} jobs")
+        return
+
+    pool = WorkerPool(app, args.threads, app.config.get('JOB_POLL_INTERVAL', 1.0)).start()
+    print(f"👷 Job worker running with {args.threads} threads (Ctrl+C to stop)")
+
+    stopped = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopped.set())
+    try:
+        stopped.wait()
+    except KeyboardInterrupt:
+        pass
+    pool.stop()
+
+if __name__ == '__main__':
+    main()
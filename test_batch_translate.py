@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test POST /api/notes/translate-batch through its background job: cached
+chunks are reused, text shared by several notes is translated once, short
+chunks are packed into one LLM request, missing notes are reported, and a
+malformed packed reply falls back to one request per text. The LLM is a
+fake client.
+"""
+import json
+import os
+import threading
+from types import SimpleNamespace
+
+os.environ.setdefault('GITHUB_TOKEN', 'test-token')
+os.environ.setdefault('FLASK_CONFIG', 'testing')
+
+from src import jobs, llm
+from src.main import create_app
+
+class FakeTranslator:
+    """Stands in for client.chat.completions; answers single and packed
+    translation prompts by tagging the text"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = []
+        self.malformed = False
+
+    def create(self, messages, stream=False, **kwargs):
+        instructions, text = messages[-1]['content'].split('\n\n', 1)
+        if instructions.startswith('Translate each string'):
+            texts = json.loads(text)
+            reply = json.dumps([] if self.malformed else [f'[fr] {t}' for t in texts])
+        else:
+            texts, reply = [text], f'[fr] {text}'
+        with self.lock:
+            self.requests.append(texts)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=reply))])
+
+def run_job(app, client, response):
+    assert response.status_code == 202
+    with app.app_context():
+        assert jobs.run_pending() == 1
+    job = client.get(response.get_json()['status_url']).get_json()
+    assert job['status'] == 'succeeded'
+    return job
+
+def test_batch_reuses_cache_and_packs_requests():
+    translator = FakeTranslator()
+    previous_client, llm._client = llm._client, SimpleNamespace(chat=SimpleNamespace(completions=translator))
+    try:
+        app = create_app('testing')
+        client = app.test_client()
+        ids = [client.post('/api/notes', json={'title': title, 'content': content}).get_json()['id']
+               for title, content in (('Groceries', 'Milk and eggs'), ('Groceries', 'Bread'), ('Trip', 'Visit Paris'))]
+
+        # Translating one note first caches its chunks
+        run_job(app, client, client.post(f'/api/notes/{ids[2]}/translate', json={'target_language': 'French'}))
+        translator.requests.clear()
+
+        job = run_job(app, client, client.post('/api/notes/translate-batch', json={
+            'note_ids': ids + [999], 'target_language': 'French'
+        }))
+        result = job['result']
+        assert result['missing'] == [999]
+        assert result['results'] == {
+            str(ids[0]): {'title': '[fr] Groceries', 'content': '[fr] Milk and eggs'},
+            str(ids[1]): {'title': '[fr] Groceries', 'content': '[fr] Bread'},
+            str(ids[2]): {'title': '[fr] Trip', 'content': '[fr] Visit Paris'},
+        }
+        # One packed request, without the cached chunks or the repeated title
+        assert len(translator.requests) == 1
+        assert sorted(translator.requests[0]) == ['Bread', 'Groceries', 'Milk and eggs']
+        assert job['progress'] == {'completed': 1, 'total': 1}
+
+        # Everything is cached now
+        translator.requests.clear()
+        again = run_job(app, client, client.post('/api/notes/translate-batch', json={
+            'note_ids': ids, 'target_language': 'French'
+        }))
+        assert again['result']['results'] == result['results'] and translator.requests == []
+
+        # A packed reply that does not match is retried text by text
+        translator.malformed = True
+        job = run_job(app, client, client.post('/api/notes/translate-batch', json={
+            'note_ids': ids, 'target_language': 'German'
+        }))
+        assert job['result']['results'][str(ids[1])] == {'title': '[fr] Groceries', 'content': '[fr] Bread'}
+        assert len(translator.requests[0]) == 5 and all(len(texts) == 1 for texts in translator.requests[1:])
+        assert len(translator.requests) == 6
+
+        for body in ({'target_language': 'French'}, {'note_ids': ids},
+                     {'note_ids': ['one'], 'target_language': 'French'}):
+            assert client.post('/api/notes/translate-batch', json=body).status_code == 400
+    finally:
+        llm._client = previous_client
+
+if __name__ == '__main__':
+    test_batch_reuses_cache_and_packs_requests()
+    print('✅ batch translation reuses the cache')
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Test POST /api/notes/bulk with a mix of valid and invalid operations: each
+invalid item gets its own 400 / 404 result and is skipped, and the valid
+ones are still applied together.
+"""
+import os
+
+os.environ.setdefault('GITHUB_TOKEN', 'test-token')
+os.environ.setdefault('FLASK_CONFIG', 'testing')
+
+from src.main import create_app
+
+def test_invalid_operations_are_skipped_and_the_rest_applied():
+    client = create_app('testing').test_client()
+    kept, removed = (client.post('/api/notes', json={'title': title, 'content': ''}).get_json()['id']
+                     for title in ('Kept', 'Removed'))
+    too_long = 'x' * 201
+
+    response = client.post('/api/notes/bulk', json={'operations': [
+        {'op': 'create', 'title': 'Created', 'content': 'body'},
+        {'op': 'create', 'title': too_long, 'content': 'body'},
+        {'op': 'create', 'title': 'No content'},
+        {'op': 'update', 'id': kept, 'title': 'Renamed'},
+        {'op': 'update', 'id': kept, 'title': 'Twice'},
+        {'op': 'update', 'id': removed, 'title': too_long},
+        {'op': 'update', 'id': removed, 'content': 42},
+        {'op': 'update', 'id': 999999, 'title': 'Missing'},
+        {'op': 'delete', 'id': removed},
+        {'op': 'rename', 'id': kept},
+    ]})
+    assert response.status_code == 200
+    body = response.get_json()
+    statuses = [result['status'] for result in body['results']]
+    assert statuses == [201, 400, 400, 200, 400, 400, 400, 404, 204, 400]
+    errors = [result.get('error') for result in body['results']]
+    assert errors[1] == errors[5] == 'title is longer than 200 characters'
+    assert errors[6] == 'title and content must be strings'
+    assert (body['created'], body['updated'], body['deleted']) == (1, 1, 1)
+
+    notes = {note['title']: note for note in client.get('/api/notes').get_json()}
+    assert sorted(notes) == ['Created', 'Renamed']
+    assert notes['Created']['content'] == 'body'
+
+if __name__ == '__main__':
+    test_invalid_operations_are_skipped_and_the_rest_applied()
+    print('✅ bulk operations validate each item')
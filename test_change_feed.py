@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Test the change feed (GET /api/notes/changes): creates, updates and deletes
+made after a cursor come back as upserts and tombstones, pages follow the
+cursor, and the cursor moves forward so older changes are not sent again.
+"""
+import os
+from datetime import datetime, timedelta
+
+os.environ.setdefault('GITHUB_TOKEN', 'test-token')
+os.environ.setdefault('FLASK_CONFIG', 'testing')
+
+from src.main import create_app
+from src.models.deletion import NoteDeletion
+from src.models.note import Note, db
+from src.routes.note import decode_cursor, encode_cursor
+
+def changes(client, since, **params):
+    response = client.get('/api/notes/changes', query_string=dict(params, since=since))
+    assert response.status_code == 200
+    return response.get_json()
+
+def cursor_time(cursor):
+    return datetime.fromisoformat(decode_cursor(cursor)[0])
+
+def test_changes_and_tombstones_since_a_cursor():
+    app = create_app('testing')
+    client = app.test_client()
+    start = client.get('/api/notes/changes').get_json()
+    assert start['notes'] == [] and not start['reset']
+
+    ids = [client.post('/api/notes', json={'title': f'Note {i}', 'content': 'x'}).get_json()['id'] for i in range(4)]
+    client.put(f'/api/notes/{ids[1]}', json={'title': 'Edited'})
+    client.delete(f'/api/notes/{ids[2]}')
+
+    # Oldest change first, limit per page; the deleted note is a tombstone only
+    first = changes(client, start['cursor'], limit=2, fields='id,title')
+    assert [note['id'] for note in first['notes']] == [ids[0], ids[3]]
+    assert first['notes'][0] == {'id': ids[0], 'title': 'Note 0'}
+    assert first['has_more'] and first['deleted'] == [ids[2]]
+    assert cursor_time(first['cursor']) > cursor_time(start['cursor'])
+
+    second = changes(client, first['cursor'], limit=2)
+    assert [(note['id'], note['title']) for note in second['notes']] == [(ids[1], 'Edited')]
+    assert not second['has_more'] and second['deleted'] == [ids[2]]
+
+    # Once the changes are older than the cursor's overlap they are not sent again
+    with app.app_context():
+        an_hour_ago = datetime.utcnow() - timedelta(hours=1)
+        Note.query.update({'updated_at': an_hour_ago})
+        NoteDeletion.query.update({'deleted_at': an_hour_ago})
+        db.session.commit()
+    assert changes(client, second['cursor'])['notes'] == []
+    assert changes(client, second['cursor'])['deleted'] == []
+
+    client.patch(f'/api/notes/{ids[0]}', json={'content': 'later'})
+    client.delete(f'/api/notes/{ids[3]}')
+    latest = changes(client, second['cursor'], fields='id,content')
+    assert latest['notes'] == [{'id': ids[0], 'content': 'later'}] and latest['deleted'] == [ids[3]]
+
+def test_stale_and_malformed_cursors():
+    client = create_app('testing').test_client()
+    stale = encode_cursor([(datetime.utcnow() - timedelta(days=31)).isoformat(), 0])
+    body = changes(client, stale)
+    assert body['reset'] and body['notes'] == [] and cursor_time(body['cursor']) > cursor_time(stale)
+    assert client.get('/api/notes/changes?since=not-a-cursor').status_code == 400
+
+if __name__ == '__main__':
+    test_changes_and_tombstones_since_a_cursor()
+    test_stale_and_malformed_cursors()
+    print('✅ change feed works')
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test GET /api/notes/export: each format is streamed in several batches and
+parses back (json / zipfile) to the same notes, with their tags and share
+links. The zip is also written with ZIP64 records, by lowering the limits
+that trigger them, and still opens.
+"""
+import io
+import json
+import os
+import zipfile
+
+os.environ.setdefault('GITHUB_TOKEN', 'test-token')
+os.environ.setdefault('FLASK_CONFIG', 'testing')
+
+from src import export
+from src.main import create_app
+
+NOTES = 5
+
+def exporting_client():
+    """Test client with NOTES tagged notes, the first of them shared"""
+    client = create_app('testing').test_client()
+    client.post('/api/notes/bulk', json={'operations': [
+        {'op': 'create', 'title': f'Note {i} ✓', 'content': f'Body {i}\n\nTags: work, idea {i}'} for i in range(NOTES)
+    ]})
+    share = client.post('/api/notes/1/share', json={}).get_json()['share']
+    return client, share
+
+def download(client, export_format):
+    response = client.get(f'/api/notes/export?format={export_format}')
+    assert response.status_code == 200 and response.is_streamed
+    assert response.headers['Content-Disposition'].startswith('attachment; filename="notes-')
+    return response
+
+def check_notes(notes, share):
+    assert [note['id'] for note in notes] == list(range(1, NOTES + 1))
+    assert notes[2]['title'] == 'Note 2 ✓' and notes[2]['tags'] == ['work', 'idea 2']
+    assert [s['share_token'] for s in notes[0]['shares']] == [share['share_token']]
+    assert all(note['shares'] == [] for note in notes[1:])
+
+def test_ndjson_and_json_exports_parse_back():
+    previous, export.EXPORT_BATCH_SIZE = export.EXPORT_BATCH_SIZE, 2
+    try:
+        client, share = exporting_client()
+        response = download(client, 'ndjson')
+        assert response.mimetype == 'application/x-ndjson'
+        lines = response.get_data(as_text=True).splitlines()
+        check_notes([json.loads(line) for line in lines], share)
+
+        response = download(client, 'json')
+        assert response.mimetype == 'application/json'
+        chunks = list(response.response)
+        assert len(chunks) > NOTES // 2  # sent batch by batch
+        check_notes(json.loads(b''.join(c if isinstance(c, bytes) else c.encode() for c in chunks)), share)
+
+        assert client.get('/api/notes/export?format=xml').status_code == 400
+    finally:
+        export.EXPORT_BATCH_SIZE = previous
+
+def read_markdown_zip(data):
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.testzip() is None
+        names = archive.namelist()
+        documents = [archive.read(name).decode('utf-8') for name in names]
+    notes = []
+    for document in documents:
+        front_matter = document.split('---\n')[1]
+        notes.append({key: json.loads(value) for key, value in
+                      (line.split(': ', 1) for line in front_matter.splitlines())})
+    return names, documents, notes
+
+def test_markdown_zip_export_opens_with_zipfile():
+    previous, export.EXPORT_BATCH_SIZE = export.EXPORT_BATCH_SIZE, 2
+    try:
+        client, share = exporting_client()
+        response = download(client, 'markdown-zip')
+        assert response.mimetype == 'application/zip'
+        names, documents, notes = read_markdown_zip(response.get_data())
+        assert names[0] == '000001-note-0.md'
+        assert documents[0].endswith('# Note 0 ✓\n\nBody 0\n\nTags: work, idea 0\n')
+        check_notes(notes, share)
+    finally:
+        export.EXPORT_BATCH_SIZE = previous
+
+def test_markdown_zip_export_with_zip64_records():
+    limits = export.ZIP64_LIMIT, export.ZIP_MAX_ENTRIES
+    # Entries past the first get ZIP64 offsets, and the archive ZIP64 end records
+    export.ZIP64_LIMIT, export.ZIP_MAX_ENTRIES = 100, 3
+    try:
+        client, share = exporting_client()
+        data = download(client, 'markdown-zip').get_data()
+        assert b'PK\x06\x06' in data and b'PK\x06\x07' in data
+        names, _, notes = read_markdown_zip(data)
+        assert len(names) == NOTES
+        check_notes(notes, share)
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            # read from the ZIP64 extra field, not the 0xFFFFFFFF placeholder
+            assert export.ZIP64_LIMIT < archive.infolist()[-1].header_offset < 0xFFFFFFFF
+    finally:
+        export.ZIP64_LIMIT, export.ZIP_MAX_ENTRIES = limits
+
+if __name__ == '__main__':
+    test_ndjson_and_json_exports_parse_back()
+    test_markdown_zip_export_opens_with_zipfile()
+    test_markdown_zip_export_with_zip64_records()
+    print('✅ exports parse back')
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Test conditional GETs on the JSON endpoints: notes, a note, its share
+links, users, a user and the templates answer a matching If-None-Match (or
+If-Modified-Since, where they send Last-Modified) with an empty 304, and
+send a new weak ETag once what they return has changed.
+"""
+import os
+
+os.environ.setdefault('GITHUB_TOKEN', 'test-token')
+os.environ.setdefault('FLASK_CONFIG', 'testing')
+
+from src.main import create_app
+
+def revalidate(client, url):
+    """Fetch ``url``, check that its tag revalidates, and return the tag"""
+    response = client.get(url)
+    assert response.status_code == 200, url
+    etag, weak = response.get_etag()
+    assert weak and response.headers['Cache-Control'] == 'private, no-cache'
+    cached = client.get(url, headers={'If-None-Match': response.headers['ETag']})
+    assert cached.status_code == 304 and cached.data == b'', url
+    assert cached.headers['ETag'] == response.headers['ETag']
+    if response.last_modified is not None:
+        since = client.get(url, headers={'If-Modified-Since': response.headers['Last-Modified']})
+        assert since.status_code == 304, url
+    return response.headers['ETag']
+
+def changed(client, url, etag):
+    response = client.get(url, headers={'If-None-Match': etag})
+    return response.status_code == 200 and response.headers['ETag'] != etag
+
+def test_notes_revalidate():
+    client = create_app('testing').test_client()
+    ids = [client.post('/api/notes', json={'title': f'Note {i}', 'content': ''}).get_json()['id'] for i in range(3)]
+    url = f'/api/notes/{ids[0]}'
+
+    listing, note = revalidate(client, '/api/notes'), revalidate(client, url)
+    page = revalidate(client, '/api/notes?limit=2')
+    assert page != listing  # the query string is part of the tag
+
+    client.put(url, json={'content': 'edited'})
+    assert changed(client, url, note) and changed(client, '/api/notes', listing)
+    listing, note = revalidate(client, '/api/notes'), revalidate(client, url)
+
+    # A reorder changes order_index, so both tags change
+    client.put('/api/notes/reorder', json={'note_ids': ids[::-1]})
+    assert changed(client, url, note) and changed(client, '/api/notes', listing)
+
+    listing = revalidate(client, '/api/notes')
+    client.delete(f'/api/notes/{ids[1]}')
+    assert changed(client, '/api/notes', listing)
+
+    missing = client.get('/api/notes/999')
+    assert missing.status_code == 404 and 'ETag' not in missing.headers
+
+def test_share_links_revalidate():
+    client = create_app('testing').test_client()
+    note = client.post('/api/notes', json={'title': 'Shared', 'content': 'Hello'}).get_json()
+    url = f"/api/notes/{note['id']}/shares"
+    share = client.post(url.replace('/shares', '/share'), json={}).get_json()['share']
+
+    etag = revalidate(client, url)
+    client.get(f"/shared/{share['share_token']}")  # view counts are part of the tag
+    assert changed(client, url, etag)
+
+def test_users_and_templates_revalidate():
+    client = create_app('testing').test_client()
+    user = client.post('/api/users', json={'username': 'ada', 'email': 'ada@example.com'}).get_json()
+    url = f"/api/users/{user['id']}"
+
+    users, one = revalidate(client, '/api/users'), revalidate(client, url)
+    client.put(url, json={'email': 'ada@example.org'})
+    assert changed(client, url, one) and changed(client, '/api/users', users)
+    users = revalidate(client, '/api/users')
+    client.post('/api/users', json={'username': 'bob', 'email': 'bob@example.com'})
+    assert changed(client, '/api/users', users)
+
+    templates = revalidate(client, '/api/notes/templates')
+    meeting = revalidate(client, '/api/notes/templates/meeting')
+    assert len({templates, meeting, revalidate(client, '/api/notes/templates/project')}) == 3
+    assert client.get('/api/notes/templates/nope').status_code == 404
+
+if __name__ == '__main__':
+    test_notes_revalidate()
+    test_share_links_revalidate()
+    test_users_and_templates_revalidate()
+    print('✅ conditional GETs revalidate')
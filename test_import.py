@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Test POST /api/notes/import through the background job: an upload mixing
+valid and invalid records imports the valid ones, and the job result lists
+every invalid record with its line or zip entry (past MAX_REPORTED_ERRORS
+they are only counted). A row the database rejects rolls its batch back to
+the savepoint, and the batch is retried row by row so only that row is lost.
+"""
+import io
+import json
+import os
+import tempfile
+import zipfile
+
+os.environ.setdefault('GITHUB_TOKEN', 'test-token')
+os.environ.setdefault('FLASK_CONFIG', 'testing')
+
+from src import importer, jobs
+from src.main import create_app
+from src.models.note import Note, db
+
+def importing_app(spool_dir):
+    app = create_app('testing')
+    app.config['IMPORT_SPOOL_DIR'] = spool_dir
+    app.config['IMPORT_BATCH_SIZE'] = 3
+    with app.app_context():
+        # Stands in for a constraint only the database enforces
+        db.session.execute(db.text(
+            "CREATE TRIGGER reject_note BEFORE INSERT ON notes WHEN NEW.title = 'Rejected' "
+            "BEGIN SELECT RAISE(ABORT, 'rejected by the database'); END"
+        ))
+        db.session.commit()
+    return app
+
+def run_import(app, client, data, **params):
+    response = client.post('/api/notes/import', data=data, query_string=params)
+    assert response.status_code == 202
+    job_id = response.get_json()['job_id']
+    with app.app_context():
+        assert jobs.run_pending() == 1
+    job = client.get(f'/api/jobs/{job_id}').get_json()
+    assert job['status'] == 'succeeded'
+    return job['result']
+
+def test_ndjson_import_reports_invalid_records():
+    with tempfile.TemporaryDirectory() as spool_dir:
+        app = importing_app(spool_dir)
+        client = app.test_client()
+        lines = [
+            json.dumps({'title': 'First', 'content': 'one', 'created_at': '2024-01-02T03:04:05'}),
+            '{"title": "Broken", ',
+            json.dumps({'title': 'Second', 'content': 'two'}),
+            '',
+            json.dumps({'title': 'Rejected', 'content': 'valid until inserted'}),
+            json.dumps({'title': 'No content'}),
+            json.dumps({'title': 'Third', 'content': 'three'}),
+            json.dumps({'title': 'x' * 201, 'content': 'too long'}),
+            json.dumps({'title': 'Bad date', 'content': '', 'created_at': 'yesterday'}),
+            json.dumps(['not', 'an', 'object']),
+            json.dumps({'title': 'Fourth', 'content': 'four'}),
+        ]
+        result = run_import(app, client, '\n'.join(lines).encode('utf-8'), format='ndjson')
+
+        assert result['imported'] == 4 and result['failed'] == 6
+        errors = {error['line']: error['error'] for error in result['errors']}
+        assert sorted(errors) == [2, 5, 6, 8, 9, 10]
+        assert 'rejected by the database' in errors[5]
+        assert errors[6] == 'Title and content are required'
+        assert errors[8] == 'title is longer than 200 characters'
+        assert errors[9] == 'created_at must be an ISO 8601 timestamp'
+
+        # The rejected row's batch was retried without it, in upload order
+        notes = client.get('/api/notes').get_json()
+        assert [note['title'] for note in notes] == ['First', 'Second', 'Third', 'Fourth']
+        assert notes[0]['created_at'] == '2024-01-02T03:04:05'
+        assert os.listdir(spool_dir) == []
+
+def test_markdown_zip_import_reports_invalid_entries():
+    with tempfile.TemporaryDirectory() as spool_dir:
+        app = importing_app(spool_dir)
+        client = app.test_client()
+        upload = io.BytesIO()
+        with zipfile.ZipFile(upload, 'w') as archive:
+            archive.writestr('notes/plain.md', 'Just text\n')
+            archive.writestr('notes/latin1.md', 'caf\xe9'.encode('latin-1'))
+            archive.writestr('notes/readme.txt', 'not a note')
+            archive.writestr('notes/rejected.md', '# Rejected\n\nbody\n')
+            archive.writestr('notes/exported.md', '---\ntitle: "Exported"\ncreated_at: "2024-05-06T07:08:09"\n---\n\n'
+                                                  '# Exported\n\nBody\n')
+        result = run_import(app, client, upload.getvalue(), format='markdown-zip')
+
+        assert result['imported'] == 2 and result['failed'] == 2
+        assert sorted(error['entry'] for error in result['errors']) == ['notes/latin1.md', 'notes/rejected.md']
+        notes = {note['title']: note for note in client.get('/api/notes').get_json()}
+        assert sorted(notes) == ['Exported', 'plain']
+        assert notes['Exported']['content'] == 'Body'
+        assert notes['Exported']['created_at'] == '2024-05-06T07:08:09'
+
+def test_only_the_first_errors_are_listed():
+    previous, importer.MAX_REPORTED_ERRORS = importer.MAX_REPORTED_ERRORS, 3
+    try:
+        with tempfile.TemporaryDirectory() as spool_dir:
+            app = importing_app(spool_dir)
+            lines = [json.dumps({'title': f'Untitled {i}'}) for i in range(8)] + [json.dumps({'title': 'Kept', 'content': ''})]
+            result = run_import(app, app.test_client(), '\n'.join(lines).encode('utf-8'), format='ndjson')
+        assert result['imported'] == 1 and result['failed'] == 8
+        assert [error['line'] for error in result['errors']] == [1, 2, 3]
+    finally:
+        importer.MAX_REPORTED_ERRORS = previous
+
+if __name__ == '__main__':
+    test_ndjson_import_reports_invalid_records()
+    test_markdown_zip_import_reports_invalid_entries()
+    test_only_the_first_errors_are_listed()
+    print('✅ imports report invalid records')
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test per-request instrumentation: Server-Timing headers, the Prometheus
+metrics endpoint, LLM timing (including calls made on the worker pool and
+inside streamed responses) and query budgets.
+"""
+import os
+import re
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault('GITHUB_TOKEN', 'test-token')
+os.environ.setdefault('FLASK_CONFIG', 'testing')
+
+from src import llm
+from src.instrumentation import QueryBudgetExceeded, query_budget
+from src.main import create_app
+from src.models.note import Note
+
+LLM_DELAY = 0.05
+
+class FakeCompletions:
+    """Stands in for client.chat.completions, replying after LLM_DELAY"""
+
+    def create(self, messages, stream=False, **kwargs):
+        time.sleep(LLM_DELAY)
+        text = '{"Title": "Fake", "Notes": "Fake notes", "Tags": ["fake"]}'
+        if stream:
+            delta = SimpleNamespace(delta=SimpleNamespace(content=text))
+            return iter([SimpleNamespace(choices=[delta])])
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
+
+def timing(response):
+    """``{name: (duration_ms, desc)}`` from a Server-Timing header"""
+    entries = {}
+    for entry in response.headers['Server-Timing'].split(', '):
+        name, _, params = entry.partition(';')
+        duration = float(re.search(r'dur=([\d.]+)', params).group(1))
+        desc = re.search(r'desc="([^"]*)"', params)
+        entries[name] = (duration, desc.group(1) if desc else None)
+    return entries
+
+def metric(text, name, endpoint):
+    match = re.search(rf'^notes_{name}{{endpoint="{re.escape(endpoint)}",method="[A-Z]+"}} (\S+)$', text, re.M)
+    return float(match.group(1)) if match else None
+
+def test_server_timing_and_metrics():
+    previous_client, llm._client = llm._client, SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions()))
+    try:
+        app = create_app('testing')
+        client = app.test_client()
+        note_id = client.post('/api/notes', json={'title': 'Trip', 'content': 'Visit Paris'}).get_json()['id']
+
+        response = client.get('/api/notes')
+        entries = timing(response)
+        assert entries['db'][1] == '2 queries'
+        assert entries['llm'] == (0.0, '0 calls')
+        assert entries['total'][0] >= entries['db'][0]
+
+        # A synchronous LLM call is timed in the header
+        response = client.post('/api/notes/generate', json={'input': 'trip to Paris'})
+        assert response.status_code == 200
+        duration, desc = timing(response)['llm']
+        assert desc == '1 calls' and duration >= LLM_DELAY * 1000
+
+        # Streamed translations call the LLM on the worker pool after the
+        # headers are sent; the calls still count towards the request
+        response = client.post(f'/api/notes/{note_id}/translate/stream', json={'target_language': 'French'})
+        body = response.get_data()
+        assert b'event: done' in body
+
+        metrics = client.get('/api/_metrics')
+        assert metrics.mimetype == 'text/plain'
+        text = metrics.get_data(as_text=True)
+        assert 'notes_http_requests_total{endpoint="note.get_notes",method="GET",status="200"} 1' in text
+        assert metric(text, 'db_queries_total', 'note.get_notes') == 2
+        assert metric(text, 'db_queries_per_request_max', 'note.create_note') >= 1
+        assert metric(text, 'llm_calls_total', 'note.generate_structured_note') == 1
+        assert metric(text, 'llm_calls_total', 'note.translate_note_stream') == 2
+        assert metric(text, 'llm_duration_seconds_total', 'note.translate_note_stream') >= 2 * LLM_DELAY
+        assert metric(text, 'http_response_bytes_total', 'note.translate_note_stream') == len(body)
+    finally:
+        llm._client = previous_client
+
+def test_query_budget():
+    app = create_app('testing')
+
+    @app.route('/api/_test/n_plus_one')
+    @query_budget(2)
+    def n_plus_one():
+        ids = [note.id for note in Note.query.all()]
+        return {'notes': [Note.query.get(note_id).title for note_id in ids]}
+
+    client = app.test_client()
+    client.post('/api/notes', json={'title': 'One', 'content': ''})
+    assert client.get('/api/_test/n_plus_one').status_code == 200
+
+    client.post('/api/notes', json={'title': 'Two', 'content': ''})
+    try:
+        client.get('/api/_test/n_plus_one')
+    except QueryBudgetExceeded as e:
+        assert 'ran 3 SQL statements (budget 2)' in str(e)
+    else:
+        raise AssertionError('query budget was not enforced')
+
+    # Outside strict mode an overrun is only logged
+    app.config['QUERY_BUDGET_STRICT'] = False
+    assert client.get('/api/_test/n_plus_one').status_code == 200
+
+if __name__ == '__main__':
+    test_server_timing_and_metrics()
+    test_query_budget()
+    print('✅ instrumentation works')
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Test the shared LLM client and concurrent translation against a local stub
+of the inference endpoint (no GitHub token or network access needed)
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+os.environ.setdefault('GITHUB_TOKEN', 'test-token')
+os.environ.setdefault('FLASK_CONFIG', 'testing')
+
+from src import llm, jobs, tasks
+from src.main import create_app
+from src.models.note import Note
+
+# Simulated model latency per completion
+STUB_DELAY = 0.3
+
+class StubCompletionHandler(BaseHTTPRequestHandler):
+    """Answers /chat/completions like the inference API, after a fixed delay"""
+    protocol_version = 'HTTP/1.1'
+    connections = set()
+    lock = threading.Lock()
+
+    def do_POST(self):
+        with self.lock:
+            StubCompletionHandler.connections.add(self.client_address)
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        prompt = body['messages'][-1]['content']
+        time.sleep(STUB_DELAY)
+
+        payload = json.dumps({
+            'id': 'stub', 'object': 'chat.completion', 'created': 0, 'model': body['model'],
+            'choices': [{
+                'index': 0, 'finish_reason': 'stop',
+                'message': {'role': 'assistant', 'content': 'STUB: ' + prompt.split('\n\n', 1)[-1]}
+            }]
+        }).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+def start_stub_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubCompletionHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    llm.endpoint = f'http://127.0.0.1:{server.server_address[1]}'
+    llm.reset_client()
+    return server
+
+def test_client_is_shared_and_reuses_connections():
+    server = start_stub_server()
+    try:
+        StubCompletionHandler.connections.clear()
+        assert llm.get_client() is llm.get_client()
+        for i in range(3):
+            assert llm.translate_text(f'hello {i}', 'French') == f'STUB: hello {i}'
+        # Sequential calls all travel over one kept-alive connection
+        assert len(StubCompletionHandler.connections) == 1
+    finally:
+        llm.reset_client()
+        server.shutdown()
+
+def test_translate_note_runs_title_and_content_concurrently():
+    server = start_stub_server()
+    try:
+        app = create_app('testing')
+        client = app.test_client()
+        note = client.post('/api/notes', json={'title': 'Trip', 'content': 'Visit Paris next month'}).json
+
+        start = time.perf_counter()
+        llm.translate_text('Trip', 'German')
+        llm.translate_text('Visit Paris next month', 'German')
+        sequential = time.perf_counter() - start
+
+        response = client.post(f"/api/notes/{note['id']}/translate", json={'target_language': 'Spanish'})
+        assert response.status_code == 202
+        assert client.get(response.json['status_url']).json['status'] == 'queued'
+
+        start = time.perf_counter()
+        with app.app_context():
+            assert jobs.run_pending() == 1
+        concurrent = time.perf_counter() - start
+
+        job = client.get(response.json['status_url']).json
+        assert job['status'] == 'succeeded'
+        assert job['result']['translated'] == {'title': 'STUB: Trip', 'content': 'STUB: Visit Paris next month'}
+        print(f"   sequential: {sequential * 1000:.0f} ms, concurrent: {concurrent * 1000:.0f} ms")
+        assert concurrent < 2 * STUB_DELAY <= sequential
+    finally:
+        llm.reset_client()
+        server.shutdown()
+
+def test_failed_jobs_are_retried_and_reclaimed_after_timeout():
+    app = create_app('testing')
+    client = app.test_client()
+    calls = []
+
+    @jobs.job_handler('flaky_test_job', max_attempts=2, timeout=60)
+    def flaky(payload, job_id):
+        calls.append(job_id)
+        if len(calls) == 1:
+            raise RuntimeError('endpoint unavailable')
+        return {'echo': payload['value']}
+
+    with app.app_context():
+        job = jobs.enqueue('flaky_test_job', {'value': 42})
+        jobs.db.session.commit()
+        job_id = job.id
+
+        # First attempt fails and is requeued with a backoff delay
+        assert jobs.run_pending() == 1
+        status = client.get(f'/api/jobs/{job_id}').json
+        assert status['status'] == 'queued' and status['error'] == 'endpoint unavailable'
+        assert jobs.run_pending() == 0
+
+        jobs.Job.query.filter_by(id=job_id).update({'run_after': jobs.datetime.utcnow()})
+        jobs.db.session.commit()
+        assert jobs.run_pending() == 1
+        status = client.get(f'/api/jobs/{job_id}').json
+        assert status['status'] == 'succeeded' and status['result'] == {'echo': 42}
+        assert status['attempts'] == 2
+
+        # A stuck attempt is taken back by the reaper and its late result is dropped
+        job = jobs.enqueue('flaky_test_job', {'value': 7})
+        jobs.db.session.commit()
+        claimed = jobs.claim_next('stuck-worker')
+        jobs.Job.query.filter_by(id=claimed.id).update(
+            {'started_at': jobs.datetime.utcnow() - jobs.timedelta(seconds=120)}
+        )
+        jobs.db.session.commit()
+        jobs.reap_expired()
+        assert client.get(f'/api/jobs/{claimed.id}').json['status'] == 'queued'
+        assert jobs._finish(claimed.id, 1, status='succeeded') is False
+
+    assert client.get('/api/jobs/missing').status_code == 404
+
+def expire_and_reap(job_id):
+    """Make a running attempt overrun its lease and let the reaper take it back"""
+    jobs.Job.query.filter_by(id=job_id).update({
+        'started_at': jobs.datetime.utcnow() - jobs.timedelta(seconds=7200), 'heartbeat_at': None
+    })
+    jobs.db.session.commit()
+    jobs.reap_expired()
+
+def test_taken_back_attempts_commit_no_side_effects():
+    app = create_app('testing')
+    app.config['IMPORT_SPOOL_DIR'] = tempfile.mkdtemp()
+    app.config['IMPORT_BATCH_SIZE'] = 2
+    llm_calls = []
+
+    class SlowCompletions:
+        """The first call outlives the attempt's timeout"""
+        def create(self, messages, **kwargs):
+            llm_calls.append(messages)
+            if len(llm_calls) == 1:
+                expire_and_reap(job_id)
+            reply = '{"Title": "Generated", "Notes": "Body", "Tags": []}'
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=reply))])
+
+    previous_client, llm._client = llm._client, SimpleNamespace(chat=SimpleNamespace(completions=SlowCompletions()))
+    try:
+        client = app.test_client()
+        with app.app_context():
+            job_id = client.post('/api/notes/generate-and-save', json={'input': 'buy milk'}).json['job_id']
+
+            # The timed-out attempt's note is rolled back, not saved next to the retry's
+            assert jobs.run_pending() == 1
+            assert Note.query.count() == 0
+            status = client.get(f'/api/jobs/{job_id}').json
+            assert status['status'] == 'queued' and status['error'].startswith('Timed out')
+
+            jobs.Job.query.filter_by(id=job_id).update({'run_after': jobs.datetime.utcnow()})
+            jobs.db.session.commit()
+            assert jobs.run_pending() == 1
+            result = client.get(f'/api/jobs/{job_id}').json['result']
+            assert Note.query.count() == 1 and result['note']['title'] == 'Generated'
+
+            # An attempt that saved the note but was taken back before it
+            # finished is retried without creating a second note
+            jobs.Job.query.filter_by(id=job_id).update({'status': 'queued', 'run_after': jobs.datetime.utcnow()})
+            jobs.db.session.commit()
+            assert jobs.run_pending() == 1
+            assert Note.query.count() == 1 and len(llm_calls) == 2
+            assert client.get(f'/api/jobs/{job_id}').json['result'] == result
+
+        # An import taken back after its first batch stops writing batches
+        records = ''.join(json.dumps({'title': f'Imported {i}', 'content': ''}) + '\n' for i in range(6))
+        job_id = client.post('/api/notes/import?format=ndjson', data=records).json['job_id']
+        report_progress = tasks.report_progress
+
+        def progress_then_expire(job_id, completed, total):
+            report_progress(job_id, completed, total)
+            if completed:
+                expire_and_reap(job_id)
+
+        tasks.report_progress = progress_then_expire
+        try:
+            with app.app_context():
+                assert jobs.run_pending() == 1
+                assert Note.query.filter(Note.title.like('Imported %')).count() == 2
+        finally:
+            tasks.report_progress = report_progress
+        status = client.get(f'/api/jobs/{job_id}').json
+        assert status['status'] == 'failed' and status['error'].startswith('Timed out')
+    finally:
+        llm._client = previous_client
+
+def test_capped_kinds_wait_and_polls_run_jobs():
+    app = create_app('testing')
+    client = app.test_client()
+
+    @jobs.job_handler('capped_test_job', concurrency=1)
+    def capped(payload, job_id):
+        return {'value': payload['value']}
+
+    @jobs.job_handler('uncapped_test_job')
+    def uncapped(payload, job_id):
+        return {'value': payload['value']}
+
+    with app.app_context():
+        queued = [jobs.enqueue(kind, {'value': i}) for i, kind in
+                  enumerate(('capped_test_job', 'capped_test_job', 'uncapped_test_job'))]
+        jobs.db.session.commit()
+        ids = [job.id for job in queued]
+
+        # The second capped job waits for the first; other kinds are not held up
+        first = jobs.claim_next('worker-1')
+        assert first.id == ids[0]
+        assert jobs.claim_next('worker-2').id == ids[2]
+        assert jobs.claim_next('worker-3') is None
+        jobs.run_job(first)
+        assert jobs.claim_next('worker-3').id == ids[1]
+
+        # Without workers, polling a due job runs it in the polling request
+        app.config['JOB_RUN_ON_POLL'] = True
+        job_id = jobs.enqueue('uncapped_test_job', {'value': 9}).id
+        jobs.db.session.commit()
+    status = client.get(f'/api/jobs/{job_id}').json
+    assert status['status'] == 'succeeded' and status['result'] == {'value': 9}
+
+if __name__ == '__main__':
+    print("🧪 Testing shared LLM client against a local stub endpoint\n")
+    test_client_is_shared_and_reuses_connections()
+    print("✅ Client is shared and keeps its connection alive")
+    test_translate_note_runs_title_and_content_concurrently()
+    print("✅ Title and content are translated concurrently")
+    test_failed_jobs_are_retried_and_reclaimed_after_timeout()
+    print("✅ Failed and timed-out jobs are retried")
+    test_taken_back_attempts_commit_no_side_effects()
+    print("✅ Taken-back attempts commit no side effects")
+    test_capped_kinds_wait_and_polls_run_jobs()
+    print("✅ Capped job kinds wait and polls run due jobs")
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test the schema migrations against a database created before order_index
+and full-text search existed.
+"""
+import os
+import sqlite3
+import tempfile
+
+os.environ.setdefault('GITHUB_TOKEN', 'test-token')
+os.environ.setdefault('FLASK_CONFIG', 'testing')
+
+from conftest import file_backed_app
+
+LEGACY_SCHEMA = """
+CREATE TABLE users (
+    id INTEGER PRIMARY KEY, username VARCHAR(80) NOT NULL UNIQUE, email VARCHAR(120) NOT NULL UNIQUE,
+    created_at DATETIME, updated_at DATETIME
+);
+CREATE TABLE notes (
+    id INTEGER PRIMARY KEY, title VARCHAR(200) NOT NULL, content TEXT NOT NULL,
+    created_at DATETIME, updated_at DATETIME, user_id INTEGER REFERENCES users (id)
+);
+"""
+
+def legacy_database(path):
+    connection = sqlite3.connect(path)
+    connection.executescript(LEGACY_SCHEMA)
+    connection.execute("INSERT INTO users (id, username, email) VALUES (1, 'default_user', 'user@example.com')")
+    connection.execute("INSERT INTO users (id, username, email) VALUES (2, 'other', 'other@example.com')")
+    connection.executemany(
+        'INSERT INTO notes (id, title, content, created_at, updated_at, user_id) VALUES (?, ?, ?, ?, ?, ?)',
+        [(i, f'Legacy {i}', f'body {i}', f'2024-01-01 00:00:{i:02d}', f'2024-02-01 00:00:{i:02d}', 1 + i % 2)
+         for i in range(1, 26)]
+    )
+    connection.commit()
+    connection.close()
+
+def test_migrations_upgrade_legacy_database():
+    from src.database import init_database
+    from src.migrations import load_migrations
+    from src.models.user import db
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'legacy.db')
+        legacy_database(path)
+        with file_backed_app(path) as app:  # migrates on startup
+            def positions():
+                with app.app_context():
+                    rows = db.session.execute(db.text('SELECT id, user_id, order_index FROM notes')).all()
+                return {row.id: (row.user_id, row.order_index) for row in rows}
+
+            # Each user's notes are numbered from 0, most recently updated first
+            expected = {}
+            for user_id in (1, 2):
+                ids = sorted((i for i in range(1, 26) if 1 + i % 2 == user_id), reverse=True)
+                expected.update({note_id: (user_id, index) for index, note_id in enumerate(ids)})
+            assert positions() == expected
+
+            with app.app_context():
+                versions = db.session.execute(db.text('SELECT version FROM schema_migrations ORDER BY version')).scalars().all()
+            assert versions == [migration.version for migration in load_migrations()]
+            assert init_database(app) == []
+
+            # A half-finished backfill is completed by running again, in batches
+            app.config['MIGRATION_BATCH_SIZE'] = 4
+            with app.app_context():
+                db.session.execute(db.text('UPDATE notes SET order_index = NULL WHERE id > 10'))
+                db.session.execute(db.text('DELETE FROM schema_migrations WHERE version = 2'))
+                db.session.commit()
+            assert [migration.version for migration in init_database(app)] == [2]
+            assert positions() == expected
+
+            client = app.test_client()
+            # The full-text index was built from the notes already there
+            assert len(client.get('/api/notes/search?q=Legacy').get_json()) == 25
+            assert app.config['FULL_TEXT_SEARCH'] == 'sqlite'
+            created = client.post('/api/notes', json={'title': 'New', 'content': ''}).get_json()
+            assert created['order_index'] == max(index for user_id, index in expected.values() if user_id == 1) + 1
+
+if __name__ == '__main__':
+    test_migrations_upgrade_legacy_database()
+    print('✅ migrations upgrade a legacy database')
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test PATCH /api/notes/<id>: splices are applied in order against the
+version named by If-Match or base_version, offsets count code points,
+out-of-range or malformed splices, values a note cannot store and non-object
+bodies are rejected with 400 (for PUT as well) without writing anything, and
+splices without a version get a 428.
+"""
+import os
+
+os.environ.setdefault('GITHUB_TOKEN', 'test-token')
+os.environ.setdefault('FLASK_CONFIG', 'testing')
+
+from src.main import create_app
+
+def make_note(client, content):
+    return client.post('/api/notes', json={'title': 'Patched', 'content': content}).get_json()
+
+def test_splices_are_applied_against_the_named_version():
+    client = create_app('testing').test_client()
+    note = make_note(client, 'The quick brown fox')
+    url = f"/api/notes/{note['id']}"
+
+    response = client.patch(url, headers={'If-Match': '"1"'}, json={'ops': [
+        {'field': 'content', 'start': 4, 'end': 9, 'text': 'slow'},
+        {'field': 'content', 'start': 15, 'end': 18, 'text': 'dog'},  # offsets after the first op
+        {'field': 'title', 'start': 7, 'end': 7, 'text': ' note'},
+    ]})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert 'content' not in body and body['title'] == 'Patched note' and body['version'] == 2
+    assert response.headers['ETag'] == '"2"'
+    assert client.get(url).get_json()['content'] == 'The slow brown dog'
+
+    # base_version in the body works like If-Match; offsets count code points
+    client.put(url, json={'content': '🙂 smile'})
+    response = client.patch(url, json={'base_version': 3, 'ops': [
+        {'field': 'content', 'start': 2, 'end': 7, 'text': 'grin'}
+    ]})
+    assert response.status_code == 200
+    assert client.get(url).get_json()['content'] == '🙂 grin'
+
+    # A splice against an older version is refused and nothing is written
+    response = client.patch(url, headers={'If-Match': '"3"'}, json={'ops': [
+        {'field': 'content', 'start': 0, 'end': 0, 'text': 'stale '}
+    ]})
+    assert response.status_code == 412 and response.get_json()['note']['content'] == '🙂 grin'
+
+def test_invalid_splices_are_rejected():
+    client = create_app('testing').test_client()
+    note = make_note(client, 'short')
+    url = f"/api/notes/{note['id']}"
+
+    for ops in (
+        [{'field': 'content', 'start': 3, 'end': 9, 'text': 'x'}],  # past the end
+        [{'field': 'content', 'start': 4, 'end': 2, 'text': 'x'}],  # reversed
+        [{'field': 'content', 'start': -1, 'end': 2, 'text': 'x'}],
+        [{'field': 'content', 'start': '0', 'end': 2, 'text': 'x'}],
+        [{'field': 'content', 'start': 0, 'end': 2, 'text': 5}],
+        [{'field': 'user_id', 'start': 0, 'end': 0, 'text': '1'}],
+        # valid on its own, but the second op runs against the shortened text
+        [{'field': 'content', 'start': 0, 'end': 5, 'text': ''}, {'field': 'content', 'start': 0, 'end': 1, 'text': ''}],
+    ):
+        response = client.patch(url, headers={'If-Match': '"1"'}, json={'ops': ops})
+        assert response.status_code == 400, ops
+    assert client.get(url).get_json()['content'] == 'short'
+    assert client.get(url).get_json()['version'] == 1
+
+    # Splices need a version to apply against; plain field updates do not
+    response = client.patch(url, json={'ops': [{'field': 'content', 'start': 0, 'end': 0, 'text': 'x'}]})
+    assert response.status_code == 428
+    assert client.patch(url, json={'title': 'Renamed'}).status_code == 200
+    assert client.patch(url, json={'title': 7}).status_code == 400
+
+def test_field_values_are_validated():
+    client = create_app('testing').test_client()
+    note = make_note(client, 'short')
+    url = f"/api/notes/{note['id']}"
+
+    for body in ({'title': 'x' * 201}, ['title', 'Listed'], 'text'):
+        assert client.patch(url, json=body).status_code == 400, body
+        assert client.put(url, json=body).status_code == 400, body
+    assert client.put(url, json={'title': None}).status_code == 400
+    assert client.put(url, json={'content': 5}).status_code == 400
+    # a splice that makes the title too long is refused like a plain value
+    response = client.patch(url, headers={'If-Match': '"1"'}, json={'ops': [
+        {'field': 'title', 'start': 0, 'end': 0, 'text': 'x' * 200}
+    ]})
+    assert response.status_code == 400
+    note = client.get(url).get_json()
+    assert (note['title'], note['content'], note['version']) == ('Patched', 'short', 1)
+
+if __name__ == '__main__':
+    test_splices_are_applied_against_the_named_version()
+    test_invalid_splices_are_rejected()
+    test_field_values_are_validated()
+    print('✅ note patches work')
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test note versions used for optimistic concurrency: edits increment the
+version, reorders do not, so an edit made against a version from before a
+reorder still applies, while one made against an older edit gets a 412 with
+the current note.
+"""
+import os
+
+os.environ.setdefault('GITHUB_TOKEN', 'test-token')
+os.environ.setdefault('FLASK_CONFIG', 'testing')
+
+from src.main import create_app
+
+def test_edit_after_reorder_is_not_a_conflict():
+    client = create_app('testing').test_client()
+    ids = [client.post('/api/notes', json={'title': f'Note {i}', 'content': 'x'}).get_json()['id'] for i in range(3)]
+    note = client.get(f'/api/notes/{ids[0]}').get_json()
+    assert note['version'] == 1
+
+    response = client.put(f'/api/notes/{ids[0]}', json={'content': 'edited'}, headers={'If-Match': '"1"'})
+    assert response.status_code == 200
+    assert response.get_json()['version'] == 2 and response.headers['ETag'] == '"2"'
+
+    # GET sends the version apart from its cache tag, which If-Match does not take
+    fetched = client.get(f'/api/notes/{ids[0]}')
+    assert fetched.headers['X-Note-Version'] == '2' and fetched.headers['ETag'].startswith('W/')
+    response = client.put(f'/api/notes/{ids[0]}', json={'content': 'x'}, headers={'If-Match': fetched.headers['ETag']})
+    assert response.status_code == 412
+
+    # Moves and reorders change order_index and updated_at, not the version
+    etag = fetched.headers['ETag']
+    assert client.put(f'/api/notes/{ids[0]}/move', json={'position': 2}).status_code == 200
+    assert client.put('/api/notes/reorder', json={'note_ids': ids[::-1]}).status_code == 200
+    moved = client.get(f'/api/notes/{ids[0]}', headers={'If-None-Match': etag})
+    assert moved.status_code == 200 and moved.get_json()['version'] == 2
+    assert client.get(f'/api/notes/{ids[0]}', headers={'If-None-Match': moved.headers['ETag']}).status_code == 304
+    assert [note['version'] for note in client.get('/api/notes').get_json()] == [1, 1, 2]
+
+    version = moved.headers['X-Note-Version']
+    response = client.patch(f'/api/notes/{ids[0]}', json={'title': 'Renamed'}, headers={'If-Match': f'"{version}"'})
+    assert response.status_code == 200
+    assert response.get_json()['version'] == 3 and response.headers['ETag'] == '"3"'
+
+    # An edit based on an older version is refused with the current note
+    response = client.patch(f'/api/notes/{ids[0]}', json={'title': 'Stale'}, headers={'If-Match': '"2"'})
+    assert response.status_code == 412
+    assert response.get_json()['note']['title'] == 'Renamed' and response.headers['ETag'] == '"3"'
+    response = client.put(f'/api/notes/{ids[0]}', json={'title': 'Stale'}, headers={'If-Match': '"1"'})
+    assert response.status_code == 412
+
+def test_bulk_updates_check_and_increment_versions():
+    client = create_app('testing').test_client()
+    first, second = (client.post('/api/notes', json={'title': title, 'content': ''}).get_json()['id']
+                     for title in ('First', 'Second'))
+    client.put(f'/api/notes/{second}/move', json={'position': 0})
+
+    results = client.post('/api/notes/bulk', json={'operations': [
+        {'op': 'update', 'id': first, 'content': 'bulk', 'version': 1},
+        {'op': 'update', 'id': second, 'content': 'bulk', 'version': '1'},
+    ]}).get_json()['results']
+    assert [(result['status'], result['version']) for result in results] == [(200, 2), (200, 2)]
+    assert client.get(f'/api/notes/{first}').get_json()['version'] == 2
+
+    results = client.post('/api/notes/bulk', json={'operations': [
+        {'op': 'update', 'id': first, 'content': 'stale', 'version': 1},
+        {'op': 'delete', 'id': second, 'version': 2},
+    ]}).get_json()['results']
+    assert [result['status'] for result in results] == [412, 204]
+    assert client.get(f'/api/notes/{first}').get_json()['content'] == 'bulk'
+
+if __name__ == '__main__':
+    test_edit_after_reorder_is_not_a_conflict()
+    test_bulk_updates_check_and_increment_versions()
+    print('✅ note versions work')
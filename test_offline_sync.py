@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test the server responses the web UI's offline outbox (replayWrite in
+public/index.html) depends on when it replays queued writes: a stale edit
+gets a 412 carrying the current note (kept, with the edit saved as a
+conflicted copy), edits and deletes of a note deleted elsewhere get a 404,
+and an accepted PATCH returns the new version without the content. Also
+checks that the development server serves the single public/index.html.
+"""
+import os
+
+os.environ.setdefault('GITHUB_TOKEN', 'test-token')
+os.environ.setdefault('FLASK_CONFIG', 'testing')
+
+from src.main import create_app, register_routes
+
+def test_replayed_writes_get_the_statuses_the_outbox_handles():
+    client = create_app('testing').test_client()
+
+    # create: the body replaces the note's temporary id
+    created = client.post('/api/notes', json={'title': 'Offline', 'content': 'draft'})
+    assert created.status_code == 201
+    note = created.get_json()
+    assert note['version'] == 1
+
+    # update based on the current version: new version, no content echoed
+    accepted = client.patch(f"/api/notes/{note['id']}", json={'content': 'draft 2'}, headers={'If-Match': '"1"'})
+    assert accepted.status_code == 200
+    assert accepted.get_json()['version'] == 2 and 'content' not in accepted.get_json()
+
+    # update queued against a version edited elsewhere meanwhile: 412 with the server's note
+    client.put(f"/api/notes/{note['id']}", json={'title': 'Edited elsewhere'})
+    stale = client.patch(f"/api/notes/{note['id']}", json={'content': 'offline edit'}, headers={'If-Match': '"2"'})
+    assert stale.status_code == 412
+    assert stale.get_json()['note'] == client.get(f"/api/notes/{note['id']}").get_json()
+    assert stale.get_json()['note']['content'] == 'draft 2'
+
+    # a queued move does not make a queued edit of the same note stale
+    other = client.post('/api/notes', json={'title': 'Other', 'content': ''}).get_json()
+    assert client.put(f"/api/notes/{note['id']}/move", json={'position': 1}).status_code == 200
+    moved = client.patch(f"/api/notes/{note['id']}", json={'content': 'after move'}, headers={'If-Match': '"3"'})
+    assert moved.status_code == 200
+
+    # update and delete of a note deleted elsewhere: 404 (re-created / dropped by the client)
+    assert client.delete(f"/api/notes/{other['id']}").status_code == 204
+    gone = client.patch(f"/api/notes/{other['id']}", json={'title': 'Lost'}, headers={'If-Match': '"1"'})
+    assert gone.status_code == 404
+    assert client.delete(f"/api/notes/{other['id']}").status_code == 404
+
+def test_development_server_serves_the_public_frontend():
+    app = create_app('testing')
+    register_routes(app)
+    client = app.test_client()
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'public', 'index.html'), 'rb') as f:
+        index = f.read()
+    assert client.get('/').data == index
+    assert client.get('/notes/123').data == index
+    assert client.get('/favicon.ico').status_code == 200
+
+if __name__ == '__main__':
+    test_replayed_writes_get_the_statuses_the_outbox_handles()
+    test_development_server_serves_the_public_frontend()
+    print('✅ outbox replay responses work')
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Test that concurrent note creation never hands out the same order_index,
+that moving a note only rewrites the notes it moves past, and that the web
+UI's local move (moveOrderIndex in public/index.html, run with node) gives
+every note the index the server does.
+
+Runs hundreds of parallel creates through the Flask test client against a
+file-backed SQLite database (an in-memory one shares a single connection).
+"""
+import json
+import os
+import random
+import re
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+os.environ.setdefault('GITHUB_TOKEN', 'test-token')
+os.environ.setdefault('FLASK_CONFIG', 'testing')
+
+from conftest import file_backed_app
+from src.main import create_app
+
+CREATES = 300
+THREADS = 32
+
+def test_concurrent_creates_get_unique_order_indexes(file_app):
+    app = file_app
+
+    def create(i):
+        with app.test_client() as client:
+            if i % 10 == 0:
+                response = client.post('/api/templates/meeting/create', json={'title': f'Meeting {i}'})
+                return response.status_code, response.get_json()['note']['id']
+            response = client.post('/api/notes', json={'title': f'Note {i}', 'content': 'x'})
+            return response.status_code, response.get_json()['id']
+
+    with ThreadPoolExecutor(THREADS) as pool:
+        results = list(pool.map(create, range(CREATES)))
+    assert all(status in (200, 201) for status, _ in results)
+
+    client = app.test_client()
+    notes = client.get('/api/notes').get_json()
+    indexes = [note['order_index'] for note in notes]
+    assert len(notes) == CREATES
+    assert sorted(indexes) == list(range(1, CREATES + 1))
+
+    # A bulk create continues after the last index, and a reorder never
+    # lets later creates reuse an index
+    bulk = client.post('/api/notes/bulk', json={'operations': [
+        {'op': 'create', 'title': f'Bulk {i}', 'content': ''} for i in range(5)
+    ]}).get_json()
+    assert [r['note']['order_index'] for r in bulk['results']] == list(range(CREATES + 1, CREATES + 6))
+
+    ids = [note['id'] for note in client.get('/api/notes').get_json()]
+    assert client.put('/api/notes/reorder', json={'note_ids': ids[::-1]}).status_code == 200
+    created = client.post('/api/notes', json={'title': 'After reorder', 'content': ''}).get_json()
+    assert created['order_index'] == CREATES + 6
+    assert len({note['order_index'] for note in client.get('/api/notes').get_json()}) == CREATES + 6
+
+def test_move_writes_only_the_rows_it_passes():
+    app = create_app('testing')
+    client = app.test_client()
+    ids = [client.post('/api/notes', json={'title': f'Note {i}', 'content': ''}).get_json()['id'] for i in range(10)]
+
+    def listing():
+        return {note['id']: note for note in client.get('/api/notes').get_json()}
+
+    def move(note_id, position):
+        response = client.put(f'/api/notes/{note_id}/move', json={'position': position})
+        assert response.status_code == 200
+        after = listing()
+        assert [note['id'] for note in client.get('/api/notes').get_json()].index(note_id) == response.get_json()['position']
+        return response.get_json()['updated'], after
+
+    # Indexes are consecutive: moving the 8th note to 3rd shifts the 5 notes
+    # it passes and leaves every other row untouched
+    before = listing()
+    updated, after = move(ids[7], 2)
+    assert updated == 6
+    assert [note_id for note_id in after] == ids[:2] + [ids[7]] + ids[2:7] + ids[8:]
+    changed = {note_id for note_id in ids if after[note_id]['updated_at'] != before[note_id]['updated_at']}
+    assert changed == set(ids[2:8])
+    assert len({note['order_index'] for note in after.values()}) == len(ids)
+
+    # Moving down shifts the other way
+    updated, after = move(ids[0], 4)
+    assert updated == 5
+    assert [note_id for note_id in after] == [ids[1], ids[7], ids[2], ids[3], ids[0]] + ids[4:7] + ids[8:]
+
+    # The ends of the list and holes left by deletes take a free index
+    assert move(ids[9], 0)[0] == 1
+    assert move(ids[9], 100)[0] == 1
+    client.delete(f'/api/notes/{ids[4]}')
+    # (positions count the list without the moved note)
+    others = [note_id for note_id in listing() if note_id != ids[1]]
+    updated, after = move(ids[1], others.index(ids[5]))
+    assert updated == 1
+    assert list(after)[list(after).index(ids[1]) + 1] == ids[5]
+
+    # A note created afterwards still goes last
+    created = client.post('/api/notes', json={'title': 'Last', 'content': ''}).get_json()
+    assert list(listing())[-1] == created['id']
+
+def test_client_moves_match_the_server():
+    if shutil.which('node') is None:
+        pytest.skip('node is not installed')
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'public', 'index.html')) as f:
+        move_order_index = re.search(r'function moveOrderIndex\(.*?\n        \}\n', f.read(), re.S).group(0)
+
+    app = create_app('testing')
+    client = app.test_client()
+    rng = random.Random(3)
+    # Gaps, ties (legacy data) and consecutive runs
+    for order_index in sorted(rng.choice([1, 1, 2, 5, 5, 9, 10, 11, 12, 20, 40]) for _ in range(14)):
+        note = client.post('/api/notes', json={'title': 'Note', 'content': ''}).get_json()
+        with app.app_context():
+            from src.models.note import Note, db
+            Note.query.filter_by(id=note['id']).update({'order_index': order_index})
+            db.session.commit()
+
+    for _ in range(30):
+        notes = client.get('/api/notes').get_json()
+        moved, position = rng.choice(notes)['id'], rng.randint(0, len(notes))
+        script = move_order_index + f"""
+            const notes = {json.dumps(notes)};
+            moveOrderIndex(notes, notes.find(note => note.id === {moved}), {position});
+            console.log(JSON.stringify(notes.map(note => [note.id, note.order_index])));
+        """
+        local = subprocess.run(['node', '-e', script], capture_output=True, text=True, check=True).stdout
+        assert client.put(f'/api/notes/{moved}/move', json={'position': position}).status_code == 200
+        server = {note['id']: note['order_index'] for note in client.get('/api/notes').get_json()}
+        assert dict(json.loads(local)) == server, (moved, position)
+
+if __name__ == '__main__':
+    with file_backed_app() as app:
+        test_concurrent_creates_get_unique_order_indexes(app)
+    test_move_writes_only_the_rows_it_passes()
+    test_client_moves_match_the_server()
+    print('✅ order_index allocation is race-free')
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test keyset pagination of GET /api/notes: walking the cursor returns every
+note once, in the order of the unpaginated list, also when order_index is
+NULL or tied and updated_at is tied. ``fields`` projects the listed
+columns, and a malformed cursor, limit or field list gets a 400.
+"""
+import os
+
+os.environ.setdefault('GITHUB_TOKEN', 'test-token')
+os.environ.setdefault('FLASK_CONFIG', 'testing')
+
+from src.main import create_app
+from src.models.note import db
+from src.routes.note import encode_cursor
+
+def listing_client():
+    """Test client with 12 notes: three without an order_index, and the
+    rest sharing order_index values and updated_at timestamps"""
+    app = create_app('testing')
+    client = app.test_client()
+    client.post('/api/notes/bulk', json={'operations': [
+        {'op': 'create', 'title': f'Note {i}', 'content': f'Body {i} ' * 40} for i in range(12)
+    ]})
+    with app.app_context():
+        db.session.execute(db.text('UPDATE notes SET order_index = NULL WHERE id IN (2, 7, 11)'))
+        db.session.execute(db.text('UPDATE notes SET order_index = 5 WHERE id IN (1, 4, 8, 9)'))
+        db.session.execute(db.text("UPDATE notes SET updated_at = '2024-01-01 00:00:00.000000' WHERE id IN (4, 7, 8, 11)"))
+        db.session.commit()
+    return client
+
+def walk(client, limit, fields=None):
+    ids, cursor = [], None
+    for _ in range(20):
+        params = {'limit': limit}
+        if cursor:
+            params['cursor'] = cursor
+        if fields:
+            params['fields'] = fields
+        page = client.get('/api/notes', query_string=params).get_json()
+        assert len(page['notes']) <= limit
+        ids += [note['id'] for note in page['notes']]
+        cursor = page['next_cursor']
+        if cursor is None:
+            return ids
+    raise AssertionError(f'Cursor did not reach the end: {ids}')
+
+def test_cursor_walks_every_note_once_in_list_order():
+    client = listing_client()
+    listed = client.get('/api/notes').get_json()
+    expected = [note['id'] for note in listed]
+    assert sorted(expected) == list(range(1, 13))
+    # Notes without an order_index come first
+    assert [note['order_index'] for note in listed[:3]] == [None, None, None]
+
+    for limit in (1, 2, 3, 5, 12, 50):
+        assert walk(client, limit) == expected, limit
+
+def test_fields_are_projected():
+    client = listing_client()
+    page = client.get('/api/notes?limit=4&fields=id,preview').get_json()
+    assert all(sorted(note) == ['id', 'preview'] for note in page['notes'])
+    assert all(len(note['preview']) == 120 for note in page['notes'])
+    assert walk(client, 4, fields='id,title') == [note['id'] for note in client.get('/api/notes').get_json()]
+
+def test_malformed_parameters_are_rejected():
+    client = listing_client()
+    for query in (
+        'limit=ten',
+        'fields=id,secret',
+        'cursor=not-a-cursor!',
+        f"cursor={encode_cursor({'order_index': 1})}",
+        f"cursor={encode_cursor([1, 'yesterday', 3])}",
+        f"cursor={encode_cursor([1, 20240101, 3])}",
+    ):
+        response = client.get(f'/api/notes?{query}')
+        assert response.status_code == 400, query
+        assert 'error' in response.get_json()
+
+if __name__ == '__main__':
+    test_cursor_walks_every_note_once_in_list_order()
+    test_fields_are_projected()
+    test_malformed_parameters_are_rejected()
+    print('✅ keyset pagination works')
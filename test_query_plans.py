@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test that SQLite answers the hot note queries from the composite indexes,
+without a full scan or a separate sort step.
+
+Captures the SQL each endpoint sends and runs it through EXPLAIN QUERY PLAN.
+"""
+import os
+
+os.environ.setdefault('GITHUB_TOKEN', 'test-token')
+os.environ.setdefault('FLASK_CONFIG', 'testing')
+
+from sqlalchemy import event
+from src.main import create_app
+from src.models.user import db
+
+def query_plans(app, client, url):
+    """``[(sql, plan lines)]`` for the ORDER BY statements run by GET ``url``"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if 'ORDER BY' in statement and not statement.startswith('EXPLAIN'):
+            statements.append((statement, parameters))
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', capture)
+    try:
+        assert client.get(url).status_code == 200
+    finally:
+        event.remove(engine, 'before_cursor_execute', capture)
+
+    with app.app_context():
+        connection = db.session.connection()
+        return [
+            (statement, [row[-1] for row in connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters)])
+            for statement, parameters in statements
+        ]
+
+def assert_uses_index(app, client, url, index, seek=None):
+    plans = query_plans(app, client, url)
+    assert plans, f'{url} ran no ORDER BY query'
+    for statement, plan in plans:
+        detail = ' | '.join(plan)
+        assert index in detail, f'{url}: expected {index}, got {detail}'
+        assert 'TEMP B-TREE' not in detail, f'{url}: sorts in memory: {detail}'
+        if seek:
+            assert f'SEARCH notes USING INDEX {index} ({seek})' in detail, f'{url}: scans {index}: {detail}'
+
+def test_hot_queries_use_composite_indexes():
+    app = create_app('testing')
+    client = app.test_client()
+    for i in range(6):
+        client.post('/api/notes', json={'title': f'Note {i}', 'content': f'content {i}'})
+    note_id = client.get('/api/notes').get_json()[0]['id']
+    client.post(f'/api/notes/{note_id}/share', json={})
+
+    assert_uses_index(app, client, '/api/notes', 'ix_notes_list_order')
+    cursor = client.get('/api/notes?limit=2').get_json()['next_cursor']
+    assert_uses_index(app, client, f'/api/notes?limit=2&cursor={cursor}', 'ix_notes_list_order', seek='order_index>?')
+
+    since = client.get('/api/notes/changes').get_json()['cursor']
+    assert_uses_index(app, client, f'/api/notes/changes?since={since}', 'ix_notes_updated_at', seek='updated_at>?')
+
+    assert_uses_index(app, client, '/api/advanced-search', 'ix_notes_user_updated', seek='user_id=?')
+    assert_uses_index(app, client, '/api/advanced-search?sort=updated_asc', 'ix_notes_user_updated')
+    assert_uses_index(app, client, '/api/advanced-search?sort=created_desc&date_from=2020-01-01',
+                      'ix_notes_user_created', seek='user_id=? AND created_at>?')
+    assert_uses_index(app, client, '/api/advanced-search?sort=title_asc', 'ix_notes_user_title')
+
+    assert_uses_index(app, client, f'/api/notes/{note_id}/shares', 'ix_shared_notes_note_id')
+
+if __name__ == '__main__':
+    test_hot_queries_use_composite_indexes()
+    print('✅ hot queries use the composite indexes')
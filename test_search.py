@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test full-text search over the SQLite FTS5 index: every query term must
+match a word prefix, title matches rank above content matches, snippets are
+escaped with the matches highlighted, the index follows edits and deletes,
+advanced search can restrict matching to content and sort by relevance, and
+without the index search falls back to substring matching.
+"""
+import os
+
+os.environ.setdefault('GITHUB_TOKEN', 'test-token')
+os.environ.setdefault('FLASK_CONFIG', 'testing')
+
+from src.main import create_app
+
+NOTES = [
+    ('Packing list', 'Passport, charger and a book about Paris'),
+    ('Paris trip', 'Flights booked, hotel near the <Louvre>'),
+    ('Budget', 'Paris hotel budget and travel costs'),
+    ('Groceries', 'Milk, eggs, bread'),
+]
+
+def search_client():
+    app = create_app('testing')
+    client = app.test_client()
+    ids = {title: client.post('/api/notes', json={'title': title, 'content': content}).get_json()['id']
+           for title, content in NOTES}
+    return app, client, ids
+
+def search(client, query):
+    response = client.get('/api/notes/search', query_string={'q': query})
+    assert response.status_code == 200
+    return response.get_json()
+
+def test_results_are_ranked_and_highlighted():
+    app, client, ids = search_client()
+    results = search(client, 'paris')
+    assert app.config['FULL_TEXT_SEARCH'] == 'sqlite'
+    assert {note['id'] for note in results} == {ids['Packing list'], ids['Paris trip'], ids['Budget']}
+    # A title match outranks matches in content only
+    assert results[0]['id'] == ids['Paris trip']
+
+    # Terms match word prefixes, and every term has to match
+    assert [note['id'] for note in search(client, 'trav')] == [ids['Budget']]
+    assert [note['id'] for note in search(client, 'paris hot budg')] == [ids['Budget']]
+    assert search(client, 'paris eggs') == []
+
+    # Snippets are escaped before the matches are marked
+    snippet = search(client, 'louvre')[0]['snippet']
+    assert '&lt;<span class="highlight">Louvre</span>&gt;' in snippet
+
+    # Query syntax is not passed through to FTS5
+    assert [note['id'] for note in search(client, '"milk OR')] == []
+    assert [note['id'] for note in search(client, 'milk*')] == [ids['Groceries']]
+    assert search(client, '') == [] and search(client, '***') == []
+
+def test_index_follows_edits_and_deletes():
+    _, client, ids = search_client()
+    client.put(f"/api/notes/{ids['Groceries']}", json={'content': 'Croissants from Paris'})
+    assert search(client, 'milk') == []
+    assert ids['Groceries'] in [note['id'] for note in search(client, 'croissant')]
+
+    client.delete(f"/api/notes/{ids['Paris trip']}")
+    assert ids['Paris trip'] not in [note['id'] for note in search(client, 'paris')]
+
+def test_advanced_search_and_fallback():
+    app, client, ids = search_client()
+    found = client.get('/api/advanced-search?q=paris&sort=relevance').get_json()['notes']
+    assert found[0]['id'] == ids['Paris trip'] and len(found) == 3
+    found = client.get('/api/advanced-search?q=paris&content_only=true').get_json()['notes']
+    assert {note['id'] for note in found} == {ids['Packing list'], ids['Budget']}
+
+    # Without the index, the original substring match is used
+    app.config['FULL_TEXT_SEARCH'] = None
+    results = search(client, 'ari')
+    assert {note['id'] for note in results} == {ids['Packing list'], ids['Paris trip'], ids['Budget']}
+    assert 'snippet' not in results[0]
+
+if __name__ == '__main__':
+    test_results_are_ranked_and_highlighted()
+    test_index_follows_edits_and_deletes()
+    test_advanced_search_and_fallback()
+    print('✅ full-text search works')
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test the public shared-note page: the rendered page is cached per share
+token and re-rendered when the note changes, responses carry a strong ETag,
+Last-Modified and a public max-age no longer than the link lives, repeat
+views revalidate to 304, and revoked or password-protected shares are never
+served from the cache.
+"""
+import os
+from datetime import datetime, timedelta
+
+os.environ.setdefault('GITHUB_TOKEN', 'test-token')
+os.environ.setdefault('FLASK_CONFIG', 'testing')
+
+from src.main import create_app
+from src.models.share import SharedNote
+from src.models.user import db
+from src.routes import shared
+
+class CountingTemplate:
+    """Wraps the note page template to count renders"""
+
+    def __init__(self, template):
+        self.template = template
+        self.renders = 0
+
+    def render(self, **context):
+        self.renders += 1
+        return self.template.render(**context)
+
+def sharing_client():
+    app = create_app('testing')
+    client = app.test_client()
+    note = client.post('/api/notes', json={'title': 'Shared', 'content': 'Hello <b>world</b>'}).get_json()
+    return app, client, note
+
+def share(client, note, **options):
+    return client.post(f"/api/notes/{note['id']}/share", json=options).get_json()['share']
+
+def test_pages_are_cached_and_revalidated():
+    template = shared.NOTE_TEMPLATE = CountingTemplate(shared.NOTE_TEMPLATE)
+    try:
+        app, client, note = sharing_client()
+        token = share(client, note)['share_token']
+        url = f'/shared/{token}'
+
+        first = client.get(url)
+        assert first.status_code == 200 and b'Hello &lt;b&gt;world&lt;/b&gt;' in first.data
+        etag, weak = first.get_etag()
+        assert etag and not weak and first.last_modified is not None
+        assert first.headers['Cache-Control'] == 'public, max-age=60'
+
+        # Served from the render cache, and revalidated without a body
+        assert client.get(url).data == first.data and template.renders == 1
+        revalidated = client.get(url, headers={'If-None-Match': f'"{etag}"'})
+        assert revalidated.status_code == 304 and revalidated.data == b''
+        modified_since = client.get(url, headers={'If-Modified-Since': first.headers['Last-Modified']})
+        assert modified_since.status_code == 304
+        assert template.renders == 1
+
+        # Editing the note renders a new page with a new tag
+        client.put(f"/api/notes/{note['id']}", json={'content': 'Edited'})
+        edited = client.get(url, headers={'If-None-Match': f'"{etag}"'})
+        assert edited.status_code == 200 and b'Edited' in edited.data
+        assert edited.get_etag()[0] != etag and template.renders == 2
+
+        # Revoking the share drops the cached page
+        assert client.delete(f'/api/shares/{token}').status_code == 200
+        assert client.get(url).status_code == 403
+        assert token not in app.extensions['shared_page_cache'].entries
+    finally:
+        shared.NOTE_TEMPLATE = template.template
+
+def test_max_age_and_password_pages():
+    app, client, note = sharing_client()
+
+    # A link about to expire is not cached past its expiry
+    token = share(client, note, expires_days=1)['share_token']
+    with app.app_context():
+        SharedNote.query.filter_by(share_token=token).update(
+            {'expires_at': datetime.utcnow() + timedelta(seconds=30)}
+        )
+        db.session.commit()
+    max_age = int(client.get(f'/shared/{token}').headers['Cache-Control'].split('max-age=')[1])
+    assert 0 < max_age <= 30
+
+    token = share(client, note, password='secret')['share_token']
+    locked = client.get(f'/shared/{token}')
+    assert locked.status_code == 401 and locked.headers['Cache-Control'] == 'private, no-store'
+    opened = client.get(f'/shared/{token}?password=secret')
+    assert opened.status_code == 200 and b'Hello' in opened.data
+    assert opened.headers['Cache-Control'] == 'private, no-store' and 'ETag' not in opened.headers
+    assert token not in app.extensions['shared_page_cache'].entries
+
+    assert client.get('/shared/no-such-token').status_code == 404
+
+if __name__ == '__main__':
+    test_pages_are_cached_and_revalidated()
+    test_max_age_and_password_pages()
+    print('✅ shared pages are cached and revalidated')
@@ -4,6 +4,7 @@ Test script for the Smart Note Generation feature
 """
 import requests
 import json
+import time
 
 BASE_URL = "http://localhost:5000/api"
 
@@ -70,14 +71,20 @@ def test_smart_note_generation():
     try:
         response = requests.post(f"{BASE_URL}/notes/generate-and-save", json=save_test)
         
-        if response.status_code == 201:
-            result = response.json()
+        # The note is generated by a background job; poll it until it finishes
+        job = response.json()
+        while response.status_code == 202 and job.get('status') in ('queued', 'running'):
+            time.sleep(1)
+            job = requests.get(f"http://localhost:5000{response.json()['status_url']}").json()
+        
+        if job.get('status') == 'succeeded':
+            result = job['result']
             print(f"   ✅ Note created and saved successfully!")
             print(f"   📝 Note ID: {result['note']['id']}")
             print(f"   📝 Saved Title: {result['note']['title']}")
             print(f"   📄 Saved Content: {result['note']['content'][:100]}...")
         else:
-            error = response.json()
+            error = job
             print(f"   ❌ Save failed: {error.get('error', 'Unknown error')}")
             
     except Exception as e:
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Test the Server-Sent Events endpoints: responses are unbuffered
+``text/event-stream`` bodies made of ``event:`` / single-line ``data:``
+messages separated by blank lines, even when the model output contains
+newlines. Tokens concatenate to the ``done`` payload, a cached translation is
+streamed without the LLM, and a failing model ends the stream with an
+``error`` event. The LLM is a fake streaming client.
+"""
+import json
+import os
+import threading
+from types import SimpleNamespace
+
+os.environ.setdefault('GITHUB_TOKEN', 'test-token')
+os.environ.setdefault('FLASK_CONFIG', 'testing')
+
+from src import llm
+from src.main import create_app
+
+class FakeStream:
+    """Stands in for client.chat.completions, streaming its reply in pieces"""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.lock = threading.Lock()
+        self.calls = 0
+
+    def create(self, messages, stream=False, **kwargs):
+        with self.lock:
+            self.calls += 1
+        text = self.reply(messages[-1]['content'])
+        return (SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text[i:i + 5]))])
+                for i in range(0, len(text), 5))
+
+def fake_llm(reply):
+    def decorate(test):
+        def run():
+            completions = FakeStream(reply)
+            previous_client, llm._client = llm._client, SimpleNamespace(chat=SimpleNamespace(completions=completions))
+            try:
+                test(create_app('testing').test_client(), completions)
+            finally:
+                llm._client = previous_client
+        run.__name__ = test.__name__
+        return run
+    return decorate
+
+def read_events(response):
+    """Parse an SSE body into ``[(event, data)]``, checking the framing"""
+    assert response.status_code == 200 and response.is_streamed
+    assert response.mimetype == 'text/event-stream'
+    assert response.headers['Cache-Control'] == 'no-cache' and response.headers['X-Accel-Buffering'] == 'no'
+    body = response.get_data(as_text=True)
+    assert body.endswith('\n\n')
+    events = []
+    for message in body[:-2].split('\n\n'):
+        event, data = message.split('\n')
+        assert event.startswith('event: ') and data.startswith('data: ')
+        events.append((event[len('event: '):], json.loads(data[len('data: '):])))
+    return events
+
+def translated(prompt):
+    return '[fr] ' + prompt.split('\n\n', 1)[1]
+
+@fake_llm(lambda prompt: '{"Title": "Shopping",\n"Notes": "Buy milk\\nand eggs", "Tags": ["errands"]}')
+def test_generate_stream_framing(client, completions):
+    events = read_events(client.post('/api/notes/generate/stream', json={'input': 'milk eggs'}))
+    *tokens, (kind, done) = events
+    assert kind == 'done' and len(tokens) > 1 and all(kind == 'token' for kind, _ in tokens)
+    assert json.loads(''.join(data['text'] for _, data in tokens)) == {
+        'Title': 'Shopping', 'Notes': 'Buy milk\nand eggs', 'Tags': ['errands']
+    }
+    assert done['generated'] == {'title': 'Shopping', 'content': 'Buy milk\nand eggs', 'tags': ['errands']}
+
+    assert client.post('/api/notes/generate/stream', json={'input': ' '}).status_code == 400
+
+@fake_llm(translated)
+def test_translate_stream_tokens_match_done(client, completions):
+    note = client.post('/api/notes', json={'title': 'Trip', 'content': 'Day one\n\n# Plans\nVisit Paris'}).get_json()
+    url = f"/api/notes/{note['id']}/translate/stream"
+
+    events = read_events(client.post(url, json={'target_language': 'French'}))
+    (kind, done), tokens = events[-1], events[:-1]
+    assert kind == 'done' and done['cache'] == {'title': 'miss', 'content': 'miss'}
+    for field in ('title', 'content'):
+        assert ''.join(data['text'] for _, data in tokens if data['field'] == field) == done['translated'][field]
+    assert done['translated']['title'] == '[fr] Trip'
+    assert done['translated']['content'].startswith('[fr] Day one')
+
+    # The second stream is served from the cache
+    calls = completions.calls
+    events = read_events(client.post(url, json={'target_language': 'French'}))
+    assert events[-1][1]['cache'] == {'title': 'hit', 'content': 'hit'}
+    assert events[-1][1]['translated'] == done['translated'] and completions.calls == calls
+
+    assert client.post(url, json={}).status_code == 400
+
+def unavailable(prompt):
+    raise RuntimeError('model unavailable')
+
+@fake_llm(unavailable)
+def test_model_errors_end_the_stream(client, completions):
+    assert read_events(client.post('/api/notes/generate/stream', json={'input': 'milk'})) == [
+        ('error', {'error': 'model unavailable'})
+    ]
+    note = client.post('/api/notes', json={'title': 'Trip', 'content': 'Visit Paris'}).get_json()
+    events = read_events(client.post(f"/api/notes/{note['id']}/translate/stream", json={'target_language': 'French'}))
+    assert events[-1] == ('error', {'error': 'model unavailable'})
+    assert all(kind != 'done' for kind, _ in events)
+
+if __name__ == '__main__':
+    test_generate_stream_framing()
+    test_translate_stream_tokens_match_done()
+    test_model_errors_end_the_stream()
+    print('✅ SSE streams are framed correctly')
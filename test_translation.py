@@ -4,8 +4,21 @@ Test script to demonstrate the translation functionality
 """
 import requests
 import json
+import time
 
 BASE_URL = "http://localhost:5000/api"
+SERVER_URL = "http://localhost:5000"
+
+def wait_for_job(response, timeout=120):
+    """Poll the job returned by a 202 response until it finishes"""
+    status_url = SERVER_URL + response.json()['status_url']
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = requests.get(status_url).json()
+        if job['status'] in ('succeeded', 'failed'):
+            return job
+        time.sleep(1)
+    return {'status': 'failed', 'error': 'Timed out waiting for job'}
 
 def test_translation_functionality():
     print("🌍 Testing Translation Functionality\n")
@@ -31,15 +44,16 @@ def test_translation_functionality():
     translation_data = {"target_language": "Spanish"}
     
     response = requests.post(f"{BASE_URL}/notes/{note_id}/translate", json=translation_data)
-    if response.status_code == 200:
-        result = response.json()
+    job = wait_for_job(response) if response.status_code == 202 else {'status': 'failed'}
+    if job['status'] == 'succeeded':
+        result = job['result']
         print(f"   ✅ Translation successful!")
         print(f"   📝 Original Title: {result['original']['title']}")
         print(f"   🌍 Spanish Title: {result['translated']['title']}")
         print(f"   📝 Original Content: {result['original']['content'][:100]}...")
         print(f"   🌍 Spanish Content: {result['translated']['content'][:100]}...")
     else:
-        error = response.json()
+        error = job if 'error' in job else response.json()
         print(f"   ❌ Translation failed: {error.get('error', 'Unknown error')}")
         return
     
@@ -48,15 +62,16 @@ def test_translation_functionality():
     translation_data = {"target_language": "French"}
     
     response = requests.post(f"{BASE_URL}/notes/{note_id}/translate", json=translation_data)
-    if response.status_code == 200:
-        result = response.json()
+    job = wait_for_job(response) if response.status_code == 202 else {'status': 'failed'}
+    if job['status'] == 'succeeded':
+        result = job['result']
         print(f"   ✅ Translation successful!")
         print(f"   📝 Original Title: {result['original']['title']}")
         print(f"   🌍 French Title: {result['translated']['title']}")
         print(f"   📝 Original Content: {result['original']['content'][:100]}...")
         print(f"   🌍 French Content: {result['translated']['content'][:100]}...")
     else:
-        error = response.json()
+        error = job if 'error' in job else response.json()
         print(f"   ❌ Translation failed: {error.get('error', 'Unknown error')}")
     
     # 4. Test translation to Japanese
@@ -64,15 +79,16 @@ def test_translation_functionality():
     translation_data = {"target_language": "Japanese"}
     
     response = requests.post(f"{BASE_URL}/notes/{note_id}/translate", json=translation_data)
-    if response.status_code == 200:
-        result = response.json()
+    job = wait_for_job(response) if response.status_code == 202 else {'status': 'failed'}
+    if job['status'] == 'succeeded':
+        result = job['result']
         print(f"   ✅ Translation successful!")
         print(f"   📝 Original Title: {result['original']['title']}")
         print(f"   🌍 Japanese Title: {result['translated']['title']}")
         print(f"   📝 Original Content: {result['original']['content'][:100]}...")
         print(f"   🌍 Japanese Content: {result['translated']['content'][:100]}...")
     else:
-        error = response.json()
+        error = job if 'error' in job else response.json()
         print(f"   ❌ Translation failed: {error.get('error', 'Unknown error')}")
     
     print(f"\n🎉 Translation functionality test completed!")
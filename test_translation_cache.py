@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Test the translation cache: unchanged text is served without the LLM,
+editing one paragraph of a long note only re-translates the chunk around it,
+expired entries are misses and get purged, and the least recently used
+entries are evicted past the size limit. The LLM is a fake client.
+"""
+import os
+import threading
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+os.environ.setdefault('GITHUB_TOKEN', 'test-token')
+os.environ.setdefault('FLASK_CONFIG', 'testing')
+
+from src import llm
+from src.main import create_app
+from src.models.translation import NoteTranslation
+from src.models.user import db
+from src.translation import (evict_translations, estimate_tokens, split_blocks, split_into_chunks, text_hash,
+                             translate_fields)
+
+class FakeTranslator:
+    """Stands in for client.chat.completions; "translates" by tagging the text"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.texts = []
+
+    def create(self, messages, stream=False, **kwargs):
+        text = messages[-1]['content'].split('\n\n', 1)[1]
+        with self.lock:
+            self.texts.append(text)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=f'[fr] {text}'))])
+
+def translate(*texts):
+    """Translate each text as its own field; returns (translations, hits)"""
+    result = translate_fields({str(i): text for i, text in enumerate(texts)}, 'French')
+    db.session.commit()
+    return result
+
+def cached_texts():
+    return {row.text_hash for row in NoteTranslation.query}
+
+def with_fake_llm(test):
+    def run():
+        translator = FakeTranslator()
+        previous_client, llm._client = llm._client, SimpleNamespace(chat=SimpleNamespace(completions=translator))
+        try:
+            app = create_app('testing')
+            with app.app_context():
+                test(app, translator)
+        finally:
+            llm._client = previous_client
+    run.__name__ = test.__name__
+    return run
+
+@with_fake_llm
+def test_unchanged_text_is_served_from_cache(app, translator):
+    translations, hits = translate('Hello', 'World')
+    assert translations == {'0': '[fr] Hello', '1': '[fr] World'}
+    assert hits == {'0': False, '1': False}
+    assert sorted(translator.texts) == ['Hello', 'World']
+
+    translator.texts.clear()
+    translations, hits = translate('Hello', 'World', 'Hello')
+    assert translations == {'0': '[fr] Hello', '1': '[fr] World', '2': '[fr] Hello'}
+    assert hits == {'0': True, '1': True, '2': True}
+    assert translator.texts == []
+    assert NoteTranslation.query.filter_by(text_hash=text_hash('Hello')).one().hit_count == 1
+
+@with_fake_llm
+def test_editing_a_paragraph_keeps_later_chunks_cached(app, translator):
+    app.config['TRANSLATION_CHUNK_TOKENS'] = 120
+    paragraphs = [f'Paragraph {i}. ' + 'Some words here. ' * 4 for i in range(24)]
+    paragraphs[3] = '\n'.join(f'Long line {i} ' + 'more words ' * 6 for i in range(8))  # split further
+    content = '# Title\n\n' + '\n\n'.join(paragraphs)
+    chunks = split_into_chunks(content)
+    # Blocks are packed several to a request, within the budget
+    assert ''.join(chunks) == content
+    assert len(chunks) < len(split_blocks(content)) // 2
+    assert all(estimate_tokens(chunk) <= 120 for chunk in chunks)
+    translations, _ = translate(content)
+    assert len(translator.texts) == len(chunks)
+    assert translations['0'].count('[fr] ') == len(chunks)
+
+    # Editing a paragraph re-translates only the chunks up to the next
+    # boundary block; boundaries elsewhere follow the text, not positions
+    translator.texts.clear()
+    paragraphs[10] += ' An added sentence.'
+    edited = '# Title\n\n' + '\n\n'.join(paragraphs)
+    new_chunks = [chunk for chunk in split_into_chunks(edited) if chunk not in chunks]
+    translations, hits = translate(edited)
+    assert hits == {'0': False}
+    assert sorted(translator.texts) == sorted(chunk.strip() for chunk in new_chunks)
+    assert 1 <= len(translator.texts) <= 2
+    assert any('Paragraph 10.' in text for text in translator.texts)
+    assert translations['0'].startswith('[fr] # Title') and 'Paragraph 23.' in translations['0']
+
+@with_fake_llm
+def test_expired_entries_are_misses_and_purged(app, translator):
+    app.config['TRANSLATION_CACHE_TTL'] = 3600
+    translate('Old', 'Stale')
+    expired = datetime.utcnow() - timedelta(hours=2)
+    NoteTranslation.query.update({'created_at': expired})
+    db.session.commit()
+
+    # A lookup treats the expired entry as a miss and replaces it
+    translator.texts.clear()
+    assert translate('Old') == ({'0': '[fr] Old'}, {'0': False})
+    assert translator.texts == ['Old']
+
+    # Eviction purges expired entries nobody looked up
+    evict_translations()
+    db.session.commit()
+    assert cached_texts() == {text_hash('Old')}
+
+@with_fake_llm
+def test_least_recently_used_entries_are_evicted(app, translator):
+    app.config['TRANSLATION_CACHE_MAX_ENTRIES'] = 3
+    app.config['TRANSLATION_CACHE_EVICT_INTERVAL'] = 300
+    translate('a', 'b', 'c')
+    start = datetime.utcnow() - timedelta(minutes=10)
+    for minutes, text in enumerate('abc'):
+        NoteTranslation.query.filter_by(text_hash=text_hash(text)).update(
+            {'last_used_at': start + timedelta(minutes=minutes)})
+    db.session.commit()
+    translate('a')  # now the most recently used
+
+    # Stores within the eviction interval do not trim the cache...
+    translate('d')
+    assert len(cached_texts()) == 4
+
+    # ...the next one after it does, dropping the least recently used entry
+    app.config['TRANSLATION_CACHE_EVICT_INTERVAL'] = 0
+    app.extensions['translation_eviction']['next'] = 0.0
+    translate('e')
+    assert cached_texts() == {text_hash(text) for text in 'ade'}
+
+if __name__ == '__main__':
+    test_unchanged_text_is_served_from_cache()
+    test_editing_a_paragraph_keeps_later_chunks_cached()
+    test_expired_entries_are_misses_and_purged()
+    test_least_recently_used_entries_are_evicted()
+    print('✅ translation cache works')
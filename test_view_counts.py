@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Test buffered view counting for shared notes: views within the flush
+interval are held in memory, reported as pending, and written to the
+database by the background flush once the interval has passed, with no
+further view needed to trigger it.
+
+Uses a file-backed SQLite database, since the flush runs on another thread
+(an in-memory one shares a single connection).
+"""
+import os
+import time
+
+os.environ.setdefault('GITHUB_TOKEN', 'test-token')
+os.environ.setdefault('FLASK_CONFIG', 'testing')
+
+from conftest import file_backed_app
+from src.models.share import SharedNote
+from src.models.user import db
+
+def stored_views(share_id):
+    db.session.remove()
+    return db.session.get(SharedNote, share_id).view_count
+
+def test_buffered_views_are_written_without_another_view(file_app):
+    app = file_app
+    counter = app.extensions['view_counts']
+    counter.interval = 0.5
+
+    client = app.test_client()
+    note = client.post('/api/notes', json={'title': 'Shared', 'content': 'Hello'}).get_json()
+    share = client.post(f"/api/notes/{note['id']}/share", json={}).get_json()['share']
+    token = share['share_token']
+
+    # Views inside the interval stay buffered but are already reported
+    for _ in range(3):
+        assert client.get(f'/shared/{token}').status_code == 200
+    assert client.get(f'/api/shares/{token}').get_json()['share_info']['view_count'] == 4
+    with app.app_context():
+        assert stored_views(share['id']) == 0
+
+    # The scheduled flush writes them once the interval has passed
+    deadline = time.monotonic() + 5
+    with app.app_context():
+        while stored_views(share['id']) < 4 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert stored_views(share['id']) == 4
+    assert counter.pending_for(share['id']) == 0 and counter.timer is None
+
+if __name__ == '__main__':
+    with file_backed_app() as app:
+        test_buffered_views_are_written_without_another_view(app)
+    print('✅ buffered view counts are flushed in the background')